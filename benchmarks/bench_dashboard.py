@@ -0,0 +1,267 @@
+"""End-to-end dashboard benchmarks against a fake Sheets backend and a local webhook stub.
+
+Measures module import times, then for every dataset size sheet loads
+(cold, warm, after a one-row edit and after ten appended rows), the columnar store, search,
+lead deduplication, deadline queries, metrics, webhook round trips and AppTest renders of each page. Results
+are written as JSON and checked against per-size budgets in
+thresholds.json (and, optionally, a previous results file); the exit
+status is 1 when anything regressed. Budgets are about three times the
+slowest of several measured runs, never lower for a larger size.
+
+Run from the repository root:
+
+    python benchmarks/bench_dashboard.py [--sizes 1000,10000,100000] [--output .cache/bench-results.json]
+        [--baseline old.json] [--tolerance 0.25] [--sheets-latency-ms 0] [--webhook-latency-ms 0]
+
+Sizes up to 1,000,000 rows work but need several GB of memory.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+import streamlit as st
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+
+from fakes import QUERIES, install_backend, share_script_cache  # noqa: E402
+
+import utils  # noqa: E402
+import views  # noqa: E402
+from deadlines import DeadlineIndex  # noqa: E402
+from dedup import LeadDuplicates  # noqa: E402
+from search import SearchIndex  # noqa: E402
+from store import ColumnStore  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+DASHBOARD = os.path.join(ROOT, "dashboard.py")
+PAGES = ["Dashboard Overview", "Approve Leads", "Manage Tasks"]
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+THRESHOLDS = os.path.join(HERE, "thresholds.json")
+# What dashboard.py imports before drawing anything; streamlit and pandas,
+# which every page needs, are loaded before timing starts
+APP_MODULES = ["cora", "mark", "opsi", "perf", "styles", "utils", "views"]
+
+IMPORT_SCRIPT = """
+import sys, time
+sys.path.insert(0, {root!r})
+import pandas, streamlit
+for name in {preload!r}:
+    __import__(name)
+start = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+print((time.perf_counter() - start) * 1000)
+"""
+
+
+def measure(fn, repeat=5):
+    """Median wall time of `fn` in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def render(page, at=None):
+    """Run one page in a (new or given) AppTest session, failing on any exception"""
+    at = at or AppTest.from_file(DASHBOARD, default_timeout=600)
+    at.session_state["selected_page"] = page
+    at.run()
+    if at.exception:
+        raise RuntimeError(f"{page}: {at.exception[0].value}")
+    return at
+
+
+def import_ms(modules, preload=(), repeat=5):
+    """Median time to import `modules` in a fresh interpreter, after `preload`"""
+    samples = []
+    for _ in range(repeat):
+        script = IMPORT_SCRIPT.format(root=ROOT, preload=list(preload), modules=list(modules))
+        out = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+        samples.append(float(out.split()[-1]))
+    return statistics.median(samples)
+
+
+def bench_imports():
+    """Import cost of the app shell, then of each page's module on top of it"""
+    results = {"import.app": import_ms(APP_MODULES)}
+    for page in PAGES:
+        results[f"import.{page}"] = import_ms([views.PAGES[page][0]], preload=APP_MODULES)
+    return results
+
+
+def bench_size(rows, args):
+    """All benchmarks for one dataset size, as {name: ms}"""
+    workdir = tempfile.mkdtemp(prefix="apexx-bench-")
+    client, stub = install_backend(workdir, rows, rows, args.sheets_latency_ms / 1000, args.webhook_latency_ms / 1000)
+    results = {}
+    try:
+        # Streamlit's first secrets read also installs file watchers (~0.4 s);
+        # do it before timing so load.*.cold measures the sheet alone
+        st.secrets.get("OUTBOX_PATH")
+
+        # Data load: inline fetch + parse on a cold cache, then the served snapshot
+        for name in ("CORA", "OPSI"):
+            results[f"load.{name}.cold"] = measure(lambda: utils.load_sheet(name), repeat=1)
+            results[f"load.{name}.warm"] = measure(lambda: utils.load_sheet(name), repeat=20)
+
+            sheet_id = utils.get_sheet_id(name)
+
+            def edit_and_refresh():
+                values = client.http_client.sheets[sheet_id]
+                row = list(values[1])
+                row[1] = f"{row[1]}!"  # Name / Task Title
+                client.http_client.update_row(sheet_id, 0, row)
+                utils.refresh_sheet(name)
+                utils.get_sheet_sync(name).snapshot()
+
+            results[f"load.{name}.one_row_edit"] = measure(edit_and_refresh, repeat=3)
+
+            def append_and_refresh():
+                values = client.http_client.sheets[sheet_id]
+                rows = [[f"{values[-1][0]}-{i}"] + list(values[-1][1:]) for i in range(10)]
+                client.http_client.append_rows(sheet_id, rows)
+                utils.refresh_sheet(name)
+                utils.get_sheet_sync(name).snapshot()
+
+            results[f"load.{name}.append_10"] = measure(append_and_refresh, repeat=3)
+
+        leads = utils.load_sheet("CORA")
+        tasks = utils.load_sheet("OPSI")
+        results["store.CORA.build"] = measure(lambda: ColumnStore("CORA", leads), repeat=3)
+        results["store.OPSI.build"] = measure(lambda: ColumnStore("OPSI", tasks), repeat=3)
+
+        # Search over the same columns the Approve Leads page indexes
+        columns = ["Lead ID", "Name", "Email", "Organization"]
+        results["search.CORA.build"] = measure(lambda: SearchIndex(leads, columns), repeat=3)
+        index = SearchIndex(leads, columns)
+        results["search.CORA.query"] = statistics.median(measure(lambda: index.search(q), repeat=5) for q in QUERIES)
+        results["dedup.CORA.build"] = measure(lambda: LeadDuplicates(leads), repeat=3)
+
+        # Deadline index: build, the Manage Tasks panel queries, and one in-place edit
+        results["deadlines.OPSI.build"] = measure(lambda: DeadlineIndex(tasks, 0), repeat=3)
+        deadlines = DeadlineIndex(tasks, 0)
+        today = date.today()
+        results["deadlines.OPSI.query"] = measure(
+            lambda: (deadlines.overdue(today, limit=500), deadlines.due_soon(today, 7, limit=500), deadlines.counts(None, today)),
+            repeat=5,
+        )
+        results["deadlines.OPSI.update"] = measure(
+            lambda: deadlines.update("T0000001", {"Deadline Date": str(today), "Priority": "High"}, deadlines.version, deadlines.version + 1),
+            repeat=5,
+        )
+
+        results["metrics.CORA"] = measure(lambda: utils.compute_sheet_metrics("CORA", leads, date.today()), repeat=3)
+        results["metrics.OPSI"] = measure(lambda: utils.compute_sheet_metrics("OPSI", tasks, date.today()), repeat=3)
+
+        # Webhook round trips through the pooled session
+        task = {"taskId": "T0000000", "title": "Benchmark", "status": "In Progress", "priority": "High"}
+        results["webhook.update_opsi_task"] = measure(lambda: utils.post_opsi_webhook(utils.OPSI_UPDATE_WEBHOOK_URL, task), repeat=20)
+        updates = [dict(task, taskId=f"T{i:07d}") for i in range(50)]
+        results["webhook.bulk_50"] = measure(lambda: utils.run_opsi_bulk([], updates), repeat=3)
+
+        # Page renders: a cold start of each page (first render after a restart,
+        # served from the snapshot), then the first run and a rerun of a new session
+        for page in PAGES:
+            st.cache_resource.clear()
+            results[f"page.{page}.cold"] = measure(lambda: render(page), repeat=1)
+        for page in PAGES:
+            results[f"page.{page}.first"] = measure(lambda: render(page), repeat=3)
+            at = render(page)
+            results[f"page.{page}.rerun"] = measure(lambda: render(page, at), repeat=3)
+    finally:
+        stub.stop()
+    return results
+
+
+def check(results, thresholds, baseline, tolerance):
+    """Attach each result's budget and status; return the list of regressions"""
+    regressions = []
+    for entry in results:
+        budget = thresholds.get(entry["name"], {}).get(str(entry["rows"]))
+        previous = baseline.get((entry["name"], entry["rows"]))
+        entry["threshold_ms"] = budget
+        entry["baseline_ms"] = previous
+        failed = []
+        if budget is not None and entry["ms"] > budget:
+            failed.append(f"over budget {budget:.0f} ms")
+        if previous is not None and entry["ms"] > previous * (1 + tolerance):
+            failed.append(f"{entry['ms'] / previous - 1:+.0%} vs baseline {previous:.1f} ms")
+        entry["status"] = "regressed" if failed else "ok"
+        if failed:
+            regressions.append(f"{entry['name']} @ {entry['rows']:,} rows: {entry['ms']:.1f} ms ({'; '.join(failed)})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the command center against synthetic data")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="Comma-separated row counts per sheet")
+    parser.add_argument("--output", default=os.path.join(".cache", "bench-results.json"), help="Where to write the JSON results")
+    parser.add_argument("--thresholds", default=THRESHOLDS, help="Per-size budgets in ms (JSON)")
+    parser.add_argument("--baseline", help="Earlier results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown vs the baseline")
+    parser.add_argument("--sheets-latency-ms", type=float, default=0, help="Simulated latency per Sheets API call")
+    parser.add_argument("--webhook-latency-ms", type=float, default=0, help="Simulated latency per webhook call")
+    args = parser.parse_args(argv)
+
+    output = os.path.abspath(args.output)
+    with open(args.thresholds) as f:
+        thresholds = json.load(f)
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = {(r["name"], r["rows"]): r["ms"] for r in json.load(f)["results"]}
+
+    share_script_cache()
+    results = []
+    # Import costs do not depend on the data, so they are recorded once (as 0 rows)
+    for name, ms in bench_imports().items():
+        results.append({"name": name, "rows": 0, "ms": round(ms, 3)})
+        print(f"{0:>9,}  {name:<32}{ms:>10.1f} ms", flush=True)
+    for rows in (int(s) for s in args.sizes.split(",")):
+        for name, ms in bench_size(rows, args).items():
+            results.append({"name": name, "rows": rows, "ms": round(ms, 3)})
+            print(f"{rows:>9,}  {name:<32}{ms:>10.1f} ms", flush=True)
+
+    regressions = check(results, thresholds, baseline, args.tolerance)
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "streamlit": st.__version__,
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+        },
+        "settings": {
+            "sheets_latency_ms": args.sheets_latency_ms,
+            "webhook_latency_ms": args.webhook_latency_ms,
+            "tolerance": args.tolerance,
+        },
+        "results": results,
+        "regressions": regressions,
+    }
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\nWrote {len(results)} results to {output}")
+    for line in regressions:
+        print(f"REGRESSED {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""Compare the lead search index against the dashboard's former str.contains scans.
+
+Run from the repository root:
+
+    python benchmarks/bench_search.py [rows]
+"""
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fakes import lead_values  # noqa: E402
+from search import SearchIndex  # noqa: E402
+
+QUERIES = ["maria", "garc", "church", "springfield", "okafor gracechurch", "gren", "jonhson", "example.org", "city of salem"]
+
+
+def make_leads(rows):
+    """Synthetic CORA leads (the benchmark sheet's name, email and organization columns)"""
+    values = lead_values(rows)
+    return pd.DataFrame(values[1:], columns=values[0])[["Name", "Email", "Organization"]]
+
+
+def scan(df, query):
+    """The dashboard's previous search: three case-insensitive substring scans"""
+    mask = (
+        df["Name"].str.contains(query, case=False, na=False) |
+        df["Email"].str.contains(query, case=False, na=False) |
+        df["Organization"].str.contains(query, case=False, na=False)
+    )
+    return df[mask]
+
+
+def timed(fn, repeat):
+    """Median wall time of `fn` in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return sorted(samples)[len(samples) // 2]
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    df = make_leads(rows)
+
+    start = time.perf_counter()
+    index = SearchIndex(df, ["Name", "Email", "Organization"])
+    build_ms = (time.perf_counter() - start) * 1000
+    print(f"rows={rows} index_build_ms={build_ms:.0f} vocab={len(index.vocab)}")
+    print(f"{'query':<22}{'scan_ms':>10}{'index_ms':>10}{'scan_hits':>11}{'index_hits':>12}")
+    for query in QUERIES:
+        scan_ms = timed(lambda: scan(df, query), 3)
+        index_ms = timed(lambda: index.search(query), 20)
+        print(f"{query:<22}{scan_ms:>10.2f}{index_ms:>10.3f}{len(scan(df, query)):>11}{len(index.search(query)):>12}")
+
+
+if __name__ == "__main__":
+    main()
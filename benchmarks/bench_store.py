@@ -0,0 +1,75 @@
+"""Measure memory of the columnar lead/task store against the frames and record lists it replaces.
+
+Run from the repository root:
+
+    python benchmarks/bench_store.py [rows]
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fakes import lead_values, task_values  # noqa: E402
+from store import ColumnStore  # noqa: E402
+from utils import parse_sheet  # noqa: E402
+
+
+def make_sheet(name, values):
+    """Snapshot frame exactly as SheetSync serves it (raw cells parsed by the sheet schema)"""
+    header = values[0]
+    raw = pd.DataFrame(values[1:], columns=header, dtype=object)
+    return parse_sheet(name, raw, header)
+
+
+def traced_bytes(fn):
+    """Bytes of Python objects allocated (and still held) by the result of `fn`"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = fn()
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del result
+    return held
+
+
+def frame_bytes(df):
+    """Deep memory footprint of a frame's columns"""
+    return int(df.memory_usage(deep=True, index=False).sum())
+
+
+def report(name, df, column):
+    """Print memory per 100k rows and query timings for one sheet"""
+    per = 100_000 / max(len(df), 1) / 2**20
+    store = ColumnStore(name, df)
+    records = traced_bytes(lambda: df.to_dict("records"))
+    round_trip = frame_bytes(pd.DataFrame(df.to_dict("records")))
+
+    start = time.perf_counter()
+    ColumnStore(name, df)
+    build_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    store.counts(column)
+    counts_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    pd.DataFrame(df.to_dict("records"))[column].value_counts()
+    dict_counts_ms = (time.perf_counter() - start) * 1000
+
+    print(f"{name} rows={len(df)} store_build_ms={build_ms:.0f}")
+    print(f"  MiB per 100k rows: records={records * per:.1f} rebuilt_frame={round_trip * per:.1f} "
+          f"frame={frame_bytes(df) * per:.1f} store={store.memory_bytes() * per:.1f}")
+    print(f"  {column!r} counts: store={counts_ms:.2f}ms via records={dict_counts_ms:.0f}ms")
+    print(f"  dtypes: {', '.join(f'{c.strip()}={t}' for c, t in store.frame.dtypes.items())}")
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    report("CORA", make_sheet("CORA", lead_values(rows)), "Status")
+    report("OPSI", make_sheet("OPSI", task_values(rows)), "Status")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""Local stand-ins for Google Sheets and the n8n webhooks, for benchmarks and load tests.
+
+`install_backend` points the app at a fake gspread client serving generated
+CORA/OPSI sheets and at a local webhook stub, inside a scratch working
+directory with its own .streamlit/secrets.toml, so snapshots, the outbox
+and every secret lookup stay out of the real checkout.
+"""
+import json
+import os
+import random
+import socket
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+from gspread.utils import a1_range_to_grid_range
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FIRST = ["James", "Maria", "Robert", "Linda", "Michael", "Patricia", "David", "Jennifer", "Kwame", "Aisha", "Chen", "Sofia"]
+LAST = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Okafor", "Nguyen", "Patel", "Hackett"]
+ORG_KIND = ["City of", "First Baptist Church of", "County of", "Grace Church", "Township of", "Community Center"]
+PLACES = ["Springfield", "Riverside", "Franklin", "Greenville", "Bristol", "Clinton", "Fairview", "Salem", "Madison", "Georgetown"]
+LEAD_STATUS = ["New", "Qualified", "Contacted", "Approved", "Rejected"]
+
+TASK_TYPES = ["RFP Submission", "Contract Renewal", "Audit", "Compliance Report", "Other"]
+TASK_STATUS = ["New", "Pending", "In Progress", "Completed", "On Hold"]
+PRIORITIES = ["High", "Medium", "Low"]
+ASSIGNEES = ["Mark", "Alicia", "Dev Team", "Compliance", "Ops", "Finance"]
+NOTES = ["", "", "Waiting on client", "Call back Friday"]
+
+# Search terms a user would type, including prefixes and a typo
+QUERIES = ["maria", "garc", "church", "springfield", "okafor", "gren", "jonhson", "example.org", "city of salem"]
+
+
+# ========================================
+# SYNTHETIC SHEETS
+# ========================================
+
+def lead_values(rows, seed=7):
+    """CORA sheet values (header row first) as the Sheets API returns them"""
+    rng = random.Random(seed)
+    today = datetime.now()
+    values = [["Lead ID", "Name", "Email", "Organization", "Status", "Timestamp"]]
+    for i in range(rows):
+        first, last = rng.choice(FIRST), rng.choice(LAST)
+        org = f"{rng.choice(ORG_KIND)} {rng.choice(PLACES)}"
+        created = today - timedelta(days=rng.randint(0, 120), minutes=rng.randint(0, 1439))
+        values.append([
+            f"L{i:07d}",
+            f"{first} {last}",
+            f"{first[0].lower()}{last.lower()}{i}@{org.split()[-1].lower()}.example.org",
+            org,
+            rng.choice(LEAD_STATUS),
+            created.strftime("%Y-%m-%d %H:%M:%S"),
+        ])
+    return values
+
+
+def task_values(rows, seed=11):
+    """OPSI sheet values (header row first) as the Sheets API returns them"""
+    rng = random.Random(seed)
+    today = datetime.now()
+    values = [["Task ID", "Task Title", "Task Type", "Assigned To", "Deadline Date", "Status", "Priority", "Notes"]]
+    for i in range(rows):
+        kind = rng.choice(TASK_TYPES)
+        deadline = today + timedelta(days=rng.randint(-30, 90))
+        values.append([
+            f"T{i:07d}",
+            f"{kind} for {rng.choice(PLACES)} #{i}",
+            kind,
+            rng.choice(ASSIGNEES),
+            deadline.strftime("%Y-%m-%d"),
+            rng.choice(TASK_STATUS),
+            rng.choice(PRIORITIES),
+            rng.choice(NOTES),
+        ])
+    return values
+
+
+# ========================================
+# FAKE GSPREAD CLIENT
+# ========================================
+
+class FakeHTTPClient:
+    """The two gspread HTTP client calls SheetSource makes, served from memory.
+
+    `latency` seconds are slept per call to stand in for the network.
+    """
+
+    def __init__(self, sheets, latency=0.0):
+        self.sheets = sheets
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.modified = {sheet_id: _rfc3339(time.time()) for sheet_id in sheets}
+        self.calls = {"metadata": 0, "values": 0}
+        # Always-valid token, so the scheduler's credentials job never refreshes
+        expiry = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(days=365)
+        self.session = SimpleNamespace(credentials=SimpleNamespace(valid=True, expiry=expiry, refresh=lambda request: None))
+
+    def get_file_drive_metadata(self, sheet_id):
+        self._wait("metadata")
+        with self.lock:
+            return {"id": sheet_id, "modifiedTime": self.modified[sheet_id]}
+
+    def values_batch_get(self, sheet_id, ranges, params=None):
+        self._wait("values")
+        with self.lock:
+            values = self.sheets[sheet_id]
+        return {"spreadsheetId": sheet_id, "valueRanges": [{"range": r, "values": _slice(values, r)} for r in ranges]}
+
+    def update_row(self, sheet_id, position, row):
+        """Replace one data row (0-based, header excluded) and bump the modified time"""
+        with self.lock:
+            values = list(self.sheets[sheet_id])
+            values[position + 1] = row
+            self.sheets[sheet_id] = values
+            self.modified[sheet_id] = _rfc3339(time.time())
+
+    def append_rows(self, sheet_id, rows):
+        """Add data rows after the last one and bump the modified time"""
+        with self.lock:
+            self.sheets[sheet_id] = self.sheets[sheet_id] + [list(row) for row in rows]
+            self.modified[sheet_id] = _rfc3339(time.time())
+
+    def _wait(self, kind):
+        with self.lock:
+            self.calls[kind] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+
+class FakeSheetsClient:
+    """Just enough of gspread.Client for the app: its `http_client`"""
+
+    def __init__(self, leads, tasks, latency=0.0):
+        self.http_client = FakeHTTPClient({"cora": lead_values(leads), "opsi": task_values(tasks)}, latency)
+
+
+def _slice(values, a1):
+    """Cells of an A1 range, trimmed of trailing blanks like the Sheets API"""
+    grid = a1_range_to_grid_range(a1)
+    rows = values[grid.get("startRowIndex", 0):grid.get("endRowIndex")]
+    first, last = grid.get("startColumnIndex", 0), grid.get("endColumnIndex")
+    if first == 0 and (last is None or last >= max(map(len, values), default=0)):
+        return rows
+    cells = [_trim(row[first:last]) for row in rows]
+    while cells and not cells[-1]:
+        cells.pop()
+    return cells
+
+
+def _trim(row):
+    while row and row[-1] == "":
+        row.pop()
+    return row
+
+
+def _rfc3339(ts):
+    """Drive-style modifiedTime for a timestamp"""
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+# ========================================
+# N8N WEBHOOK STUB
+# ========================================
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 drops concurrent connects, which then wait ~1 s for a SYN retry
+    request_queue_size = 128
+
+
+class WebhookStub:
+    """Local HTTP server answering like the n8n webhooks the app calls.
+
+    POSTs succeed (task creates get a generated taskId) after `latency`
+    seconds; GETs on a webhook path answer n8n's "not registered for GET"
+    404 and /healthz answers 200, so health probes report Active.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.posts = {}
+        self.server = StubServer(("127.0.0.1", 0), self._handler())
+        threading.Thread(target=self.server.serve_forever, name="webhook-stub", daemon=True).start()
+
+    @property
+    def address(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, path):
+        return f"{self.address}/webhook/{path}"
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, like n8n behind its proxy
+
+            def setup(self):
+                super().setup()
+                # Headers and body go out as separate writes; without this, Nagle plus
+                # delayed ACKs add ~40 ms to every keep-alive response
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, body):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path == "/healthz":
+                    self._reply(200, {"status": "ok"})
+                else:
+                    self._reply(404, {"message": "This webhook is not registered for GET requests"})
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if stub.latency:
+                    time.sleep(stub.latency)
+                with stub.lock:
+                    count = stub.posts[self.path] = stub.posts.get(self.path, 0) + 1
+                if self.path.endswith("create-task"):
+                    self._reply(200, {"taskId": f"TSTUB{count:05d}"})
+                else:
+                    self._reply(200, {"ok": True})
+
+        return Handler
+
+
+# ========================================
+# INSTALLATION
+# ========================================
+
+def install_backend(workdir, leads, tasks, sheets_latency=0.0, webhook_latency=0.0):
+    """Point the app at fake Sheets and a webhook stub, returning (client, stub).
+
+    Changes into `workdir` and writes .streamlit/secrets.toml there, so the
+    app's secrets, snapshots and outbox resolve inside it (also from
+    background threads). Safe to call again to swap in a new dataset.
+    """
+    import streamlit as st
+    import utils
+    from outbox import Outbox
+
+    os.makedirs(os.path.join(workdir, ".streamlit"), exist_ok=True)
+    with open(os.path.join(workdir, ".streamlit", "secrets.toml"), "w") as f:
+        f.write('CORA_SHEET_ID = "cora"\nOPSI_SHEET_ID = "opsi"\nINGEST_ENABLED = false\n')
+    os.chdir(workdir)
+    for name in ("cora.arrow", "opsi.arrow"):
+        path = os.path.join(workdir, ".cache", "snapshots", name)
+        if os.path.exists(path):
+            os.remove(path)
+
+    client = FakeSheetsClient(leads, tasks, sheets_latency)
+    stub = WebhookStub(webhook_latency)
+    utils.connect_to_sheets = lambda: client
+    utils.OPSI_CREATE_WEBHOOK_URL = stub.url("opsi-create-task")
+    utils.OPSI_UPDATE_WEBHOOK_URL = stub.url("opsi-update-task")
+    utils.MARK_WEBHOOK_URL = stub.url("mark-approve-leads")
+    utils.Outbox = lambda path: Outbox(path, webhook_url=utils.MARK_WEBHOOK_URL)
+    # The fake has no quota to protect; keep the read budget out of the timings
+    utils.READS_PER_MINUTE = 60_000
+    utils.BURST = 1_000
+
+    # Sheet state, stores and indexes are shared resources; start from nothing
+    st.cache_resource.clear()
+    return client, stub
+
+
+def share_script_cache():
+    """Compile the dashboard once across AppTest runs, as a live server does.
+
+    AppTest builds a fresh ScriptCache per run, which adds a full
+    recompile of dashboard.py to every measured rerun.
+    """
+    from streamlit.testing.v1 import app_test, local_script_runner
+
+    cache = app_test.ScriptCache()
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: cache
@@ -0,0 +1,409 @@
+"""Multi-session load test of a real Streamlit server against a fake Sheets backend and webhook stub.
+
+Starts the dashboard in a child process (fake gspread client, local n8n
+stub, scratch working directory) and drives it with N concurrent
+simulated browsers speaking Streamlit's websocket protocol. Each user
+loops through realistic flows: browsing the overview, searching leads,
+selecting and approving leads and updating a task. Widgets inside
+fragments send fragment reruns, exactly as the browser does.
+
+For each session count it reports throughput, per-action latency
+percentiles, payload sizes, errors and the server process's RSS (before,
+peak, and with the sessions still connected), and writes all of it as
+JSON.
+
+Run from the repository root:
+
+    python benchmarks/load_test.py [--sessions 1,5,10,25] [--iterations 5] [--flows overview,search,approve,tasks]
+        [--leads 5000] [--tasks 5000] [--think-ms 200] [--output .cache/load-results.json]
+        [--sheets-latency-ms 0] [--webhook-latency-ms 0]
+
+Use `--flows approve` to reproduce everyone opening Approve Leads at once.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from datetime import datetime
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+
+from fakes import QUERIES, install_backend  # noqa: E402
+
+from stats import percentile  # noqa: E402
+from streamlit.proto.BackMsg_pb2 import BackMsg  # noqa: E402
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg  # noqa: E402
+from streamlit.proto.WidgetStates_pb2 import WidgetState  # noqa: E402
+
+try:
+    from websockets.sync.client import connect
+except ImportError:  # Installed alongside Streamlit's server; needed only by this script
+    connect = None
+
+try:
+    import psutil
+except ImportError:  # Fall back to /proc on Linux
+    psutil = None
+
+DASHBOARD = os.path.join(ROOT, "dashboard.py")
+FLOWS = ["overview", "search", "approve", "tasks"]
+DEFAULT_SESSIONS = [1, 5, 10, 25]
+RSS_INTERVAL = 0.25     # Seconds between server memory samples
+
+DONE = {ForwardMsg.FINISHED_SUCCESSFULLY, ForwardMsg.FINISHED_WITH_COMPILE_ERROR, ForwardMsg.FINISHED_FRAGMENT_RUN_SUCCESSFULLY}
+
+
+# ========================================
+# SERVER
+# ========================================
+
+def serve(args):
+    """Child process: the dashboard on `args.port`, backed by the fakes"""
+    install_backend(tempfile.mkdtemp(prefix="apexx-load-"), args.leads, args.tasks,
+                    args.sheets_latency_ms / 1000, args.webhook_latency_ms / 1000)
+    from streamlit.web import bootstrap
+
+    flags = {
+        "server.port": args.port,
+        "server.address": "127.0.0.1",
+        "server.headless": True,
+        "server.fileWatcherType": "none",
+        "browser.gatherUsageStats": False,
+        "logger.level": "warning",
+    }
+    bootstrap.load_config_options(flag_options=flags)
+    bootstrap.run(DASHBOARD, False, [], flags)
+
+
+def free_port():
+    """An unused local TCP port"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args):
+    """Launch the server child process (output to `args.server_log`) and wait until it answers its health check"""
+    command = [
+        sys.executable, os.path.abspath(__file__), "--serve",
+        "--port", str(args.port), "--leads", str(args.leads), "--tasks", str(args.tasks),
+        "--sheets-latency-ms", str(args.sheets_latency_ms), "--webhook-latency-ms", str(args.webhook_latency_ms),
+    ]
+    with open(args.server_log, "w") as log:
+        server = subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"server exited with {server.returncode}; see {args.server_log}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{args.port}/_stcore/health", timeout=1):
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("server did not become healthy within 60 s")
+
+
+def rss_mb(pid):
+    """Resident set size of a process in MB"""
+    if psutil is not None:
+        return psutil.Process(pid).memory_info().rss / 2**20
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+class RssSampler:
+    """Background peak-RSS tracker for the server process"""
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.peak = rss_mb(pid)
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while not self.stopped.wait(RSS_INTERVAL):
+            self.peak = max(self.peak, rss_mb(self.pid))
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+        return self.peak
+
+
+# ========================================
+# SIMULATED BROWSER
+# ========================================
+
+class BrowserSession:
+    """One dashboard tab: sends reruns with widget state and waits for the script to finish.
+
+    Widgets from the latest render are looked up by user key (or label
+    when unkeyed). Values persist across reruns like the frontend's
+    widget state, until the widget stops rendering; button triggers are
+    sent once.
+    """
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.widgets = {}     # key or label -> (widget id, fragment id)
+        self.values = {}      # widget id -> WidgetState
+
+    def find(self, name, prefix=False):
+        """(widget id, fragment id) of a rendered widget"""
+        if prefix:
+            name = next((k for k in self.widgets if k.startswith(name)), name)
+        if name not in self.widgets:
+            raise LookupError(f"widget {name!r} not rendered")
+        return self.widgets[name]
+
+    def set(self, name, prefix=False, **value):
+        """Change a widget's value and rerun its fragment (or the app)"""
+        widget_id, fragment_id = self.find(name, prefix)
+        state = WidgetState(id=widget_id, **value)
+        self.values[widget_id] = state
+        return self.rerun(fragment_id)
+
+    def click(self, name, prefix=False):
+        """Press a button and rerun its fragment (or the app)"""
+        widget_id, fragment_id = self.find(name, prefix)
+        return self.rerun(fragment_id, WidgetState(id=widget_id, trigger_value=True))
+
+    def rerun(self, fragment_id="", trigger=None):
+        """Send one rerun and read messages until the run (and any st.rerun() it caused) finishes.
+
+        Returns (received bytes, error message or None).
+        """
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.fragment_id = fragment_id
+        states = [s for s in self.values.values() if trigger is None or s.id != trigger.id]
+        msg.rerun_script.widget_states.widgets.extend(states + ([trigger] if trigger else []))
+        self.ws.send(msg.SerializeToString())
+
+        received, error = 0, None
+        while True:
+            data = self.ws.recv()
+            received += len(data)
+            fwd = ForwardMsg()
+            fwd.ParseFromString(data)
+            kind = fwd.WhichOneof("type")
+            if kind == "new_session":
+                # A fragment run re-renders only that fragment's widgets
+                self.widgets = {k: v for k, v in self.widgets.items() if fragment_id and v[1] != fragment_id}
+            elif kind == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                element = fwd.delta.new_element
+                field = element.WhichOneof("type")
+                if field == "exception":
+                    error = error or f"{element.exception.type}: {element.exception.message}"
+                    continue
+                widget = getattr(element, field)
+                widget_id = getattr(widget, "id", "")
+                if widget_id.startswith("$$ID-"):
+                    key = widget_id.split("-", 2)[2]
+                    name = key if key != "None" else getattr(widget, "label", "")
+                    self.widgets[name] = (widget_id, fwd.delta.fragment_id)
+            elif kind == "script_finished" and fwd.script_finished in DONE:
+                # Like the frontend, forget the state of widgets that are gone (ids change with their arguments)
+                rendered = {widget_id for widget_id, _ in self.widgets.values()}
+                self.values = {k: v for k, v in self.values.items() if k in rendered}
+                return received, error
+
+
+# ========================================
+# USER FLOWS
+# ========================================
+
+def overview(session, rng, args):
+    """Open the overview and read it"""
+    yield "open.overview", lambda: session.set("selected_page", string_value="Dashboard Overview")
+
+
+def search(session, rng, args):
+    """Open Approve Leads, type two searches and filter the selection grid"""
+    yield "open.approve_leads", lambda: session.set("selected_page", string_value="Approve Leads")
+    for query in rng.sample(QUERIES, 2):
+        yield "search.leads", lambda: session.set("🔍 Search leads by name, email, or organization...", string_value=query)
+    yield "filter.leads", lambda: session.set("lead_grid_filter", string_value=rng.choice(QUERIES))
+
+
+def approve(session, rng, args):
+    """Open Approve Leads, narrow the grid to a few leads, select them and approve"""
+    yield "open.approve_leads", lambda: session.set("selected_page", string_value="Approve Leads")
+    yield "filter.leads", lambda: session.set("lead_grid_filter", string_value=f"L{rng.randrange(args.leads // 10 or 1):06d}")
+    yield "select.leads", lambda: session.click("select_matching")
+    yield "approve.leads", lambda: session.click("approve_top")
+    yield "clear.selection", lambda: session.click("clear_selection")
+
+
+def tasks(session, rng, args):
+    """Open Manage Tasks, find a task by ID and update it"""
+    yield "open.manage_tasks", lambda: session.set("selected_page", string_value="Manage Tasks")
+    yield "search.tasks", lambda: session.set("task_id_search_input", string_value=f"T{rng.randrange(args.tasks):07d}")
+    yield "update.task", lambda: session.click("update_btn_", prefix=True)
+
+
+FLOW_STEPS = {"overview": overview, "search": search, "approve": approve, "tasks": tasks}
+
+
+def run_user(user, args, flows, samples, errors, finished, release):
+    """One simulated user: connect, loop through flows, then stay connected until released"""
+    rng = random.Random(user)
+    try:
+        with connect(f"ws://127.0.0.1:{args.port}/_stcore/stream", subprotocols=["streamlit"],
+                     max_size=None, open_timeout=60) as ws:
+            session = BrowserSession(ws)
+            record(samples, errors, "open.first_load", session.rerun)
+            for _ in range(args.iterations):
+                for step, action in FLOW_STEPS[rng.choice(flows)](session, rng, args):
+                    time.sleep(rng.uniform(0, 2 * args.think_ms) / 1000)
+                    record(samples, errors, step, action)
+            finished.release()
+            release.wait()
+    except Exception as exc:
+        errors.append(f"user {user}: {exc!r}")
+        finished.release()
+
+
+def record(samples, errors, step, action):
+    """Time one action into `samples[step]` as (seconds, bytes)"""
+    start = time.perf_counter()
+    try:
+        received, error = action()
+    except LookupError as exc:
+        errors.append(f"{step}: {exc}")
+        return
+    samples.setdefault(step, []).append((time.perf_counter() - start, received))
+    if error:
+        errors.append(f"{step}: {error}")
+
+
+def run_level(sessions, args, flows, pid):
+    """All users for one session count; returns the level's report"""
+    samples, errors = {}, []
+    finished, release = threading.Semaphore(0), threading.Event()
+    rss_before = rss_mb(pid)
+    sampler = RssSampler(pid)
+    started = time.perf_counter()
+    users = [threading.Thread(target=run_user, args=(i, args, flows, samples, errors, finished, release), daemon=True)
+             for i in range(sessions)]
+    for user in users:
+        user.start()
+    for _ in users:
+        finished.acquire()
+    elapsed = time.perf_counter() - started
+    rss_connected = rss_mb(pid)
+    release.set()
+    for user in users:
+        user.join()
+    peak = sampler.stop()
+
+    actions = {}
+    for step, values in sorted(samples.items()):
+        durations = [s for s, _ in values]
+        actions[step] = {
+            "count": len(values),
+            "p50_ms": percentile(durations, 50) * 1000,
+            "p95_ms": percentile(durations, 95) * 1000,
+            "p99_ms": percentile(durations, 99) * 1000,
+            "max_ms": max(durations) * 1000,
+            "mean_kb": sum(b for _, b in values) / len(values) / 1024,
+        }
+    count = sum(a["count"] for a in actions.values())
+    return {
+        "sessions": sessions,
+        "actions": count,
+        "elapsed_s": elapsed,
+        "throughput_per_s": count / elapsed if elapsed else 0.0,
+        "errors": len(errors),
+        "error_samples": errors[:10],
+        "rss_before_mb": rss_before,
+        "rss_peak_mb": peak,
+        "rss_connected_mb": rss_connected,
+        "rss_per_session_mb": (rss_connected - rss_before) / sessions,
+        "latency": actions,
+    }
+
+
+def print_level(level):
+    print(f"\n{level['sessions']} session(s): {level['actions']} actions in {level['elapsed_s']:.1f} s "
+          f"= {level['throughput_per_s']:.1f}/s, {level['errors']} error(s); RSS {level['rss_before_mb']:.0f} -> "
+          f"{level['rss_connected_mb']:.0f} MB connected (peak {level['rss_peak_mb']:.0f}, "
+          f"{level['rss_per_session_mb']:+.1f} MB/session)")
+    print(f"  {'action':<22}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'kB':>9}")
+    for step, a in level["latency"].items():
+        print(f"  {step:<22}{a['count']:>6}{a['p50_ms']:>10.0f}{a['p95_ms']:>10.0f}{a['p99_ms']:>10.0f}"
+              f"{a['max_ms']:>10.0f}{a['mean_kb']:>9.0f}")
+    for line in level["error_samples"]:
+        print(f"  ERROR {line}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the command center with concurrent simulated sessions")
+    parser.add_argument("--sessions", default=",".join(map(str, DEFAULT_SESSIONS)), help="Comma-separated concurrent session counts")
+    parser.add_argument("--iterations", type=int, default=5, help="Flows each user runs per level")
+    parser.add_argument("--flows", default=",".join(FLOWS), help=f"Flows users pick from at random ({', '.join(FLOWS)})")
+    parser.add_argument("--leads", type=int, default=5_000, help="Rows in the fake CORA sheet")
+    parser.add_argument("--tasks", type=int, default=5_000, help="Rows in the fake OPSI sheet")
+    parser.add_argument("--think-ms", type=float, default=200, help="Mean pause between a user's actions")
+    parser.add_argument("--port", type=int, default=0, help="Port for the dashboard server (default: any free port)")
+    parser.add_argument("--output", default=os.path.join(".cache", "load-results.json"), help="Where to write the JSON results")
+    parser.add_argument("--server-log", default=os.path.join(".cache", "load-server.log"), help="Where the server's output goes")
+    parser.add_argument("--sheets-latency-ms", type=float, default=0, help="Simulated latency per Sheets API call")
+    parser.add_argument("--webhook-latency-ms", type=float, default=0, help="Simulated latency per webhook call")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        return serve(args)
+    if connect is None:
+        parser.error("the websockets package is required (pip install websockets)")
+    flows = [f.strip() for f in args.flows.split(",") if f.strip()]
+    unknown = set(flows) - set(FLOWS)
+    if unknown:
+        parser.error(f"unknown flows: {', '.join(sorted(unknown))}")
+
+    args.port = args.port or free_port()
+    args.server_log = os.path.abspath(args.server_log)
+    os.makedirs(os.path.dirname(args.server_log), exist_ok=True)
+    server = start_server(args)
+    levels = []
+    try:
+        for sessions in (int(s) for s in args.sessions.split(",")):
+            level = run_level(sessions, args, flows, server.pid)
+            print_level(level)
+            levels.append(level)
+    finally:
+        server.terminate()
+        server.wait()
+
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "environment": {"python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count()},
+        "settings": {k: v for k, v in vars(args).items() if k not in ("serve", "output", "server_log", "port")},
+        "levels": levels,
+    }
+    output = os.path.abspath(args.output)
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {len(levels)} level(s) to {output}")
+    return 1 if any(level["errors"] for level in levels) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
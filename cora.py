@@ -1,15 +1,11 @@
 import streamlit as st
 import pandas as pd
-from utils import load_cora_data
+from utils import load_cora_data, get_sheet_store, get_agent_status
 
 def get_cora_status():
-    """Return CORA agent status"""
-    return "Active"
+    """Return CORA agent status from the background health probes"""
+    return get_agent_status("CORA")
 
-def get_cora_leads():
-    """Get CORA leads as list of dictionaries"""
-    try:
-        df = load_cora_data()
-        return df.to_dict('records') if not df.empty else []
-    except:
-        return []
+def get_cora_store():
+    """Get CORA leads as a typed columnar store (shared, read-only)"""
+    return get_sheet_store("CORA", load_cora_data())
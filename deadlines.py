@@ -0,0 +1,233 @@
+import threading
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+# ========================================
+# DEADLINE INDEX
+# ========================================
+
+# Tasks in these states are done and never overdue or due
+CLOSED_STATUSES = {"Completed", "Cancelled"}
+
+# Bucket labels for tasks without an assignee or priority
+UNASSIGNED = "Unassigned"
+NO_PRIORITY = "None"
+
+# Index columns filled from OPSI columns (canonical names)
+FIELDS = {"Task ID": "task_id", "Task Title": "title", "Assigned To": "assignee", "Priority": "priority", "Status": "status"}
+
+# Keys are day * 2**32 + row: sorted by deadline, then sheet order, and unique per row
+ROW_BITS = 32
+
+
+def day_number(value):
+    """Days since 1970-01-01 for a date, datetime or date string"""
+    return int(np.datetime64(pd.Timestamp(value).date(), "D").astype(np.int64))
+
+
+def _text(series, blank):
+    """Stripped cell texts as an object array, blanks replaced by `blank`"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Clean each category once, then expand by code
+        labels = np.append(_text(pd.Series(series.cat.categories, dtype=object), blank), blank).astype(object)
+        return labels[series.cat.codes.to_numpy()]
+    values = series.fillna("").astype(str).str.strip()
+    return values.where(values != "", blank).to_numpy(dtype=object)
+
+
+class DeadlineIndex:
+    """Open OPSI tasks sorted by deadline, bucketed by assignee and priority.
+
+    Each (assignee, priority) bucket holds a sorted int64 array of keys
+    (deadline day, then row), so a date range is two binary searches per
+    bucket and a count never touches the rows themselves. Completed,
+    cancelled and undated tasks are kept as rows but not indexed. `update`
+    moves one task between buckets in place, so a single edit does not
+    rebuild the index. Shared between sessions; every method takes the lock.
+    """
+
+    def __init__(self, df=None, version=None):
+        self.lock = threading.Lock()
+        self.version = None
+        self.size = 0
+        if df is not None:
+            self.rebuild(df, version)
+
+    def rebuild(self, df, version=None):
+        """Index every row of an OPSI frame (typed, canonical headers) as of `version`"""
+        size = len(df)
+        column = lambda name: df[name] if name in df.columns else pd.Series([""] * size, index=df.index, dtype=object)
+        deadlines = pd.to_datetime(column("Deadline Date"), errors="coerce")
+        days = deadlines.to_numpy(dtype="datetime64[ns]").astype("datetime64[D]")
+        with self.lock:
+            self.size = size
+            self.task_id = _text(column("Task ID"), "")
+            self.title = _text(column("Task Title"), "")
+            self.assignee = _text(column("Assigned To"), UNASSIGNED)
+            self.priority = _text(column("Priority"), NO_PRIORITY)
+            self.status = _text(column("Status"), "")
+            self.dated = ~np.isnat(days)
+            self.day = np.where(self.dated, days.astype(np.int64), 0)
+
+            # Task ID -> first row holding it
+            first = ~pd.Index(self.task_id).duplicated()
+            self.ids = pd.Index(self.task_id[first])
+            self.id_rows = np.flatnonzero(first)
+            # Build the ID hash table now instead of inside the first update
+            self.ids.get_indexer(self.ids[:1])
+
+            self.buckets = {}
+            open_rows = ~pd.Series(self.status).isin(CLOSED_STATUSES).to_numpy()
+            rows = np.flatnonzero(self.dated & open_rows)
+            if len(rows):
+                assignee_codes, assignees = pd.factorize(self.assignee[rows])
+                priority_codes, priorities = pd.factorize(self.priority[rows])
+                codes = assignee_codes * len(priorities) + priority_codes
+                keys = self._keys(rows)
+                order = np.lexsort((keys, codes))
+                starts = np.flatnonzero(np.diff(codes[order], prepend=-1))
+                for code, chunk in zip(codes[order][starts], np.split(keys[order], starts[1:])):
+                    self.buckets[(assignees[code // len(priorities)], priorities[code % len(priorities)])] = chunk
+            self.version = version
+        return self
+
+    def _indexed(self, row):
+        return bool(self.dated[row]) and self.status[row] not in CLOSED_STATUSES
+
+    def _keys(self, rows):
+        return (self.day[rows] << ROW_BITS) + rows
+
+    def _bucket(self, row):
+        return (self.assignee[row], self.priority[row])
+
+    # ========================================
+    # IN-PLACE UPDATES
+    # ========================================
+
+    def update(self, task_id, values, from_version, to_version):
+        """Apply one task's changed cells (canonical column -> cell text) in place.
+
+        Only applies when the index is at `from_version` and the write moved
+        the sheet exactly one version on; otherwise the index is left as is
+        and the next `rebuild` catches up. Returns True when applied.
+        """
+        with self.lock:
+            if self.version is None or self.version != from_version or to_version != from_version + 1:
+                return False
+            found = self.ids.get_indexer([task_id])[0]
+            if found < 0:
+                row = self._append(task_id)
+            else:
+                row = int(self.id_rows[found])
+                self._remove(row)
+
+            for column, field in FIELDS.items():
+                if column in values and field != "task_id":
+                    blank = {"assignee": UNASSIGNED, "priority": NO_PRIORITY}.get(field, "")
+                    getattr(self, field)[row] = str(values[column]).strip() or blank
+            if "Deadline Date" in values:
+                deadline = pd.to_datetime(str(values["Deadline Date"]).strip() or None, errors="coerce")
+                self.dated[row] = pd.notna(deadline)
+                self.day[row] = day_number(deadline) if pd.notna(deadline) else 0
+
+            self._insert(row)
+            self.version = to_version
+            return True
+
+    def _append(self, task_id):
+        """Add an empty row for a task the index has not seen"""
+        row = self.size
+        self.size += 1
+        for field in FIELDS.values():
+            setattr(self, field, np.append(getattr(self, field), [task_id if field == "task_id" else ""]).astype(object))
+        self.assignee[row], self.priority[row] = UNASSIGNED, NO_PRIORITY
+        self.dated = np.append(self.dated, False)
+        self.day = np.append(self.day, 0)
+        self.ids = self.ids.append(pd.Index([task_id]))
+        self.id_rows = np.append(self.id_rows, row)
+        return row
+
+    def _remove(self, row):
+        if not self._indexed(row):
+            return
+        bucket = self._bucket(row)
+        keys = self.buckets.get(bucket)
+        key = self._keys(row)
+        pos = np.searchsorted(keys, key)
+        if pos < len(keys) and keys[pos] == key:
+            self.buckets[bucket] = np.delete(keys, pos)
+
+    def _insert(self, row):
+        if not self._indexed(row):
+            return
+        bucket = self._bucket(row)
+        keys = self.buckets.get(bucket, np.empty(0, dtype=np.int64))
+        key = self._keys(row)
+        self.buckets[bucket] = np.insert(keys, np.searchsorted(keys, key), key)
+
+    # ========================================
+    # RANGE QUERIES
+    # ========================================
+
+    def _slices(self, start, end, assignees, priorities):
+        """Sorted keys due on days [start, end) from each matching bucket"""
+        low = -(2 ** 62) if start is None else day_number(start) << ROW_BITS
+        high = 2 ** 62 if end is None else day_number(end) << ROW_BITS
+        for (assignee, priority), keys in self.buckets.items():
+            if (assignees and assignee not in assignees) or (priorities and priority not in priorities):
+                continue
+            yield (assignee, priority), keys[np.searchsorted(keys, low):np.searchsorted(keys, high)]
+
+    def due(self, start=None, end=None, assignees=None, priorities=None, limit=None):
+        """Open tasks due on days [start, end) (None = unbounded), earliest first, as a frame.
+
+        With `limit`, only the first rows of each bucket are merged, so the
+        cost depends on the limit rather than on how many tasks are in range.
+        """
+        with self.lock:
+            slices = [k[:limit] for _, k in self._slices(start, end, assignees, priorities)]
+            keys = np.sort(np.concatenate([np.empty(0, dtype=np.int64)] + slices))[:limit]
+            rows = keys & ((1 << ROW_BITS) - 1)
+            return pd.DataFrame({
+                "Task ID": self.task_id[rows],
+                "Task Title": self.title[rows],
+                "Assigned To": self.assignee[rows],
+                "Priority": self.priority[rows],
+                "Status": self.status[rows],
+                "Deadline Date": (keys >> ROW_BITS).astype("datetime64[D]"),
+            })
+
+    def counts(self, start=None, end=None, assignees=None, priorities=None):
+        """Open tasks due on days [start, end) per (assignee, priority), without reading rows"""
+        with self.lock:
+            return {bucket: len(keys) for bucket, keys in self._slices(start, end, assignees, priorities) if len(keys)}
+
+    def calendar(self, start, end, assignees=None, priorities=None):
+        """Open tasks due per day over [start, end), as a Series indexed by date"""
+        first = day_number(start)
+        days = np.zeros(max(0, day_number(end) - first), dtype=np.int64)
+        with self.lock:
+            for _, keys in self._slices(start, end, assignees, priorities):
+                days += np.bincount((keys >> ROW_BITS) - first, minlength=len(days))
+        return pd.Series(days, index=pd.date_range(pd.Timestamp(start), periods=len(days), freq="D").date)
+
+    def overdue(self, today, **options):
+        """Open tasks whose deadline is before today, most overdue first"""
+        return self.due(None, today, **options)
+
+    def due_soon(self, today, days=7, **options):
+        """Open tasks due today or within the next `days` days"""
+        return self.due(today, today + timedelta(days=days + 1), **options)
+
+    def labels(self):
+        """Assignees and priorities that have open dated tasks"""
+        with self.lock:
+            return sorted({a for a, _ in self.buckets}), sorted({p for _, p in self.buckets})
+
+    def undated_count(self):
+        """Open tasks without a parseable deadline"""
+        with self.lock:
+            open_rows = ~pd.Series(self.status).isin(CLOSED_STATUSES).to_numpy()
+            return int((open_rows & ~self.dated).sum())
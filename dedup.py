@@ -0,0 +1,274 @@
+import numpy as np
+import pandas as pd
+
+# ========================================
+# LEAD DEDUPLICATION
+# ========================================
+
+# Pragmatic address syntax: dot-atom local part, dotted host names, alphabetic TLD
+EMAIL_PATTERN = (
+    r"(?!\.)(?!.*\.\.)[A-Za-z0-9.!#$%&'*+/=?^_`{|}~-]+(?<!\.)"
+    r"@(?:[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?\.)+[A-Za-z]{2,63}"
+)
+
+# Name + organization texts are compared on their first MAX_CHARS characters
+MAX_CHARS = 64
+
+# MinHash signature length, split into LSH bands of BAND_ROWS hashes each.
+# Two texts with trigram Jaccard similarity s share a band with probability
+# 1 - (1 - s^4)^8: ~0.67 at 0.6, ~0.89 at 0.7, ~0.99 at 0.85
+NUM_HASHES = 32
+BAND_ROWS = 4
+
+# Share of equal MinHash values (estimated Jaccard similarity) for two
+# leads' name + organization texts to count as the same contact
+SIMILARITY = 0.7
+
+# Organization words in at least this share of leads (and this many) are
+# boilerplate and left out of the organization comparison
+COMMON_WORD_SHARE = 0.02
+COMMON_WORD_MIN = 20
+
+# Rows of an LSH bucket (or email) each row is compared with; larger buckets
+# are compared in sliding windows rather than all pairs
+BUCKET_WINDOW = 16
+
+SEED = 20240611
+
+
+def normalize_emails(series):
+    """Lower-cased, trimmed addresses with any +tag dropped from the local part"""
+    return series.fillna("").astype(str).str.strip().str.lower().str.replace(r"\+[^@]*(?=@)", "", regex=True)
+
+
+def valid_emails(series):
+    """Boolean array: which cells hold a syntactically valid address"""
+    return series.fillna("").astype(str).str.strip().str.fullmatch(EMAIL_PATTERN).fillna(False).to_numpy(dtype=bool)
+
+
+def normalize_texts(series):
+    """Lower-cased text with punctuation folded to single spaces"""
+    return series.fillna("").astype(str).str.lower().str.replace(r"[\W_]+", " ", regex=True).str.strip()
+
+
+def without_common_words(texts):
+    """Normalised texts minus words found in many rows ("first", "church", "of", "county").
+
+    Distinctive words then decide the similarity; a text made only of
+    common words is kept whole. Works once per distinct text.
+    """
+    codes, uniques = pd.factorize(texts)
+    words = pd.Series(list(uniques), dtype=object).str.split()
+    exploded = words.explode().dropna()
+    rows_per_text = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    frequency = pd.Series(rows_per_text[exploded.index], index=exploded.to_numpy()).groupby(level=0).sum()
+    common = set(frequency.index[frequency >= max(COMMON_WORD_SHARE * len(texts), COMMON_WORD_MIN)])
+    if not common:
+        return texts
+    kept = [" ".join(w for w in text if w not in common) or " ".join(text) for text in words]
+    return pd.Series(np.asarray(kept, dtype=object)[codes], index=texts.index, dtype=object)
+
+
+def minhash(texts, shingle=3):
+    """MinHash signatures (rows x NUM_HASHES, uint32) of each text's character n-grams.
+
+    Texts are packed into a fixed-width code point matrix, so n-gram
+    extraction is an array operation. Each n-gram is mixed to 32 bits once;
+    every signature position then re-hashes those values and takes the
+    minimum per text with one reduceat. Texts shorter than `shingle`
+    characters have no n-grams and keep an all-max signature.
+    """
+    rng = np.random.default_rng(SEED)
+    salts = rng.integers(0, 2**32, NUM_HASHES, dtype=np.uint32)
+    mults = rng.integers(0, 2**32, NUM_HASHES, dtype=np.uint32) | np.uint32(1)
+    signatures = np.full((len(texts), NUM_HASHES), np.iinfo(np.uint32).max, dtype=np.uint32)
+    if not len(texts):
+        return signatures
+
+    chars = np.array(texts, dtype=f"U{MAX_CHARS}").view(np.uint32).reshape(len(texts), MAX_CHARS)
+    width = MAX_CHARS - shingle + 1
+    present = chars[:, shingle - 1:] != 0
+    counts = present.sum(axis=1)
+    rows = np.flatnonzero(counts)
+    if not len(rows):
+        return signatures
+    starts = (np.cumsum(counts) - counts)[rows]
+
+    # Code points fit in 21 bits, so up to three pack losslessly into one uint64
+    wide = chars.astype(np.uint64)
+    grams = np.zeros((len(texts), width), dtype=np.uint64)
+    for i in range(shingle):
+        grams = (grams << np.uint64(21)) | wide[:, i:i + width]
+    grams = grams[present]
+    with np.errstate(over="ignore"):
+        base = ((grams * np.uint64(0x9E3779B97F4A7C15)) >> np.uint64(32)).astype(np.uint32)
+        for k in range(NUM_HASHES):
+            hashed = (base ^ salts[k]) * mults[k]
+            hashed ^= hashed >> np.uint32(16)
+            signatures[rows, k] = np.minimum.reduceat(hashed, starts)
+    return signatures
+
+
+def _column(df, name):
+    """A column of the frame, or blanks when the sheet lacks it"""
+    if name in df.columns:
+        return df[name]
+    return pd.Series([""] * len(df), index=df.index, dtype=object)
+
+
+def _components(size, left, right):
+    """Connected-component label (smallest member) per node, for edges left[i] - right[i]"""
+    labels = np.arange(size)
+    while len(left):
+        low = np.minimum(labels[left], labels[right])
+        high = np.maximum(labels[left], labels[right])
+        linked = low != high
+        if not linked.any():
+            break
+        np.minimum.at(labels, high[linked], low[linked])
+        while True:
+            jumped = labels[labels]
+            if (jumped == labels).all():
+                break
+            labels = jumped
+    return labels
+
+
+def _bucket_pairs(keys, eligible, window=BUCKET_WINDOW):
+    """Pairs of eligible rows with equal keys, each row paired with up to `window` followers.
+
+    Rows are sorted by key; every row is paired with the next rows while
+    they share its key, so buckets of up to window + 1 rows yield all their
+    pairs and oversized buckets (a very common value) stay linear.
+    """
+    rows = np.flatnonzero(eligible)
+    order = rows[np.argsort(keys[rows], kind="stable")]
+    sorted_keys = keys[order]
+    left, right = [], []
+    for step in range(1, window + 1):
+        same = np.flatnonzero(sorted_keys[step:] == sorted_keys[:-step])
+        if not len(same):
+            break
+        left.append(order[same])
+        right.append(order[same + step])
+    if not left:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(left), np.concatenate(right)
+
+
+class LeadDuplicates:
+    """Duplicate contact groups and email validity over a leads frame.
+
+    Leads are the same contact when their normalised emails are equal, or
+    when their name + organization texts are near-duplicates. Boilerplate
+    organization words are dropped, MinHash signatures of each distinct
+    text's character trigrams are bucketed per LSH band, and candidate
+    pairs from shared buckets are kept when their estimated similarity
+    reaches SIMILARITY. Linked leads form groups (connected components),
+    labelled by their first row. Everything is array work, so building
+    stays close to linear in the number of leads. Build once per data
+    version.
+    """
+
+    def __init__(self, df, id_column="Lead ID", email_column="Email", name_column="Name", org_column="Organization"):
+        self.size = len(df)
+        self.frame = df
+        self.lead_ids = _column(df, id_column).astype(str).str.strip().to_numpy(dtype=object)
+        emails = _column(df, email_column)
+        self.valid_email = valid_emails(emails)
+
+        # Exact duplicates: equal normalised address
+        email_keys, _ = pd.factorize(normalize_emails(emails))
+        left, right = _bucket_pairs(email_keys, self.valid_email)
+        self.same_email = np.zeros(self.size, dtype=bool)
+        self.same_email[left] = self.same_email[right] = True
+
+        # Near duplicates: name plus the distinctive organization words.
+        # Equal texts are linked directly; MinHash LSH then only has to pair
+        # up the distinct texts
+        orgs = without_common_words(normalize_texts(_column(df, org_column)))
+        texts = (normalize_texts(_column(df, name_column)) + " " + orgs).str.strip()
+        codes, uniques = pd.factorize(texts)
+        has_text = np.fromiter((len(t) >= 3 for t in uniques), dtype=bool, count=len(uniques))
+        # factorize numbers texts in order of appearance, so this is each text's first row
+        first = np.flatnonzero(~pd.Index(codes).duplicated())
+        repeat = has_text[codes] & (first[codes] != np.arange(self.size))
+        left = np.concatenate([left, np.flatnonzero(repeat)])
+        right = np.concatenate([right, first[codes[repeat]]])
+
+        signatures = minhash(list(uniques))
+        count = len(uniques)
+        candidates = []
+        for band in range(NUM_HASHES // BAND_ROWS):
+            cols = signatures[:, band * BAND_ROWS:(band + 1) * BAND_ROWS].astype(np.uint64)
+            keys = np.zeros(count, dtype=np.uint64)
+            with np.errstate(over="ignore"):
+                for i in range(BAND_ROWS):
+                    keys = keys * np.uint64(0x9E3779B97F4A7C15) + cols[:, i]
+            a, b = _bucket_pairs(keys, has_text)
+            candidates.append(np.minimum(a, b) * count + np.maximum(a, b))
+        # Similar pairs usually share several bands; verify each pair once
+        candidates = np.sort(np.concatenate(candidates))
+        first_seen = np.ones(len(candidates), dtype=bool)
+        first_seen[1:] = candidates[1:] != candidates[:-1]
+        candidates = candidates[first_seen]
+        a, b = candidates // count, candidates % count
+        close = (signatures[a] == signatures[b]).mean(axis=1) >= SIMILARITY
+        left = np.concatenate([left, first[a[close]]])
+        right = np.concatenate([right, first[b[close]]])
+
+        self.group = _components(self.size, left, right)
+        sizes = np.bincount(self.group, minlength=self.size)
+        self.duplicate = sizes[self.group] > 1
+        self.group_count = int((sizes > 1).sum())
+        self.duplicate_count = int(self.duplicate.sum()) - self.group_count
+        self.invalid_count = int((~self.valid_email).sum())
+
+        # Lead ID -> first row holding it
+        first = ~pd.Index(self.lead_ids).duplicated()
+        self.index = pd.Index(self.lead_ids[first])
+        self.positions = np.flatnonzero(first)
+
+    def groups(self, columns=("Lead ID", "Name", "Organization", "Email")):
+        """Rows of every duplicate group, grouped and in sheet order, with why they matched"""
+        rows = np.flatnonzero(self.duplicate)
+        rows = rows[np.lexsort((rows, self.group[rows]))]
+        table = self.frame.iloc[rows][[c for c in columns if c in self.frame.columns]].copy()
+        table.insert(0, "Group", pd.factorize(self.group[rows])[0] + 1)
+        table["Match"] = np.where(self.same_email[rows], "same email", "similar name + organization")
+        return table
+
+    def invalid(self, columns=("Lead ID", "Name", "Organization", "Email")):
+        """Rows whose email is missing or malformed"""
+        return self.frame.iloc[np.flatnonzero(~self.valid_email)][[c for c in columns if c in self.frame.columns]]
+
+    def collapse(self, lead_ids):
+        """Split selected Lead IDs into those to send and those to skip.
+
+        Leads with an invalid email are skipped, and of each duplicate group
+        only the first selected lead (in sheet order) is kept. Unknown IDs
+        are passed through. Returns (keep, skipped) where `skipped` maps each
+        dropped Lead ID to the reason.
+        """
+        ids = [str(i) for i in lead_ids]
+        found = self.index.get_indexer(ids)
+        picked = np.flatnonzero(found >= 0)
+        rows = self.positions[found[picked]]
+        skipped = {}
+
+        invalid = ~self.valid_email[rows]
+        for i in picked[invalid]:
+            skipped[ids[i]] = "invalid email"
+        picked, rows = picked[~invalid], rows[~invalid]
+        if not len(rows):
+            return [i for i in ids if i not in skipped], skipped
+
+        # Sort the rest by group, then sheet order; every row after a group's first is a repeat
+        order = np.lexsort((rows, self.group[rows]))
+        groups = self.group[rows][order]
+        starts = np.concatenate([[True], groups[1:] != groups[:-1]])
+        kept = rows[order][np.flatnonzero(starts)[np.cumsum(starts) - 1]]
+        for i, row in zip(picked[order][~starts], kept[~starts]):
+            skipped[ids[i]] = f"duplicate of {self.lead_ids[row]}"
+
+        return [i for i in ids if i not in skipped], skipped
@@ -0,0 +1,106 @@
+import io
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import streamlit as st
+
+# ========================================
+# LAZY EXPORTS
+# ========================================
+
+CHUNK_ROWS = 10_000         # Rows converted and written per step
+
+try:
+    import xlsxwriter
+except ImportError:  # Required, but keep CSV/Parquet export working without it
+    xlsxwriter = None
+
+
+def _chunks(df):
+    """Consecutive row slices of at most CHUNK_ROWS rows"""
+    for start in range(0, len(df), CHUNK_ROWS):
+        yield df.iloc[start:start + CHUNK_ROWS]
+
+
+def write_csv(df, out):
+    """Write a frame as UTF-8 CSV, one chunk at a time"""
+    if df.empty:
+        df.to_csv(out, mode="wb", index=False, encoding="utf-8")
+    for i, chunk in enumerate(_chunks(df)):
+        chunk.to_csv(out, mode="wb", header=i == 0, index=False, encoding="utf-8")
+
+
+def write_parquet(df, out):
+    """Write a frame as Parquet, one row group per chunk"""
+    schema = pa.Schema.from_pandas(df.iloc[:0], preserve_index=False)
+    with pq.ParquetWriter(out, schema) as writer:
+        for chunk in _chunks(df):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+def write_xlsx(df, out):
+    """Write a frame as a single-sheet workbook, streaming rows (needs xlsxwriter)"""
+    workbook = xlsxwriter.Workbook(out, {
+        "constant_memory": True,
+        "default_date_format": "yyyy-mm-dd hh:mm",
+        "remove_timezone": True,
+    })
+    sheet = workbook.add_worksheet()
+    sheet.write_row(0, 0, [str(c) for c in df.columns])
+    row = 1
+    for chunk in _chunks(df):
+        cells = chunk.astype(object).where(chunk.notna(), None)
+        for values in cells.itertuples(index=False, name=None):
+            sheet.write_row(row, 0, [v.to_pydatetime() if isinstance(v, pd.Timestamp) else v for v in values])
+            row += 1
+    workbook.close()
+
+
+# Format -> (file extension, MIME type, writer)
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv", write_csv),
+    "Parquet": ("parquet", "application/vnd.apache.parquet", write_parquet),
+    "XLSX": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", write_xlsx),
+}
+
+
+def available_formats():
+    """Export formats usable in this environment"""
+    return [f for f in EXPORT_FORMATS if f != "XLSX" or xlsxwriter is not None]
+
+
+def export_file(df, fmt, columns=None):
+    """Bytes of `df` (optionally projected to `columns`) in `fmt`.
+
+    Returned as bytes because Streamlit's deferred download only accepts
+    str, bytes or plain binary streams, and keeps the result in memory anyway.
+    """
+    if columns:
+        df = df[list(columns)]
+    out = io.BytesIO()
+    EXPORT_FORMATS[fmt][2](df, out)
+    return out.getvalue()
+
+
+def export_controls(df, prefix, key):
+    """Format and column pickers plus a download button that builds the file only when clicked"""
+    formats = available_formats()
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        fmt = st.selectbox("Format", formats, key=f"{key}_format")
+    with col2:
+        columns = st.multiselect("Columns", list(df.columns), placeholder="All columns", key=f"{key}_columns")
+    if "XLSX" not in formats:
+        st.caption("Install xlsxwriter to enable XLSX export.")
+
+    extension, mime, _ = EXPORT_FORMATS[fmt]
+    st.download_button(
+        f"📥 Export {len(df):,} rows to {fmt}",
+        lambda: export_file(df, fmt, columns),
+        f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}",
+        mime,
+        key=f"{key}_download",
+        use_container_width=False
+    )
@@ -0,0 +1,146 @@
+import random
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+from stats import percentile
+
+# ========================================
+# AGENT HEALTH MONITOR
+# ========================================
+
+PROBE_INTERVAL = 30     # Seconds between probe rounds (jittered)
+PROBE_TIMEOUT = 5       # Seconds per probe request
+HISTORY = 120           # Probe results kept per agent for percentiles
+
+SLOW_MS = 2000          # p95 probe latency above this marks an agent Idle
+DEGRADED_WINDOW = 300   # Seconds a failed probe keeps an agent Idle
+OFFLINE_FAILURES = 3    # Consecutive failed rounds before an agent is Offline
+OFFLINE_AFTER = 600     # Seconds without a healthy round before an agent is Offline
+
+
+def n8n_healthz_probe(url, session):
+    """Probe for the n8n instance serving a webhook URL (its /healthz endpoint)"""
+    parts = urlsplit(url)
+    healthz = f"{parts.scheme}://{parts.netloc}/healthz"
+
+    def probe():
+        response = session.get(healthz, timeout=PROBE_TIMEOUT)
+        if response.status_code != 200:
+            raise RuntimeError(f"n8n healthz returned {response.status_code}")
+
+    return probe
+
+
+def n8n_webhook_probe(url, session):
+    """Probe that a webhook's workflow is active, without triggering it.
+
+    A GET against a POST-only production webhook answers 404 "not registered
+    for GET requests" while the workflow is active, and a plain "not
+    registered" 404 once it has been deactivated.
+    """
+    def probe():
+        response = session.get(url, timeout=PROBE_TIMEOUT)
+        if response.status_code >= 500:
+            raise RuntimeError(f"webhook returned {response.status_code}")
+        if response.status_code == 404 and "not registered for" not in response.text:
+            raise RuntimeError("webhook workflow is not active")
+
+    return probe
+
+
+class HealthMonitor:
+    """Background prober keeping recent health results per agent.
+
+    `checks` maps an agent name to a list of (label, probe) pairs, where a
+    probe is a callable that raises on failure. One daemon thread runs every
+    agent's probes each round; `status` and `details` only read the stored
+    results, so callers never wait on the network.
+    """
+
+    def __init__(self, checks, interval=PROBE_INTERVAL):
+        self.checks = checks
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.results = {agent: deque(maxlen=HISTORY) for agent in checks}
+        self.failures = {agent: 0 for agent in checks}
+        self.last_ok = {agent: None for agent in checks}
+        self.last_error = {agent: None for agent in checks}
+        self.started_at = time.time()
+        self.thread = None
+
+    def start(self):
+        """Start the background probe thread (idempotent)"""
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._run, name="health-monitor", daemon=True)
+            self.thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            self.probe_all()
+            self.wakeup.wait(self.interval * random.uniform(0.8, 1.2))
+            self.wakeup.clear()
+
+    def probe_all(self):
+        """Run one round of probes for every agent"""
+        for agent in self.checks:
+            self.probe_agent(agent)
+
+    def probe_agent(self, agent):
+        """Run an agent's probes once and record the round"""
+        errors = []
+        start = time.perf_counter()
+        for label, probe in self.checks[agent]:
+            try:
+                probe()
+            except Exception as e:
+                errors.append(f"{label}: {e}")
+        latency_ms = (time.perf_counter() - start) * 1000
+        now = time.time()
+
+        with self.lock:
+            self.results[agent].append((now, not errors, latency_ms))
+            if errors:
+                self.failures[agent] += 1
+                self.last_error[agent] = "; ".join(errors)
+            else:
+                self.failures[agent] = 0
+                self.last_ok[agent] = now
+
+    def status(self, agent):
+        """Active, Idle or Offline from the stored probe results"""
+        with self.lock:
+            results = list(self.results.get(agent, ()))
+            failures = self.failures.get(agent, 0)
+            last_ok = self.last_ok.get(agent)
+        now = time.time()
+
+        if not results:
+            return "Idle"  # Not probed yet
+        if failures >= OFFLINE_FAILURES or now - (last_ok or self.started_at) > OFFLINE_AFTER:
+            return "Offline"
+        recent_failure = any(not ok and now - at <= DEGRADED_WINDOW for at, ok, _ in results)
+        p95 = percentile([ms for _, ok, ms in results if ok], 95)
+        if recent_failure or (p95 is not None and p95 > SLOW_MS):
+            return "Idle"
+        return "Active"
+
+    def details(self, agent):
+        """Status, timestamps, latency percentiles and last error for one agent"""
+        with self.lock:
+            results = list(self.results.get(agent, ()))
+            latencies = [ms for _, ok, ms in results if ok]
+            info = {
+                "checked_at": results[-1][0] if results else None,
+                "last_ok_at": self.last_ok.get(agent),
+                "consecutive_failures": self.failures.get(agent, 0),
+                "last_error": self.last_error.get(agent),
+                "probes": len(results),
+                "p50_ms": percentile(latencies, 50),
+                "p95_ms": percentile(latencies, 95),
+            }
+        info["status"] = self.status(agent)
+        return info
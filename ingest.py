@@ -0,0 +1,210 @@
+import argparse
+import hmac
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# ========================================
+# CHANGE INGESTION RECEIVER
+# ========================================
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_BODY = 5 * 2**20    # Largest accepted request body, in bytes
+TOKEN_HEADER = "X-Ingest-Token"
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+OPERATIONS = ("upsert", "delete")
+
+
+def parse_events(body):
+    """Validate a request body into a list of change events.
+
+    Accepts one event, a list of events, or {"events": [...]}. Each event is
+    {"sheet": "CORA"|"OPSI", "op": "upsert"|"delete", "key": row key,
+    "values": {column: cell}}; `key` may be omitted on upserts that carry
+    the sheet's key column in `values`.
+    """
+    payload = json.loads(body)
+    if isinstance(payload, dict):
+        payload = payload.get("events", [payload])
+    if not isinstance(payload, list):
+        raise ValueError("expected an event object or a list of events")
+
+    events = []
+    for i, event in enumerate(payload):
+        if not isinstance(event, dict):
+            raise ValueError(f"event {i} is not an object")
+        op = event.get("op", "upsert")
+        if op not in OPERATIONS:
+            raise ValueError(f"event {i} has unknown op {op!r}")
+        values = event.get("values") or {}
+        if not isinstance(values, dict):
+            raise ValueError(f"event {i} values must be an object")
+        if not event.get("sheet"):
+            raise ValueError(f"event {i} has no sheet")
+        if op == "delete" and not event.get("key"):
+            raise ValueError(f"event {i} deletes without a key")
+        events.append({
+            "sheet": str(event["sheet"]).upper(),
+            "op": op,
+            "key": str(event.get("key") or "").strip(),
+            "values": values,
+        })
+    return events
+
+
+class ChangeReceiver:
+    """Small HTTP server accepting row-level change events next to the app.
+
+    POST /events hands the parsed events to `apply(events)`, which returns a
+    JSON-serialisable summary. GET /healthz answers 200, and GET /metrics
+    serves the text returned by `metrics()` for Prometheus when given. When
+    `token` is set, events and metrics requests must carry it in the
+    X-Ingest-Token header (or as a bearer token, which is what scrapers send).
+    """
+
+    def __init__(self, apply, host=DEFAULT_HOST, port=DEFAULT_PORT, token=None, metrics=None):
+        self.apply = apply
+        self.token = token
+        self.metrics = metrics
+        self.received = 0
+        self.last_event_at = {}    # Sheet name -> time its last pushed event was applied
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def address(self):
+        """Base URL the receiver listens on"""
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve on a daemon thread (idempotent)"""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.server.serve_forever, name="change-receiver", daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and release the port"""
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _handler(self):
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass  # Keep the Streamlit console quiet
+
+            def _reply(self, status, body):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _authorized(self):
+                if not receiver.token:
+                    return True
+                bearer = self.headers.get("Authorization", "").removeprefix("Bearer ")
+                supplied = self.headers.get(TOKEN_HEADER) or bearer
+                # Compare bytes: str operands must be ASCII, and a header may not be
+                return hmac.compare_digest(supplied.encode(), receiver.token.encode())
+
+            def do_GET(self):
+                if self.path == "/healthz":
+                    self._reply(200, {"status": "ok", "received": receiver.received})
+                elif self.path == "/metrics" and receiver.metrics:
+                    if not self._authorized():
+                        self._reply(401, {"error": "unauthorized"})
+                        return
+                    data = receiver.metrics().encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", METRICS_CONTENT_TYPE)
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                else:
+                    self._reply(404, {"error": "not found"})
+
+            def do_POST(self):
+                if self.path != "/events":
+                    self._reply(404, {"error": "not found"})
+                    return
+                if not self._authorized():
+                    self._reply(401, {"error": "unauthorized"})
+                    return
+                if self.headers.get("Content-Length") is None:
+                    self._reply(411, {"error": "Content-Length required"})
+                    return
+                try:
+                    length = int(self.headers["Content-Length"])
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    self._reply(400, {"error": "invalid Content-Length"})
+                    return
+                if length > MAX_BODY:
+                    self._reply(413, {"error": "body too large"})
+                    return
+                try:
+                    events = parse_events(self.rfile.read(length) or b"[]")
+                except ValueError as e:
+                    self._reply(400, {"error": str(e)})
+                    return
+                try:
+                    summary = receiver.apply(events)
+                except Exception as e:
+                    self._reply(500, {"error": str(e)})
+                    return
+                receiver.received += len(events)
+                now = time.time()
+                for event in events:
+                    receiver.last_event_at[event["sheet"]] = now
+                self._reply(200, summary)
+
+        return Handler
+
+
+# ========================================
+# STAND-IN SENDER
+# ========================================
+
+def send_events(url, events, token=None, timeout=10):
+    """POST change events to a receiver, returning its JSON reply"""
+    import requests  # Only the command-line sender needs it
+    headers = {TOKEN_HEADER: token} if token else {}
+    response = requests.post(f"{url.rstrip('/')}/events", json={"events": events}, headers=headers, timeout=timeout)
+    response.raise_for_status()
+    return response.json()
+
+
+def main(argv=None):
+    """Send one change event the way an n8n workflow would, for local testing.
+
+    python ingest.py OPSI T00012 "Status=In Progress" "Priority=High"
+    python ingest.py CORA L000042 --delete
+    """
+    parser = argparse.ArgumentParser(description="Send a row change event to the dashboard's change receiver")
+    parser.add_argument("sheet", help="CORA or OPSI")
+    parser.add_argument("key", help="Lead ID or Task ID of the row")
+    parser.add_argument("values", nargs="*", help="Column=value pairs to set")
+    parser.add_argument("--delete", action="store_true", help="Remove the row instead of upserting it")
+    parser.add_argument("--url", default=f"http://{DEFAULT_HOST}:{DEFAULT_PORT}")
+    parser.add_argument("--token", default=None)
+    args = parser.parse_args(argv)
+
+    values = dict(pair.split("=", 1) for pair in args.values)
+    event = {"sheet": args.sheet, "op": "delete" if args.delete else "upsert", "key": args.key, "values": values}
+    print(json.dumps(send_events(args.url, [event], token=args.token), indent=2))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,6 @@
 import streamlit as st
+from utils import get_agent_status
 
 def get_mark_status():
-    """Return MARK agent status"""
-    return "Active"
+    """Return MARK agent status from the background health probes"""
+    return get_agent_status("MARK")
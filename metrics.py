@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+
+# ========================================
+# METRICS ENGINE
+# ========================================
+
+def find_column(df, *names):
+    """First column matching any of the names, ignoring case and stray spaces"""
+    wanted = {n.strip().lower() for n in names}
+    return next((c for c in df.columns if str(c).strip().lower() in wanted), None)
+
+def _counts(df, column):
+    """Value counts of a column as a plain dict (empty if the column is missing)"""
+    if column is None:
+        return {}
+    # Count raw values first so categorical columns never expand to one string per row
+    counts = {}
+    for value, n in df[column].value_counts(dropna=False).items():
+        if n:
+            key = str(value).strip()
+            counts[key] = counts.get(key, 0) + int(n)
+    return counts
+
+def _stripped(series):
+    """Column values as stripped strings, converted once per category for categorical columns"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        labels = np.append(series.cat.categories.astype(str).str.strip().to_numpy(dtype=object), "nan")
+        return pd.Series(labels[series.cat.codes.to_numpy()], index=series.index, dtype=object)
+    return series.astype(str).str.strip()
+
+def compute_cora_metrics(df, today):
+    """All CORA KPIs in one vectorised pass over the leads frame"""
+    status = _counts(df, find_column(df, "Status"))
+
+    org_col = find_column(df, "Organization")
+    org_kind = {}
+    if org_col is not None:
+        org = _stripped(df[org_col])
+        org_kind = {
+            "City": int(org.str.contains("City", case=False, regex=False).sum()),
+            "Church": int(org.str.contains("Church", case=False, regex=False).sum()),
+        }
+
+    today_count = 0
+    ts_col = find_column(df, "Timestamp")
+    if ts_col is not None:
+        stamps = df[ts_col]
+        if not pd.api.types.is_datetime64_any_dtype(stamps):
+            stamps = pd.to_datetime(stamps.astype(str), errors="coerce")
+        # Compare on the datetime64 values; no per-row dates are built
+        today_count = int((stamps.dt.normalize() == pd.Timestamp(today, tz=stamps.dt.tz)).sum())
+
+    return {
+        "total": len(df),
+        "status": status,
+        "org_kind": org_kind,
+        "today": today_count,
+    }
+
+def compute_opsi_metrics(df):
+    """All OPSI KPIs in one vectorised pass over the tasks frame"""
+    return {
+        "total": len(df),
+        "status": _counts(df, find_column(df, "Status")),
+        "priority": _counts(df, find_column(df, "Priority")),
+    }
@@ -1,14 +1,80 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
-from utils import load_opsi_data
+from utils import load_opsi_data, get_agent_status, get_sheet_store, resolve_columns, sheet_text, OPSI_FIELD_COLUMNS
 
 def get_opsi_status():
-    """Return OPSI agent status"""
-    return "Active"
-
-def load_opsi_tasks():
-    """Load OPSI tasks from Google Sheets"""
-    try:
-        return load_opsi_data()
-    except:
-        return pd.DataFrame()
+    """Return OPSI agent status from the background health probes"""
+    return get_agent_status("OPSI")
+
+def get_opsi_store():
+    """Get OPSI tasks as a typed columnar store (shared, read-only)"""
+    return get_sheet_store("OPSI", load_opsi_data())
+
+# ========================================
+# BULK CHANGES
+# ========================================
+
+# Webhook field -> column names accepted for it (sheet column first, then the payload name)
+BULK_FIELDS = {field: [column, field] for field, column in OPSI_FIELD_COLUMNS.items()}
+
+CREATE_REQUIRED = ["title", "taskType", "assignedTo", "priority"]
+
+def _field_frame(df, fields=BULK_FIELDS):
+    """Webhook field values (stripped strings) as a frame with `df`'s index, read column by column.
+
+    Headers are normalised like the sheet's, and for each field the first
+    non-blank value among its accepted columns wins.
+    """
+    df = df.set_axis(resolve_columns("OPSI", df.columns), axis=1)
+    frame = pd.DataFrame(index=df.index)
+    for field in fields:
+        values = pd.Series("", index=df.index, dtype=object)
+        for col in BULK_FIELDS[field]:
+            if col in df.columns:
+                values = values.where(values != "", sheet_text(df[col]))
+        frame[field] = values.astype(object)
+    return frame
+
+def plan_bulk_changes(current_df, changes_df):
+    """Turn edited or uploaded task rows into create and update payloads.
+
+    Rows whose Task ID exists become updates, with blank cells keeping the
+    current value; rows without a Task ID become creates. Rows that would
+    not change anything are skipped. Only the current rows named by a
+    change are read in full. Error rows are numbered by `changes_df`'s
+    index plus one (the line of an uploaded CSV). Returns (creates, updates, errors).
+    """
+    changes = _field_frame(changes_df)
+    index = changes.index
+    lines = pd.Series(index + 1 if pd.api.types.is_integer_dtype(index) else np.arange(len(index)) + 1, index=index)
+    task_ids = changes["taskId"]
+    has_id = task_ids != ""
+
+    # Current values of the named tasks only, the last row winning for repeated IDs
+    current_ids = _field_frame(current_df, ["taskId"])["taskId"]
+    named = current_ids.isin(set(task_ids[has_id])).to_numpy()
+    current = _field_frame(current_df[named])
+    current = current.set_index("taskId", drop=False)
+    current = current[~current.index.duplicated(keep="last")]
+
+    errors = []
+    known = has_id & task_ids.isin(current.index)
+    for line, task_id in zip(lines[has_id & ~known], task_ids[has_id & ~known]):
+        errors.append({"Row": int(line), "Task": task_id, "Error": "Unknown Task ID"})
+
+    edited = changes[known]
+    before = current.loc[edited["taskId"]].set_axis(edited.index)
+    merged = edited.where(edited != "", before)
+    updates = merged[(merged != before).any(axis=1)].to_dict("records")
+
+    new = changes[~has_id]
+    missing = new[CREATE_REQUIRED] == ""
+    incomplete = missing.any(axis=1)
+    for line, title, flags in zip(lines[~has_id][incomplete], new["title"][incomplete], missing[incomplete].to_numpy()):
+        fields = [f for f, flag in zip(CREATE_REQUIRED, flags) if flag]
+        errors.append({"Row": int(line), "Task": title, "Error": f"Missing {', '.join(fields)}"})
+    creates = new[~incomplete][["title", "taskType", "assignedTo", "deadline", "priority", "notes"]].to_dict("records")
+
+    errors.sort(key=lambda error: error["Row"])
+    return creates, updates, errors
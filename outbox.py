@@ -0,0 +1,244 @@
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from stats import percentile
+
+log = logging.getLogger(__name__)
+
+# ========================================
+# MARK APPROVAL OUTBOX
+# ========================================
+
+MARK_WEBHOOK_URL = "https://hackett2k.app.n8n.cloud/webhook/mark-approve-leads"
+
+BATCH_SIZE = 100        # Lead IDs per webhook call
+MAX_ATTEMPTS = 8        # Attempts before a batch is parked as failed
+BACKOFF_BASE = 2        # Seconds, doubled per attempt
+BACKOFF_MAX = 300       # Upper bound on the retry delay
+REQUEST_TIMEOUT = 10
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    payload TEXT NOT NULL,
+    lead_count INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    next_attempt_at REAL NOT NULL,
+    sent_at REAL,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at);
+"""
+
+
+def chunk(items, size):
+    """Split a list into consecutive batches of at most `size` items"""
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def backoff_delay(attempts):
+    """Exponential backoff with full jitter for the given attempt count"""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempts))
+
+
+class Outbox:
+    """SQLite-backed queue of MARK approval batches with a background sender.
+
+    `enqueue` only writes to the local database and returns; a single worker
+    thread delivers due batches over a pooled keep-alive session, retrying
+    transient failures with backoff. Every batch carries a stable
+    idempotency key so a retried delivery can be de-duplicated downstream.
+    """
+
+    def __init__(self, path, webhook_url=MARK_WEBHOOK_URL, batch_size=BATCH_SIZE):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.webhook_url = webhook_url
+        self.batch_size = batch_size
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+
+        # Imported here so that importing this module (for its helpers) stays cheap
+        import requests
+        from requests.adapters import HTTPAdapter
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        self.worker = None
+
+    def enqueue(self, lead_ids, approved_by="Dashboard User"):
+        """Queue approved Lead IDs in bounded batches, returning their idempotency keys"""
+        batches = chunk(list(lead_ids), self.batch_size)
+        group = uuid.uuid4().hex
+        now = time.time()
+        keys = []
+        with self.lock:
+            self.db.execute("BEGIN")
+            try:
+                for index, batch in enumerate(batches):
+                    key = f"{group}-{index + 1}"
+                    payload = {
+                        "approved_leads": batch,
+                        "approved_by": approved_by,
+                        "timestamp": datetime.now().isoformat(),
+                        "batch_id": key,
+                        "batch_index": index + 1,
+                        "batch_count": len(batches),
+                    }
+                    self.db.execute(
+                        "INSERT INTO outbox (idempotency_key, payload, lead_count, created_at, next_attempt_at) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (key, json.dumps(payload), len(batch), now, now),
+                    )
+                    keys.append(key)
+                self.db.execute("COMMIT")
+            except BaseException:
+                # Leave no half-queued approval and no open transaction behind
+                self.db.execute("ROLLBACK")
+                raise
+        # The outbox outlives any one worker thread; bring it back if it died
+        self.start()
+        self.wakeup.set()
+        return keys
+
+    def start(self):
+        """Start the background sender thread if it is not running (idempotent)"""
+        with self.lock:
+            if self.worker is not None and self.worker.is_alive():
+                return self
+            # Batches caught mid-send by a restart or a dead worker go back in the queue
+            self.db.execute("UPDATE outbox SET status = 'pending' WHERE status = 'sending'")
+            self.worker = threading.Thread(target=self._run, name="mark-outbox", daemon=True)
+            self.worker.start()
+        return self
+
+    def _run(self):
+        while True:
+            try:
+                delay = self.deliver_due()
+            except Exception:
+                log.exception("MARK outbox: delivery loop failed, retrying")
+                delay = BACKOFF_BASE
+            self.wakeup.wait(timeout=delay)
+            self.wakeup.clear()
+
+    def deliver_due(self):
+        """Send every batch that is due, returning seconds until the next one is"""
+        while True:
+            with self.lock:
+                row = self.db.execute(
+                    "SELECT id, idempotency_key, payload, attempts FROM outbox "
+                    "WHERE status = 'pending' AND next_attempt_at <= ? ORDER BY id LIMIT 1",
+                    (time.time(),),
+                ).fetchone()
+                if row is None:
+                    upcoming = self.db.execute(
+                        "SELECT MIN(next_attempt_at) FROM outbox WHERE status = 'pending'"
+                    ).fetchone()[0]
+                    return max(0.5, upcoming - time.time()) if upcoming else 30
+                self.db.execute("UPDATE outbox SET status = 'sending' WHERE id = ?", (row[0],))
+            try:
+                self._deliver(*row)
+            except Exception as e:
+                # Never leave a batch in 'sending': count the attempt and requeue it
+                log.exception("MARK outbox: delivering batch %s failed", row[1])
+                self._failed(row[0], row[3] + 1, f"{type(e).__name__}: {e}", retryable=True)
+
+    def _deliver(self, row_id, key, payload, attempts):
+        import requests  # Already loaded by __init__
+        error = None
+        retryable = True
+        try:
+            response = self.session.post(
+                self.webhook_url,
+                data=payload,
+                headers={"Content-Type": "application/json", "Idempotency-Key": key},
+                timeout=REQUEST_TIMEOUT,
+            )
+            if response.status_code < 300:
+                with self.lock:
+                    self.db.execute(
+                        "UPDATE outbox SET status = 'sent', sent_at = ?, attempts = ?, last_error = NULL WHERE id = ?",
+                        (time.time(), attempts + 1, row_id),
+                    )
+                return
+            error = f"HTTP {response.status_code}"
+            # Client errors other than throttling will not succeed on retry
+            retryable = response.status_code == 429 or response.status_code >= 500
+        except requests.RequestException as e:
+            error = str(e)
+        self._failed(row_id, attempts + 1, error, retryable)
+
+    def _failed(self, row_id, attempts, error, retryable):
+        """Schedule a retry after backoff, or park the batch as failed"""
+        status = "pending" if retryable and attempts < MAX_ATTEMPTS else "failed"
+        with self.lock:
+            self.db.execute(
+                "UPDATE outbox SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                (status, attempts, time.time() + backoff_delay(attempts), error, row_id),
+            )
+
+    def retry_failed(self):
+        """Put parked batches back in the queue, returning how many were requeued"""
+        with self.lock:
+            count = self.db.execute(
+                "UPDATE outbox SET status = 'pending', attempts = 0, next_attempt_at = ? WHERE status = 'failed'",
+                (time.time(),),
+            ).rowcount
+        self.wakeup.set()
+        return count
+
+    def stats(self, window=500):
+        """Queue depth per status plus delivery latency over the last `window` sent batches"""
+        with self.lock:
+            counts = dict(self.db.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+            queued_leads = self.db.execute(
+                "SELECT COALESCE(SUM(lead_count), 0), MIN(created_at) FROM outbox WHERE status IN ('pending', 'sending')"
+            ).fetchone()
+            latencies = [
+                r[0] for r in self.db.execute(
+                    "SELECT sent_at - created_at FROM outbox WHERE status = 'sent' ORDER BY sent_at DESC LIMIT ?",
+                    (window,),
+                )
+            ]
+        return {
+            "pending": counts.get("pending", 0) + counts.get("sending", 0),
+            "sent": counts.get("sent", 0),
+            "failed": counts.get("failed", 0),
+            "queued_leads": queued_leads[0],
+            "oldest_pending_age": time.time() - queued_leads[1] if queued_leads[1] else None,
+            "latency_p50": percentile(latencies, 50),
+            "latency_p95": percentile(latencies, 95),
+        }
+
+    def recent(self, limit=20):
+        """Most recent batches, newest first, for display"""
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT idempotency_key, lead_count, status, attempts, created_at, sent_at, last_error "
+                "FROM outbox ORDER BY id DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [
+            {
+                "Batch": key,
+                "Leads": count,
+                "Status": status,
+                "Attempts": attempts,
+                "Queued": datetime.fromtimestamp(created).strftime("%Y-%m-%d %H:%M:%S"),
+                "Latency (s)": round(sent - created, 2) if sent else None,
+                "Last Error": error or "",
+            }
+            for key, count, status, attempts, created, sent, error in rows
+        ]
@@ -0,0 +1,211 @@
+import functools
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+from stats import percentile
+
+# ========================================
+# PERFORMANCE INSTRUMENTATION
+# ========================================
+
+SAMPLES = 2048      # Recent durations kept per span for percentiles
+SESSIONS = 200      # Most recently active sessions whose rerun counts are kept
+PREFIX = "apexx"    # Metric name prefix in the Prometheus export
+
+
+class Perf:
+    """Process-wide span timings, cache hit/miss counters and per-session rerun counts and state sizes.
+
+    Spans keep lifetime totals plus the last SAMPLES durations for
+    percentiles. Everything is in memory and guarded by one lock, so
+    recording costs a few microseconds and never touches the network.
+    """
+
+    def __init__(self, samples=SAMPLES, sessions=SESSIONS):
+        self.samples = samples
+        self.max_sessions = sessions
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+        self.timings = {}
+        self.cache_stats = {}
+        self.session_reruns = OrderedDict()
+        self.reruns = 0
+
+    def observe(self, name, seconds, ok=True):
+        """Record one duration for a span"""
+        with self.lock:
+            span = self.timings.get(name)
+            if span is None:
+                span = self.timings[name] = {"count": 0, "errors": 0, "total": 0.0, "recent": deque(maxlen=self.samples)}
+            span["count"] += 1
+            span["errors"] += not ok
+            span["total"] += seconds
+            span["recent"].append(seconds)
+
+    @contextmanager
+    def span(self, name):
+        """Time the enclosed block; an exception marks the sample as an error.
+
+        Streamlit's rerun/stop signals are BaseExceptions, so a block cut
+        short by st.rerun() still counts as a successful sample.
+        """
+        start = time.perf_counter()
+        ok = True
+        try:
+            yield
+        except Exception:
+            ok = False
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start, ok)
+
+    def timed(self, name=None, ok=None):
+        """Decorator timing every call of a function as the span `name` (default: its name).
+
+        `ok(result)` can flag returned values as errors, for functions that
+        report failure by return value instead of raising.
+        """
+        def decorator(fn):
+            span_name = name or fn.__name__
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                succeeded = True
+                try:
+                    result = fn(*args, **kwargs)
+                    if ok is not None:
+                        succeeded = bool(ok(result))
+                    return result
+                except Exception:
+                    succeeded = False
+                    raise
+                finally:
+                    self.observe(span_name, time.perf_counter() - start, succeeded)
+
+            return wrapper
+        return decorator
+
+    def cache_lookup(self, cache):
+        """Count one read of a cache (pair with `cache_miss` where the value is built)"""
+        with self.lock:
+            self.cache_stats.setdefault(cache, {"lookups": 0, "misses": 0})["lookups"] += 1
+
+    def cache_miss(self, cache):
+        """Count one build of a cached value"""
+        with self.lock:
+            self.cache_stats.setdefault(cache, {"lookups": 0, "misses": 0})["misses"] += 1
+
+    def rerun(self, session_id):
+        """Count one full script run for a browser session"""
+        with self.lock:
+            self.reruns += 1
+            count, _, state_bytes = self.session_reruns.pop(session_id, (0, None, None))
+            self.session_reruns[session_id] = (count + 1, time.time(), state_bytes)
+            while len(self.session_reruns) > self.max_sessions:
+                self.session_reruns.popitem(last=False)
+
+    def session_state_size(self, session_id, nbytes):
+        """Record the approximate session_state size of a session seen by `rerun`"""
+        with self.lock:
+            if session_id in self.session_reruns:
+                count, seen, _ = self.session_reruns[session_id]
+                self.session_reruns[session_id] = (count, seen, nbytes)
+
+    def spans(self):
+        """Per-span count, error count, total and recent p50/p95/p99/max, in ms"""
+        with self.lock:
+            snapshot = {name: (s["count"], s["errors"], s["total"], list(s["recent"])) for name, s in self.timings.items()}
+        report = {}
+        for name, (count, errors, total, recent) in sorted(snapshot.items()):
+            report[name] = {
+                "count": count,
+                "errors": errors,
+                "total_ms": total * 1000,
+                "p50_ms": percentile(recent, 50) * 1000,
+                "p95_ms": percentile(recent, 95) * 1000,
+                "p99_ms": percentile(recent, 99) * 1000,
+                "max_ms": max(recent) * 1000,
+            }
+        return report
+
+    def caches(self):
+        """Per-cache lookups, hits, misses and hit rate"""
+        with self.lock:
+            stats = {name: dict(s) for name, s in self.cache_stats.items()}
+        report = {}
+        for name, s in sorted(stats.items()):
+            # A build can happen without a counted lookup (e.g. a warm-up), so clamp at zero
+            hits = max(0, s["lookups"] - s["misses"])
+            report[name] = {
+                "lookups": s["lookups"],
+                "hits": hits,
+                "misses": s["misses"],
+                "hit_rate": hits / s["lookups"] if s["lookups"] else None,
+            }
+        return report
+
+    def sessions(self):
+        """(session id, full reruns, last seen, state bytes) for recently active sessions, newest first"""
+        with self.lock:
+            return [(sid, count, seen, nbytes) for sid, (count, seen, nbytes) in reversed(self.session_reruns.items())]
+
+    def prometheus(self, prefix=PREFIX):
+        """All metrics in the Prometheus text exposition format"""
+        lines = [
+            f"# HELP {prefix}_span_seconds Duration of instrumented operations and renders.",
+            f"# TYPE {prefix}_span_seconds summary",
+        ]
+        spans = self.spans()
+        for name, s in spans.items():
+            label = f'span="{_escape(name)}"'
+            for quantile, key in (("0.5", "p50_ms"), ("0.95", "p95_ms"), ("0.99", "p99_ms")):
+                lines.append(f'{prefix}_span_seconds{{{label},quantile="{quantile}"}} {s[key] / 1000:.6f}')
+            lines.append(f"{prefix}_span_seconds_sum{{{label}}} {s['total_ms'] / 1000:.6f}")
+            lines.append(f"{prefix}_span_seconds_count{{{label}}} {s['count']}")
+
+        lines += [
+            f"# HELP {prefix}_span_errors_total Instrumented operations that failed.",
+            f"# TYPE {prefix}_span_errors_total counter",
+        ]
+        lines += [f'{prefix}_span_errors_total{{span="{_escape(name)}"}} {s["errors"]}' for name, s in spans.items()]
+
+        lines += [
+            f"# HELP {prefix}_cache_requests_total Cache reads by result.",
+            f"# TYPE {prefix}_cache_requests_total counter",
+        ]
+        for name, c in self.caches().items():
+            lines.append(f'{prefix}_cache_requests_total{{cache="{_escape(name)}",result="hit"}} {c["hits"]}')
+            lines.append(f'{prefix}_cache_requests_total{{cache="{_escape(name)}",result="miss"}} {c["misses"]}')
+
+        with self.lock:
+            reruns, sessions = self.reruns, len(self.session_reruns)
+            state_bytes = sum(nbytes or 0 for _, _, nbytes in self.session_reruns.values())
+        lines += [
+            f"# HELP {prefix}_reruns_total Full script runs across all sessions.",
+            f"# TYPE {prefix}_reruns_total counter",
+            f"{prefix}_reruns_total {reruns}",
+            f"# HELP {prefix}_sessions Sessions with tracked rerun counts.",
+            f"# TYPE {prefix}_sessions gauge",
+            f"{prefix}_sessions {sessions}",
+            f"# HELP {prefix}_session_state_bytes Approximate session_state size summed over tracked sessions.",
+            f"# TYPE {prefix}_session_state_bytes gauge",
+            f"{prefix}_session_state_bytes {state_bytes}",
+            f"# HELP {prefix}_start_time_seconds Process start time since the epoch.",
+            f"# TYPE {prefix}_start_time_seconds gauge",
+            f"{prefix}_start_time_seconds {self.started_at:.3f}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    """Escape a Prometheus label value"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# One registry per process; Streamlit imports this module once and shares it across sessions
+PERF = Perf()
+timed = PERF.timed
+span = PERF.span
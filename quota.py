@@ -0,0 +1,180 @@
+import random
+import threading
+import time
+
+# ========================================
+# SHEETS API QUOTA GUARD
+# ========================================
+
+# Google Sheets allows 60 read requests per minute per user (a service account
+# counts as one user); stay a little under it and allow short bursts
+READS_PER_MINUTE = 50
+BURST = 10
+MAX_WAIT = 5.0          # Seconds a call may wait for budget before giving up
+
+RETRY_STATUSES = {429, 500, 503}
+MAX_ATTEMPTS = 4        # Tries per call, including the first
+BACKOFF_BASE = 1.0      # Seconds before the first retry, doubling after each
+BACKOFF_MAX = 4.0       # Longest sleep between retries; pages render while they wait
+COOLDOWN_MAX = 300.0    # Cap on a cool-down taken from Retry-After
+
+
+class QuotaExceeded(Exception):
+    """The Sheets quota is exhausted; callers should keep serving their last good data"""
+
+    def __init__(self, retry_in):
+        super().__init__(f"Google Sheets rate limit reached; retrying in {max(1, round(retry_in))}s")
+        self.retry_in = retry_in
+
+
+class TokenBucket:
+    """Request budget refilled continuously at `rate` per second, holding at most `capacity`"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, timeout=MAX_WAIT):
+        """Take one token, waiting up to `timeout` seconds; returns False if none came free"""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution.
+
+    The first caller runs `fn`; callers arriving while it is in flight wait
+    and get the same result (or exception) instead of issuing their own.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = {"done": threading.Event(), "result": None, "error": None}
+            else:
+                self.coalesced += 1
+        if not leader:
+            call["done"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return call["result"]
+
+        try:
+            call["result"] = fn()
+            return call["result"]
+        except Exception as e:
+            call["error"] = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call["done"].set()
+
+
+class QuotaGuard:
+    """Wraps the gspread HTTP client calls the app makes with a shared request budget.
+
+    Identical concurrent reads are coalesced, every request that reaches
+    Google takes a token from the credential's bucket, and 429/5xx answers
+    are retried with jittered exponential backoff (honouring Retry-After).
+    A 429 that outlasts the retries, or asks for a longer wait than
+    BACKOFF_MAX, starts a cool-down during which calls fail fast with
+    QuotaExceeded, so callers fall back to their snapshot instead of
+    blocking the page or spending more quota.
+    """
+
+    def __init__(self, http_client, bucket):
+        self.http_client = http_client
+        self.bucket = bucket
+        self.flight = SingleFlight()
+        self.lock = threading.Lock()
+        self.cooldown_until = 0.0
+        self.stats = {"requests": 0, "retries": 0, "throttled": 0}
+
+    def get_file_drive_metadata(self, spreadsheet_id):
+        return self._call(("metadata", spreadsheet_id), self.http_client.get_file_drive_metadata, spreadsheet_id)
+
+    def values_batch_get(self, spreadsheet_id, ranges, params=None):
+        key = ("values", spreadsheet_id, tuple(ranges), tuple(sorted((params or {}).items())))
+        return self._call(key, self.http_client.values_batch_get, spreadsheet_id, ranges, params=params)
+
+    def details(self):
+        """Request counters, coalesced reads and the remaining cool-down in seconds"""
+        with self.lock:
+            stats = dict(self.stats)
+            stats["cooldown_s"] = max(0.0, self.cooldown_until - time.time())
+        stats["coalesced"] = self.flight.coalesced
+        return stats
+
+    def _call(self, key, fn, *args, **kwargs):
+        return self.flight.do(key, lambda: self._request(fn, *args, **kwargs))
+
+    def _request(self, fn, *args, **kwargs):
+        for attempt in range(MAX_ATTEMPTS):
+            remaining = self.cooldown_until - time.time()
+            if remaining > 0:
+                raise QuotaExceeded(remaining)
+            if not self.bucket.acquire():
+                with self.lock:
+                    self.stats["throttled"] += 1
+                raise QuotaExceeded(MAX_WAIT)
+            with self.lock:
+                self.stats["requests"] += 1
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                status = _status_code(e)
+                if status not in RETRY_STATUSES:
+                    raise
+                delay = _retry_after(e) or min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt) * random.uniform(0.5, 1.0)
+                if attempt == MAX_ATTEMPTS - 1 or delay > BACKOFF_MAX:
+                    if status == 429:
+                        self._throttle(delay)
+                    raise
+                with self.lock:
+                    self.stats["retries"] += 1
+                time.sleep(delay)
+
+    def _throttle(self, seconds):
+        """Start (or extend) the cool-down and fail this call"""
+        with self.lock:
+            self.cooldown_until = max(self.cooldown_until, time.time() + seconds)
+            self.stats["throttled"] += 1
+        raise QuotaExceeded(seconds)
+
+
+def _status_code(error):
+    """HTTP status of a failed gspread/requests call, if it carries one"""
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None)
+    return status if status is not None else getattr(error, "code", None)
+
+
+def _retry_after(error):
+    """Seconds from a Retry-After header, capped at COOLDOWN_MAX"""
+    response = getattr(error, "response", None)
+    try:
+        return min(COOLDOWN_MAX, float(response.headers["Retry-After"]))
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return None
@@ -0,0 +1,87 @@
+import random
+import threading
+import time
+
+# ========================================
+# BACKGROUND REFRESH SCHEDULER
+# ========================================
+
+JITTER = 0.1  # Each run is rescheduled within +/- this share of its interval
+
+
+class RefreshScheduler:
+    """Runs periodic jobs on one daemon thread, each with its own jittered interval.
+
+    `jobs` maps a job name to (interval_seconds, fn). Jobs named in
+    `run_now` run as soon as the thread starts, the rest after their first
+    interval; each then runs roughly every interval. Failures are recorded
+    and retried on the normal schedule. `details` reports the last run
+    time, duration and outcome per job without touching the jobs themselves.
+    """
+
+    def __init__(self, jobs, run_now=()):
+        self.jobs = jobs
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        now = time.time()
+        self.state = {
+            name: {
+                "next_run_at": now if name in run_now else now + interval,
+                "last_run_at": None,
+                "last_duration_ms": None,
+                "last_ok": None,
+                "last_error": None,
+                "runs": 0,
+            }
+            for name, (interval, _) in jobs.items()
+        }
+        self.thread = None
+
+    def start(self):
+        """Start the scheduler thread (idempotent)"""
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._run, name="refresh-scheduler", daemon=True)
+            self.thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            for name in self.due():
+                self.run_job(name)
+            with self.lock:
+                next_at = min(s["next_run_at"] for s in self.state.values())
+            self.wakeup.wait(max(0.0, next_at - time.time()))
+            self.wakeup.clear()
+
+    def due(self):
+        """Names of jobs whose next run time has passed, earliest first"""
+        now = time.time()
+        with self.lock:
+            due = [(s["next_run_at"], name) for name, s in self.state.items() if s["next_run_at"] <= now]
+        return [name for _, name in sorted(due)]
+
+    def run_job(self, name):
+        """Run one job now, record the outcome and schedule its next run"""
+        interval, fn = self.jobs[name]
+        started = time.time()
+        start = time.perf_counter()
+        try:
+            fn()
+            ok, error = True, None
+        except Exception as e:
+            ok, error = False, str(e)
+        duration_ms = (time.perf_counter() - start) * 1000
+
+        with self.lock:
+            state = self.state[name]
+            state["last_run_at"] = started
+            state["last_duration_ms"] = duration_ms
+            state["last_ok"] = ok
+            state["last_error"] = error
+            state["runs"] += 1
+            state["next_run_at"] = time.time() + interval * random.uniform(1 - JITTER, 1 + JITTER)
+
+    def details(self):
+        """Copy of the per-job schedule and last-run state"""
+        with self.lock:
+            return {name: dict(state) for name, state in self.state.items()}
@@ -0,0 +1,223 @@
+import re
+from bisect import bisect_left
+
+import numpy as np
+import pandas as pd
+
+# ========================================
+# SEARCH INDEX
+# ========================================
+
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+# Prefixes up to this length get precomputed postings, so one- and two-letter
+# queries are a single lookup instead of a union over thousands of tokens
+SHORT_PREFIX = 2
+
+# Candidate tokens checked per query term for typo-tolerant matches
+FUZZY_CANDIDATES = 64
+
+# Result sets larger than size // DENSE_FRACTION switch to dense array passes
+DENSE_FRACTION = 16
+
+# Score per match tier, best tier wins per row and term
+EXACT, PREFIX, INFIX, FUZZY = 4, 3, 2, 1
+
+
+def tokenize(text):
+    """Lower-cased alphanumeric tokens of a cell or query"""
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+def trigrams(token):
+    """Set of character trigrams of a token"""
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+def edit_distance(a, b, limit):
+    """Optimal string alignment distance, or limit + 1 once it is exceeded"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2 = None
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > limit:
+            return limit + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+def _merge(parts, size):
+    """Union of (rows, score) arrays keeping the best score per row, sorted by row"""
+    parts = [(rows, score) for rows, score in parts if len(rows)]
+    if not parts:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int8)
+
+    if sum(len(r) for r, _ in parts) > size // DENSE_FRACTION:
+        # Large unions are cheaper as one pass over a dense score array
+        best = np.zeros(size, dtype=np.int8)
+        for rows, score in sorted(parts, key=lambda p: p[1]):
+            best[rows] = score
+        rows = np.flatnonzero(best)
+        return rows, best[rows]
+
+    rows = np.concatenate([r for r, _ in parts])
+    scores = np.concatenate([np.full(len(r), s, dtype=np.int8) for r, s in parts])
+    order = np.lexsort((-scores, rows))
+    rows, scores = rows[order], scores[order]
+    first = np.ones(len(rows), dtype=bool)
+    first[1:] = rows[1:] != rows[:-1]
+    return rows[first], scores[first]
+
+
+def _csr(groups, values, group_count, value_count):
+    """Sorted, de-duplicated values per group as (offsets, flat) arrays"""
+    keys = np.sort(np.asarray(groups, dtype=np.int64) * value_count + values)
+    if len(keys):
+        keys = keys[np.concatenate([[True], keys[1:] != keys[:-1]])]
+    counts = np.bincount(keys // value_count, minlength=group_count)
+    offsets = np.zeros(group_count + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return offsets, keys % value_count
+
+
+class SearchIndex:
+    """Inverted token index with trigram lookup over chosen text columns.
+
+    Each query term matches tokens exactly, by prefix, as a substring, or
+    within a small edit distance. Every term must match (AND), and rows are
+    ranked by the summed tier scores. Postings are stored CSR-style (one
+    flat row array plus per-token offsets over the sorted vocabulary), so a
+    prefix is a single contiguous slice. Build once per data version.
+    """
+
+    def __init__(self, df, columns):
+        self.size = len(df)
+        self.columns = [c for c in columns if c in df.columns]
+
+        tokens, positions = [], []
+        for col in self.columns:
+            for pos, cell in enumerate(df[col].tolist()):
+                if cell is None or cell == "":
+                    continue
+                cell_tokens = tokenize(cell)
+                tokens.extend(cell_tokens)
+                positions.extend([pos] * len(cell_tokens))
+
+        codes, vocab = pd.factorize(pd.Series(tokens, dtype=object), sort=True)
+        self.vocab = list(vocab)
+        self.token_ids = {t: i for i, t in enumerate(self.vocab)}
+        self.offsets, self.flat = _csr(codes, np.asarray(positions, dtype=np.int64), len(self.vocab), self.size)
+        self.counts = np.diff(self.offsets)
+        self.lengths = np.array([len(t) for t in self.vocab], dtype=np.int64)
+        self.vocab_array = np.array(self.vocab, dtype=str)
+
+        self.short_prefix = {}
+        for n in range(1, SHORT_PREFIX + 1):
+            prefix_codes, prefixes = pd.factorize(pd.Series([t[:n] for t in self.vocab], dtype=object))
+            token_rows = np.repeat(np.arange(len(self.vocab)), self.counts)
+            offsets, flat = _csr(prefix_codes[token_rows], self.flat, len(prefixes), self.size)
+            for i, prefix in enumerate(prefixes):
+                if len(prefix) == n:
+                    self.short_prefix[prefix] = flat[offsets[i]:offsets[i + 1]]
+
+        grams, gram_tokens = [], []
+        for i, token in enumerate(self.vocab):
+            token_grams = trigrams(token)
+            grams.extend(token_grams)
+            gram_tokens.extend([i] * len(token_grams))
+        gram_codes, gram_names = pd.factorize(pd.Series(grams, dtype=object))
+        offsets, flat = _csr(gram_codes, np.asarray(gram_tokens, dtype=np.int64), len(gram_names), len(self.vocab))
+        self.trigrams = {g: flat[offsets[i]:offsets[i + 1]] for i, g in enumerate(gram_names)}
+
+    def _rows(self, token_ids):
+        """Concatenated postings of several tokens, gathered without a Python loop"""
+        starts = self.offsets[token_ids]
+        counts = self.counts[token_ids]
+        total = int(counts.sum())
+        if not total:
+            return np.empty(0, dtype=np.int64)
+        shift = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+        return self.flat[np.arange(total) + shift]
+
+    def _term_matches(self, term):
+        """Rows matching one query term, with the best match tier per row"""
+        parts = []
+        exact = self.token_ids.get(term)
+        if exact is not None:
+            parts.append((self.flat[self.offsets[exact]:self.offsets[exact + 1]], EXACT))
+
+        if len(term) <= SHORT_PREFIX:
+            parts.append((self.short_prefix.get(term, np.empty(0, dtype=np.int64)), PREFIX))
+            return _merge(parts, self.size)
+
+        # Prefix matches are one contiguous run of the sorted vocabulary
+        start = bisect_left(self.vocab, term)
+        end = bisect_left(self.vocab, term + "\uffff", lo=start)
+        if end > start:
+            parts.append((self.flat[self.offsets[start]:self.offsets[end]], PREFIX))
+
+        # Substring matches: tokens holding every trigram of the term
+        term_grams = trigrams(term)
+        gram_ids = [self.trigrams.get(g) for g in term_grams]
+        if term_grams and all(ids is not None for ids in gram_ids):
+            candidates = gram_ids[0]
+            for ids in gram_ids[1:]:
+                candidates = np.intersect1d(candidates, ids, assume_unique=True)
+            candidates = candidates[(candidates < start) | (candidates >= end)]
+            if len(term) > 3 and len(candidates):
+                candidates = candidates[np.char.find(self.vocab_array[candidates], term) >= 0]
+            if len(candidates):
+                parts.append((self._rows(candidates), INFIX))
+
+        # Typo tolerance, only when nothing matched literally: tokens of similar
+        # length sharing the most trigrams with the term (ties go to the more
+        # frequent token), verified by edit distance
+        if len(term) >= 4 and not parts:
+            limit = 1 if len(term) < 8 else 2
+            found = [ids for ids in gram_ids if ids is not None]
+            if found:
+                ids, shared = np.unique(np.concatenate(found), return_counts=True)
+                near = np.abs(self.lengths[ids] - len(term)) <= limit
+                ids, shared = ids[near], shared[near]
+                top = np.lexsort((-self.counts[ids], -shared))[:FUZZY_CANDIDATES]
+                close = [i for i in ids[top].tolist() if edit_distance(term, self.vocab[i], limit) <= limit]
+                if close:
+                    parts.append((self._rows(np.asarray(close, dtype=np.int64)), FUZZY))
+
+        return _merge(parts, self.size)
+
+    def search(self, query, limit=None):
+        """Row positions matching every term of `query`, best matches first"""
+        terms = tokenize(query)
+        if not terms:
+            return np.arange(self.size)
+
+        rows, scores = None, None
+        for term in dict.fromkeys(terms):
+            term_rows, term_scores = self._term_matches(term)
+            if rows is None:
+                rows, scores = term_rows, term_scores.astype(np.int32)
+            elif len(rows) + len(term_rows) > self.size // DENSE_FRACTION:
+                dense = np.zeros(self.size, dtype=np.int32)
+                dense[term_rows] = term_scores
+                keep = dense[rows] > 0
+                rows = rows[keep]
+                scores = scores[keep] + dense[rows]
+            else:
+                rows, left, right = np.intersect1d(rows, term_rows, assume_unique=True, return_indices=True)
+                scores = scores[left] + term_scores[right]
+            if not len(rows):
+                break
+
+        if len(scores) and (scores == scores[0]).all():
+            ranked = rows  # Already in row order and nothing to rank
+        else:
+            ranked = rows[np.lexsort((rows, -scores))]
+        return ranked[:limit] if limit else ranked
@@ -0,0 +1,165 @@
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# ========================================
+# LEAD SELECTION
+# ========================================
+
+class LeadIdIndex:
+    """Append-only Lead ID -> bit position registry, shared by every session.
+
+    A Lead ID keeps its position for the life of the process, so selections
+    survive the sheet being re-sorted, filtered or reloaded. Positions of
+    IDs that leave the sheet are simply not reused.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.ids = pd.Index([], dtype=object)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def positions(self, lead_ids):
+        """Bit position per Lead ID (array), registering IDs seen for the first time"""
+        lead_ids = pd.Index(lead_ids, dtype=object)
+        with self.lock:
+            found = self.ids.get_indexer(lead_ids)
+            new = lead_ids[found < 0].unique()
+            if len(new):
+                self.ids = self.ids.append(new)
+                found = self.ids.get_indexer(lead_ids)
+        return found.astype(np.int64)
+
+    def lead_ids(self, positions):
+        """Lead IDs at the given positions"""
+        return self.ids[np.asarray(positions, dtype=np.int64)].tolist()
+
+
+class LeadSelection:
+    """One session's selected leads as a bitset over a LeadIdIndex.
+
+    Takes one bit per Lead ID ever registered (12.5 KB for 100k leads)
+    instead of a set of ID strings. Every operation is given the bit
+    positions of the rows it applies to, so select-all, select-filtered,
+    invert and clear are single array operations.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.words = np.zeros(0, dtype=np.uint64)
+
+    def _grow(self, positions):
+        if len(positions):
+            needed = int(positions.max()) // 64 + 1
+            if needed > len(self.words):
+                self.words = np.concatenate([self.words, np.zeros(needed - len(self.words), dtype=np.uint64)])
+
+    def contains(self, positions):
+        """Boolean array: which of the positions are selected"""
+        positions = np.asarray(positions, dtype=np.int64)
+        word = positions >> 6
+        inside = word < len(self.words)
+        result = np.zeros(len(positions), dtype=bool)
+        bits = self.words[word[inside]] >> (positions[inside] & 63).astype(np.uint64)
+        result[inside] = (bits & np.uint64(1)).astype(bool)
+        return result
+
+    def set(self, positions, selected=True):
+        """Select (or deselect) the positions; `selected` may be one flag or one per position"""
+        positions = np.asarray(positions, dtype=np.int64)
+        selected = np.broadcast_to(np.asarray(selected, dtype=bool), positions.shape)
+        self._grow(positions)
+        masks = np.left_shift(np.uint64(1), (positions & 63).astype(np.uint64))
+        np.bitwise_or.at(self.words, positions[selected] >> 6, masks[selected])
+        np.bitwise_and.at(self.words, positions[~selected] >> 6, ~masks[~selected])
+
+    def invert(self, positions):
+        """Flip the positions (each position once, however often it is listed)"""
+        positions = np.unique(np.asarray(positions, dtype=np.int64))
+        self._grow(positions)
+        np.bitwise_xor.at(self.words, positions >> 6, np.left_shift(np.uint64(1), (positions & 63).astype(np.uint64)))
+
+    def clear(self):
+        self.words[:] = 0
+
+    @property
+    def nbytes(self):
+        return self.words.nbytes
+
+
+# ========================================
+# TASK FORM STATE
+# ========================================
+
+FORM_ENTRIES = 16   # Tasks whose edit form values a session keeps
+
+
+class FormCache:
+    """Bounded LRU of per-task form values for one session.
+
+    Replaces one session_state entry per field per task ever opened; the
+    least recently opened task's values are dropped once `capacity` tasks
+    are held, and are re-seeded from the sheet if it is opened again.
+    """
+
+    def __init__(self, capacity=FORM_ENTRIES):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, default):
+        """Values for a key, seeded from `default()` when missing, marked most recently used"""
+        if key in self.entries:
+            self.entries.move_to_end(key)
+        else:
+            self.entries[key] = default()
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+        return self.entries[key]
+
+    def discard(self, key):
+        self.entries.pop(key, None)
+
+
+# ========================================
+# SESSION MEMORY
+# ========================================
+
+def value_bytes(value, depth=2):
+    """Approximate deep size of a session_state value.
+
+    Arrays and frames report their buffers; containers add their items
+    down to `depth` levels. Objects holding a session's own state
+    (LeadSelection, FormCache) are measured through their attributes.
+    """
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True, index=True)
+        return int(usage.sum()) if isinstance(usage, pd.Series) else int(usage)
+    if isinstance(value, LeadSelection):
+        # The Lead ID index is shared by every session and not counted here
+        return sys.getsizeof(value) + value.nbytes
+    size = sys.getsizeof(value)
+    if depth <= 0:
+        return size
+    if isinstance(value, FormCache):
+        return size + value_bytes(value.entries, depth)
+    if isinstance(value, dict):
+        return size + sum(value_bytes(k, depth - 1) + value_bytes(v, depth - 1) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return size + sum(value_bytes(v, depth - 1) for v in value)
+    return size
+
+
+def state_bytes(state):
+    """Approximate bytes held per session_state key, largest first"""
+    sizes = {str(key): value_bytes(state[key]) for key in list(state.keys())}
+    return dict(sorted(sizes.items(), key=lambda item: item[1], reverse=True))
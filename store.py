@@ -0,0 +1,97 @@
+import sys
+
+import pandas as pd
+
+# ========================================
+# COLUMNAR SHEET STORE
+# ========================================
+
+# Text columns become categoricals when at most this share of values is distinct
+CATEGORY_RATIO = 0.5
+
+
+def compact_frame(df):
+    """Copy of a parsed sheet frame with dictionary-encoded and interned string columns.
+
+    Columns the sheet schema already typed are kept. Low-cardinality text
+    columns become categoricals (one code per row plus one copy of each
+    distinct value), other text columns use the contiguous string dtype.
+    Mixed-type object columns keep their values but share one interned
+    object per distinct string.
+    """
+    columns = {}
+    for pos in range(df.shape[1]):
+        series = df.iloc[:, pos]
+        if isinstance(series.dtype, pd.StringDtype):
+            text = True
+        else:
+            text = series.dtype == object and pd.api.types.infer_dtype(series, skipna=True) == "string"
+        if text and series.nunique() <= CATEGORY_RATIO * len(series):
+            series = series.astype("category")
+        elif text:
+            series = series.astype("str")
+        elif series.dtype == object:
+            series = pd.Series(
+                [sys.intern(v) if isinstance(v, str) else v for v in series.tolist()],
+                index=series.index,
+                dtype=object,
+            )
+        columns[pos] = series
+    frame = pd.DataFrame(columns) if columns else pd.DataFrame(index=df.index)
+    frame.columns = df.columns
+    frame.attrs.update(df.attrs)
+    return frame
+
+
+class ColumnStore:
+    """Read-only, typed columnar view of one version of a sheet.
+
+    Query it directly (counts, equality filters, row slices) instead of
+    materialising per-row dicts. `frame` is shared between sessions and
+    must not be modified.
+    """
+
+    def __init__(self, name, df):
+        self.name = name
+        self.frame = compact_frame(df)
+
+    def __len__(self):
+        return len(self.frame)
+
+    @property
+    def empty(self):
+        return self.frame.empty
+
+    def column(self, name):
+        """Column by canonical name, or None when the sheet lacks it"""
+        return self.frame[name] if name in self.frame.columns else None
+
+    def counts(self, name):
+        """Value counts of a column as a dict, without touching other columns"""
+        series = self.column(name)
+        if series is None:
+            return {}
+        return {k: int(v) for k, v in series.value_counts().items() if v}
+
+    def where(self, conditions):
+        """Row positions where each column equals a value (or is in a list of values)"""
+        mask = pd.Series(True, index=self.frame.index)
+        for name, value in conditions.items():
+            series = self.column(name)
+            if series is None:
+                return []
+            mask &= series.isin(value if isinstance(value, (list, tuple, set)) else [value])
+        return mask.to_numpy().nonzero()[0].tolist()
+
+    def rows(self, positions, columns=None):
+        """Frame slice of the given row positions (and optionally columns)"""
+        frame = self.frame.iloc[positions]
+        return frame[columns] if columns else frame
+
+    def head(self, n=5, columns=None):
+        """First n rows (optionally projected to some columns)"""
+        return self.rows(slice(0, n), columns)
+
+    def memory_bytes(self):
+        """Deep memory footprint of the stored columns"""
+        return int(self.frame.memory_usage(deep=True, index=False).sum())
@@ -1,25 +1,62 @@
 import streamlit as st
 
+# Agent status -> badge class
+STATUS_CLASSES = {
+    "Active": "status-active",
+    "Idle": "status-idle",
+    "Offline": "status-offline"
+}
+
+def status_class(status):
+    """Badge CSS class for an agent status (unknown statuses show as offline)"""
+    return STATUS_CLASSES.get(status, "status-offline")
+
 def load_css():
+    """Inject the command center's shared styles"""
     st.markdown("""
     <style>
         .main-header {
-            font-size: 2.8rem;
+            font-size: 3rem;
             font-weight: 700;
-            margin-bottom: 1rem;
+            color: #1a1a1a;
+            margin-bottom: 0.5rem;
+        }
+        .agent-card {
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            padding: 1.5rem;
+            border-radius: 10px;
+            color: white;
+            margin: 1rem 0;
         }
         .status-active {
-            background:#10b981;
-            padding:4px 8px;
-            border-radius:4px;
-            color:white;
+            background: #10b981;
+            color: white;
+            padding: 0.3rem 0.8rem;
+            border-radius: 5px;
+            font-weight: 600;
+            font-size: 0.85rem;
         }
         .status-idle {
-            background:#f59e0b;
-            padding:4px 8px;
-            border-radius:4px;
-            color:white;
+            background: #f59e0b;
+            color: white;
+            padding: 0.3rem 0.8rem;
+            border-radius: 5px;
+            font-weight: 600;
+            font-size: 0.85rem;
+        }
+        .status-offline {
+            background: #6b7280;
+            color: white;
+            padding: 0.3rem 0.8rem;
+            border-radius: 5px;
+            font-weight: 600;
+            font-size: 0.85rem;
+        }
+        .metric-card {
+            background: #f9fafb;
+            padding: 1rem;
+            border-radius: 8px;
+            border-left: 4px solid #667eea;
         }
     </style>
     """, unsafe_allow_html=True)
-
@@ -0,0 +1,358 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# ========================================
+# SHEET DELTA SYNC
+# ========================================
+
+# Re-read the values at least this often even when Drive reports no change,
+# so a missed modifiedTime bump can never pin a stale snapshot forever.
+FULL_RESYNC_SECONDS = 900
+
+# Cells matching this are the only ones gspread's numericise could convert
+NUMERIC_LIKE = r"(?i)^\s*[+-]?(?:\d+\.?\d*(?:e[+-]?\d+)?|\.\d+(?:e[+-]?\d+)?|nan|inf(?:inity)?)\s*$"
+
+# A1 range without a sheet name: the whole first sheet of the spreadsheet
+FIRST_SHEET_RANGE = "A:ZZZ"
+
+KEY_FIELD = "__row_key"
+HASH_FIELD = "__row_hash"
+
+
+def row_hash(values):
+    """Stable content hash of one raw sheet row"""
+    return hashlib.blake2b("\x1f".join(values).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def row_keys(header, rows, key_columns, start=0, seen=None):
+    """Build a unique key per row from the first key column present in the header.
+
+    Blank keys fall back to the row position and repeated keys get an
+    occurrence suffix, so every row can be diffed independently. `start`
+    and `seen` (key -> occurrences so far, updated in place) continue the
+    numbering for rows appended after `start` existing ones.
+    """
+    key_idx = next((header.index(c) for c in key_columns if c in header), None)
+    keys = []
+    seen = {} if seen is None else seen
+    for pos, row in enumerate(rows, start=start):
+        key = str(row[key_idx]).strip() if key_idx is not None else ""
+        if not key:
+            key = f"#row{pos + 2}"
+        count = seen.get(key, 0)
+        seen[key] = count + 1
+        keys.append(key if count == 0 else f"{key}#{count + 1}")
+    return keys
+
+
+def numericise_frame(raw, header):
+    """Vectorised equivalent of gspread's numericise_all over raw string cells.
+
+    Only cells that look numeric go through gspread's own `numericise`, once
+    per distinct value, so the result matches `get_all_records` exactly.
+    """
+    from gspread.utils import numericise  # Importing gspread is slow; only parsing needs it
+    columns = {}
+    for pos in range(raw.shape[1]):
+        values = raw.iloc[:, pos].to_numpy(dtype=object, copy=True)
+        candidates = np.flatnonzero(pd.Series(values, dtype=object).str.match(NUMERIC_LIKE, na=False).to_numpy())
+        if len(candidates):
+            converted = {v: numericise(v) for v in set(values[candidates])}
+            values[candidates] = [converted[v] for v in values[candidates]]
+        columns[pos] = values.tolist()
+    frame = pd.DataFrame(columns)
+    frame.columns = header
+    return frame
+
+
+class SheetSource:
+    """The two reads SheetSync needs, made straight through gspread's HTTP client.
+
+    `client.open_by_key(...).sheet1` costs two spreadsheet metadata calls
+    before any values are read; this fetches no metadata at all, just the
+    Drive modified time and one `values:batchGet` for the first sheet.
+    """
+
+    def __init__(self, http_client, spreadsheet_id):
+        self.http_client = http_client
+        self.id = spreadsheet_id
+
+    def get_lastUpdateTime(self):
+        """Drive modifiedTime of the spreadsheet (same name as gspread's Spreadsheet method)"""
+        return self.http_client.get_file_drive_metadata(self.id)["modifiedTime"]
+
+    def get_values(self, ranges=(FIRST_SHEET_RANGE,)):
+        """Cell values of each range, as lists of rows of formatted strings"""
+        response = self.http_client.values_batch_get(self.id, list(ranges))
+        return [r.get("values", []) for r in response.get("valueRanges", [])]
+
+
+class SheetSync:
+    """Last snapshot of one sheet plus per-row content hashes.
+
+    `refresh` skips the value read entirely while Drive reports the file
+    unchanged. When it has changed, it first reads only the header, the last
+    row it knows and the rows after it: if those two rows are as last seen
+    and rows were appended, only the new rows are read and added. Otherwise
+    (edits, deletes, inserts) the whole sheet is read, hashed row by row and
+    only new, edited or removed rows are patched into the cached frame of raw
+    cells. Typed values are derived once per version in `snapshot` by
+    `parse(raw_frame, header)`, which defaults to gspread-style numericising.
+    """
+
+    def __init__(self, name, key_columns, parse=None):
+        self.name = name
+        self.key_columns = key_columns
+        self.parse = parse or numericise_frame
+        self.header = []
+        self.keys = []
+        self.hashes = {}
+        self.frame = None
+        # Sheet rows and last row hash as of the last read; None while the
+        # frame holds optimistic writes or came from disk, which forces a full read
+        self.sheet_rows = None
+        self.tail_hash = None
+        self.key_seen = {}
+        self.modified_time = None
+        self.last_full_read = 0.0
+        self.version = 0
+        self.last_delta = {"added": 0, "updated": 0, "removed": 0}
+        self.lock = threading.Lock()
+        self._served = (-1, None)
+
+        # Freshness bookkeeping for stale-while-revalidate
+        self.fetched_at = None
+        self.checked_at = 0.0
+        self.refresh_ms = None
+        self.stale = False
+        self.last_error = None
+        self.rate_limited = False
+        self.invalidated = False
+        self.refreshing = False
+
+    def refresh(self, source, force=False):
+        """Bring the snapshot up to date from a SheetSource, returning True if any row changed"""
+        try:
+            modified = source.get_lastUpdateTime()
+        except Exception:
+            modified = None
+
+        fresh = time.time() - self.last_full_read < FULL_RESYNC_SECONDS
+        unchanged = modified is not None and modified == self.modified_time
+        if self.frame is not None and unchanged and fresh and not force:
+            self.last_delta = {"added": 0, "updated": 0, "removed": 0}
+            return False
+
+        # Fetch outside the lock so readers are never held up by the network
+        with self.lock:
+            known_rows = self.sheet_rows if fresh and not force else None
+        if known_rows is not None:
+            header, last, appended = source.get_values(self._tail_ranges(known_rows))
+            with self.lock:
+                changed = self._apply_append(known_rows, header, last, appended)
+                if changed is not None:
+                    self.modified_time = modified
+                    return changed
+
+        values = source.get_values()[0]
+        with self.lock:
+            changed = self._apply_values(values)
+            self.modified_time = modified
+            self.last_full_read = time.time()
+        return changed
+
+    @staticmethod
+    def _tail_ranges(known_rows):
+        """Header row, the last known row (the header when there were none) and everything after it"""
+        last = known_rows + 1
+        return ["A1:ZZZ1", f"A{last}:ZZZ{last}", f"A{last + 1}:ZZZ"]
+
+    def _apply_append(self, known_rows, header_values, last_values, appended):
+        """Add rows appended after the last known row; None when a full diff is needed"""
+        if self.sheet_rows != known_rows:
+            # An optimistic write or another refresh got in while reading
+            return None
+        header = list(header_values[0]) if header_values else []
+        if header != self.header or not appended:
+            # No new rows: the change was an edit, delete or formatting
+            return None
+        width = len(header)
+        last = (list(last_values[0] if last_values else []) + [""] * width)[:width]
+        if row_hash(last) != self.tail_hash:
+            # The last known row moved or changed: rows were inserted, deleted or edited
+            return None
+
+        rows = [(list(r) + [""] * width)[:width] for r in appended]
+        keys = row_keys(header, rows, self.key_columns, start=self.sheet_rows, seen=self.key_seen)
+        patch = pd.DataFrame(rows, columns=header, index=keys, dtype=object)
+        self.frame = patch if self.frame.empty else pd.concat([self.frame, patch])
+        self.keys = self.keys + keys
+        self.hashes.update(zip(keys, map(row_hash, rows)))
+        self.sheet_rows += len(rows)
+        self.tail_hash = row_hash(rows[-1])
+        self.last_delta = {"added": len(rows), "updated": 0, "removed": 0}
+        self.version += 1
+        return True
+
+    def _apply_values(self, values):
+        """Diff raw sheet values against the snapshot and patch the frame"""
+        header = list(values[0]) if values else []
+        width = len(header)
+        rows = [(list(r) + [""] * width)[:width] for r in values[1:]]
+        seen = {}
+        keys = row_keys(header, rows, self.key_columns, seen=seen)
+        hashes = [row_hash(r) for r in rows]
+        self.sheet_rows = len(rows)
+        self.tail_hash = row_hash(rows[-1] if rows else header)
+        self.key_seen = seen
+
+        if self.frame is None or header != self.header:
+            self.frame = pd.DataFrame(rows, columns=header, index=keys, dtype=object)
+            self.last_delta = {"added": len(rows), "updated": 0, "removed": len(self.hashes)}
+        else:
+            new_keys = set(keys)
+            removed = [k for k in self.keys if k not in new_keys]
+            updated = []
+            added = []
+            for pos, (key, digest) in enumerate(zip(keys, hashes)):
+                old = self.hashes.get(key)
+                if old is None:
+                    added.append(pos)
+                elif old != digest:
+                    updated.append(pos)
+
+            if not (removed or updated or added) and keys == self.keys:
+                self.last_delta = {"added": 0, "updated": 0, "removed": 0}
+                return False
+
+            if removed:
+                self.frame.drop(index=removed, inplace=True)
+            if updated:
+                self.frame.loc[[keys[p] for p in updated], :] = [rows[p] for p in updated]
+            if added:
+                patch = pd.DataFrame(
+                    [rows[p] for p in added],
+                    columns=header,
+                    index=[keys[p] for p in added],
+                    dtype=object,
+                )
+                self.frame = patch if self.frame.empty else pd.concat([self.frame, patch])
+            if not self.frame.index.equals(pd.Index(keys)):
+                self.frame = self.frame.reindex(keys)
+            self.last_delta = {"added": len(added), "updated": len(updated), "removed": len(removed)}
+
+        self.header = header
+        self.keys = keys
+        self.hashes = dict(zip(keys, hashes))
+        self.version += 1
+        return True
+
+    def upsert_row(self, key, values):
+        """Optimistically patch (or append) one row of raw cells ahead of the next sync.
+
+        `values` maps column name to cell text; unknown columns are ignored.
+        Returns the row key used, which is a placeholder when `key` is empty.
+        """
+        with self.lock:
+            if self.frame is None:
+                return None
+            cells = {c: str(v) for c, v in values.items() if c in self.header}
+            if key and key in self.hashes:
+                for col, value in cells.items():
+                    self.frame.loc[key, col] = value
+            else:
+                key = key or f"#pending{len(self.keys) + 1}"
+                row = pd.DataFrame([[cells.get(c, "") for c in self.header]], columns=self.header, index=[key], dtype=object)
+                self.frame = row if self.frame.empty else pd.concat([self.frame, row])
+                self.keys = self.keys + [key]
+            self.hashes[key] = row_hash([str(v) for v in self.frame.loc[key].tolist()])
+            self.sheet_rows = None
+            self.version += 1
+            return key
+
+    def delete_row(self, key):
+        """Drop one row ahead of the next sync, returning True if it was present"""
+        with self.lock:
+            if self.frame is None or key not in self.hashes:
+                return False
+            self.frame = self.frame.drop(index=key)
+            self.keys = [k for k in self.keys if k != key]
+            del self.hashes[key]
+            self.sheet_rows = None
+            self.version += 1
+            return True
+
+    def snapshot(self):
+        """Return the current data as a typed DataFrame (built once per version)"""
+        version, served = self._served
+        if version == self.version and served is not None:
+            return served
+        with self.lock:
+            if self.frame is None or not self.header:
+                return pd.DataFrame()
+            if self._served[0] != self.version:
+                frame = self.parse(self.frame, self.header)
+                # Lets derived structures (search index, metrics) key their caches by version
+                frame.attrs["sheet_version"] = (self.name, self.version)
+                self._served = (self.version, frame)
+            return self._served[1]
+
+    # ========================================
+    # ON-DISK SNAPSHOT
+    # ========================================
+
+    def save(self, path):
+        """Write raw cells, row keys and hashes to an Arrow IPC file (atomic replace)"""
+        with self.lock:
+            if self.frame is None:
+                return
+            arrays = [pa.array(self.frame.iloc[:, i].astype(str).tolist(), pa.string()) for i in range(len(self.header))]
+            arrays.append(pa.array(self.keys, pa.string()))
+            arrays.append(pa.array([self.hashes[k] for k in self.keys], pa.string()))
+            meta = {
+                "name": self.name,
+                "header": self.header,
+                "modified_time": self.modified_time,
+                "fetched_at": self.fetched_at,
+            }
+            table = pa.Table.from_arrays(
+                arrays, names=[f"c{i}" for i in range(len(self.header))] + [KEY_FIELD, HASH_FIELD]
+            ).replace_schema_metadata({"apexx": json.dumps(meta)})
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+
+    def load(self, path):
+        """Warm-start from a snapshot file written by `save`, returning True on success"""
+        if not os.path.exists(path):
+            return False
+        with pa.memory_map(path, "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+        meta = json.loads(table.schema.metadata[b"apexx"])
+        keys = table.column(KEY_FIELD).to_pylist()
+        hashes = table.column(HASH_FIELD).to_pylist()
+        cells = table.drop_columns([KEY_FIELD, HASH_FIELD]).to_pandas()
+        cells.columns = meta["header"]
+        cells.index = keys
+
+        with self.lock:
+            self.header = meta["header"]
+            self.frame = cells.astype(object)
+            self.keys = keys
+            self.hashes = dict(zip(keys, hashes))
+            self.modified_time = meta["modified_time"]
+            self.fetched_at = meta["fetched_at"]
+            self.sheet_rows = None
+            self.version += 1
+        return True
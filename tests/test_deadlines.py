@@ -0,0 +1,101 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from deadlines import DeadlineIndex, day_number
+
+TODAY = date(2024, 3, 10)
+
+TASKS = pd.DataFrame({
+    "Task ID": ["T1", "T2", "T3", "T4", "T5", "T6"],
+    "Task Title": ["File", "Renew", "Audit", "Report", "Close", "Someday"],
+    "Assigned To": ["Ana", "Ben", "Ana", "", "Ben", "Ana"],
+    "Priority": ["High", "Low", "High", "Medium", "High", "Low"],
+    "Status": ["New", "In Progress", "New", "New", "Completed", "New"],
+    "Deadline Date": pd.to_datetime(["2024-03-08", "2024-03-12", "2024-03-08", "2024-03-20", "2024-03-01", None]),
+})
+
+
+@pytest.fixture
+def index():
+    return DeadlineIndex(TASKS, version=1)
+
+
+def ids(frame):
+    return frame["Task ID"].tolist()
+
+
+def test_due_is_sorted_by_deadline_then_sheet_order(index):
+    assert ids(index.due()) == ["T1", "T3", "T2", "T4"]
+    assert ids(index.overdue(TODAY)) == ["T1", "T3"]
+    assert ids(index.due_soon(TODAY, days=2)) == ["T2"]
+    assert ids(index.due(limit=2)) == ["T1", "T3"]
+
+
+def test_filters_and_blank_buckets(index):
+    assert ids(index.due(assignees={"Ana"})) == ["T1", "T3"]
+    assert ids(index.due(priorities={"Medium"})) == ["T4"]
+    assert index.due(priorities={"Medium"})["Assigned To"].tolist() == ["Unassigned"]
+    assert index.labels() == (["Ana", "Ben", "Unassigned"], ["High", "Low", "Medium"])
+
+
+def test_counts_calendar_and_undated(index):
+    assert index.counts(None, TODAY) == {("Ana", "High"): 2}
+    calendar = index.calendar(date(2024, 3, 8), date(2024, 3, 13))
+    assert calendar.tolist() == [2, 0, 0, 0, 1]
+    assert calendar.index[0] == date(2024, 3, 8)
+    assert index.undated_count() == 1
+
+
+def test_update_moves_a_task_between_buckets_in_place(index):
+    assert index.update("T1", {"Assigned To": "Ben", "Deadline Date": "2024-03-30"}, 1, 2)
+    assert index.version == 2
+    assert ids(index.overdue(TODAY)) == ["T3"]
+    assert index.counts() == {("Ana", "High"): 1, ("Ben", "Low"): 1, ("Unassigned", "Medium"): 1, ("Ben", "High"): 1}
+    assert ids(index.due())[-1] == "T1"
+
+
+def test_update_closes_reopens_and_clears_deadlines(index):
+    assert index.update("T3", {"Status": "Completed"}, 1, 2)
+    assert ids(index.overdue(TODAY)) == ["T1"]
+    assert index.update("T5", {"Status": "New"}, 2, 3)
+    assert ids(index.overdue(TODAY)) == ["T5", "T1"]
+    assert index.update("T1", {"Deadline Date": ""}, 3, 4)
+    assert ids(index.overdue(TODAY)) == ["T5"]
+    assert index.undated_count() == 2
+
+
+def test_update_appends_unknown_tasks(index):
+    assert index.update("T7", {"Task Title": "New", "Deadline Date": "2024-03-09", "Priority": "Low"}, 1, 2)
+    overdue = index.overdue(TODAY)
+    assert ids(overdue) == ["T1", "T3", "T7"]
+    assert overdue["Assigned To"].tolist()[-1] == "Unassigned"
+    # The appended task can be updated again by ID
+    assert index.update("T7", {"Status": "Cancelled"}, 2, 3)
+    assert ids(index.overdue(TODAY)) == ["T1", "T3"]
+
+
+def test_stale_updates_are_ignored(index):
+    # The sheet moved on more than one version, or the index is behind: wait for a rebuild
+    assert not index.update("T1", {"Status": "Completed"}, 1, 3)
+    assert not index.update("T1", {"Status": "Completed"}, 0, 1)
+    assert index.version == 1
+    assert ids(index.overdue(TODAY)) == ["T1", "T3"]
+    assert not DeadlineIndex().update("T1", {"Status": "New"}, None, 1)
+
+
+def test_updates_match_a_rebuild(index):
+    index.update("T2", {"Deadline Date": "2024-03-05", "Priority": "High"}, 1, 2)
+    index.update("T4", {"Assigned To": "Ana"}, 2, 3)
+    changed = TASKS.copy()
+    changed.loc[1, ["Deadline Date", "Priority"]] = [pd.Timestamp("2024-03-05"), "High"]
+    changed.loc[3, "Assigned To"] = "Ana"
+    rebuilt = DeadlineIndex(changed, version=3)
+    pd.testing.assert_frame_equal(index.due(), rebuilt.due())
+    assert index.counts() == rebuilt.counts()
+
+
+def test_day_number_accepts_dates_and_strings():
+    assert day_number("1970-01-02") == 1
+    assert day_number(date(1970, 1, 11)) == day_number(pd.Timestamp("1970-01-11 15:30")) == 10
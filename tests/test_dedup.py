@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+from dedup import LeadDuplicates, _bucket_pairs, _components, minhash, normalize_emails, valid_emails
+
+LEADS = pd.DataFrame({
+    "Lead ID": ["L1", "L2", "L3", "L4", "L5", "L6", "L7"],
+    "Name": ["Maria Garcia", "Maria Garcia", "Mark Johnson", "Marc Johnson", "Linda Brown", "Chen Wei", "Aisha Patel"],
+    "Organization": ["City of Salem", "City of Salem", "Grace Church Bristol", "Grace Church Bristol", "County of Fairview",
+                     "Township of Clinton", "Community Center Madison"],
+    "Email": ["maria@salem.gov", "m.garcia@salem.gov", "mark@grace.org", "marc.j@grace.org", "Linda+leads@Fairview.gov ",
+              "not-an-email", "linda@fairview.gov"],
+})
+
+
+def test_email_normalising_and_validation():
+    emails = pd.Series(["  Linda+leads@Fairview.gov ", "bob@example", None, "a@b.co"])
+    assert normalize_emails(emails).tolist() == ["linda@fairview.gov", "bob@example", "", "a@b.co"]
+    assert valid_emails(emails).tolist() == [True, False, False, True]
+
+
+def test_minhash_estimates_similarity():
+    signatures = minhash(["maria garcia salem", "maria garcia salem", "maria garcía salem", "linda brown", "ab"])
+    same = lambda a, b: (signatures[a] == signatures[b]).mean()
+    assert same(0, 1) == 1.0
+    assert same(0, 2) > same(0, 3)
+    # Too short for a trigram: an all-max signature
+    assert (signatures[4] == np.iinfo(np.uint32).max).all()
+
+
+def test_bucket_pairs_pair_equal_keys_within_the_window():
+    keys = np.array([5, 1, 5, 5, 2, 1])
+    eligible = np.array([True, True, True, False, True, True])
+    left, right = _bucket_pairs(keys, eligible)
+    assert sorted(zip(left.tolist(), right.tolist())) == [(0, 2), (1, 5)]
+    # Oversized buckets only pair rows within `window` of each other
+    left, _ = _bucket_pairs(np.zeros(10, dtype=np.int64), np.ones(10, dtype=bool), window=2)
+    assert len(left) == 9 + 8
+
+
+def test_components_label_by_smallest_member():
+    labels = _components(6, np.array([4, 2, 1]), np.array([2, 5, 3]))
+    assert labels.tolist() == [0, 1, 2, 1, 2, 2]
+
+
+def test_same_email_and_similar_names_form_groups():
+    dups = LeadDuplicates(LEADS)
+    # L5 and L7 share a normalised address; L1/L2 share name + org; L3/L4 are near-duplicates
+    assert dups.group[4] == dups.group[6]
+    assert dups.group[0] == dups.group[1]
+    assert dups.group[2] == dups.group[3]
+    assert not dups.duplicate[5]
+    assert dups.group_count == 3 and dups.duplicate_count == 3
+    assert dups.invalid_count == 1
+
+    table = dups.groups()
+    assert table["Lead ID"].tolist() == ["L1", "L2", "L3", "L4", "L5", "L7"]
+    assert table["Group"].tolist() == [1, 1, 2, 2, 3, 3]
+    assert table.set_index("Lead ID").loc["L7", "Match"] == "same email"
+    assert dups.invalid()["Lead ID"].tolist() == ["L6"]
+
+
+def test_collapse_keeps_the_first_selected_lead_per_group_in_sheet_order():
+    dups = LeadDuplicates(LEADS)
+    keep, skipped = dups.collapse(["L2", "L7", "L1", "L6", "L5", "L99", "L3"])
+    assert keep == ["L1", "L5", "L99", "L3"]
+    assert skipped == {"L2": "duplicate of L1", "L7": "duplicate of L5", "L6": "invalid email"}
+
+
+def test_collapse_with_only_invalid_emails():
+    dups = LeadDuplicates(LEADS)
+    assert dups.collapse(["L6"]) == ([], {"L6": "invalid email"})
+
+
+def test_collapse_with_only_unknown_ids():
+    dups = LeadDuplicates(LEADS)
+    assert dups.collapse(["L98", "L99"]) == (["L98", "L99"], {})
+    assert dups.collapse([]) == ([], {})
+
+
+def test_frames_without_the_columns_have_no_duplicates():
+    dups = LeadDuplicates(pd.DataFrame({"Lead ID": ["L1", "L2"]}))
+    assert dups.group_count == 0
+    assert dups.invalid_count == 2
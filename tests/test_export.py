@@ -0,0 +1,44 @@
+import io
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+from streamlit.runtime.media_file_manager import MediaFileManager
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+
+import export
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({
+        "Lead ID": [f"L{i}" for i in range(25_000)],
+        "Score": range(25_000),
+        "Created": pd.Timestamp("2024-01-01"),
+    })
+
+
+@pytest.mark.parametrize("fmt", export.available_formats())
+def test_deferred_download_accepts_export(frame, fmt):
+    extension, mime, _ = export.EXPORT_FORMATS[fmt]
+    manager = MediaFileManager(MemoryMediaFileStorage("/media"))
+    file_id = manager.add_deferred(lambda: export.export_file(frame, fmt), mime, "coords", f"leads.{extension}")
+    assert manager.execute_deferred(file_id).startswith("/media/")
+
+
+def test_csv_export_writes_every_chunk_once(frame):
+    data = export.export_file(frame, "CSV", ["Lead ID", "Score"])
+    back = pd.read_csv(io.BytesIO(data))
+    assert list(back.columns) == ["Lead ID", "Score"]
+    assert back["Score"].tolist() == list(range(len(frame)))
+
+
+def test_parquet_export_round_trips(frame):
+    back = pq.read_table(io.BytesIO(export.export_file(frame, "Parquet"))).to_pandas()
+    assert len(back) == len(frame)
+    assert back["Lead ID"].iloc[-1] == "L24999"
+
+
+def test_empty_csv_export_keeps_header():
+    data = export.export_file(pd.DataFrame(columns=["Lead ID", "Score"]), "CSV")
+    assert data.decode().strip() == "Lead ID,Score"
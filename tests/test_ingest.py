@@ -0,0 +1,47 @@
+import http.client
+
+import pytest
+
+from ingest import MAX_BODY, ChangeReceiver
+
+
+@pytest.fixture
+def receiver():
+    receiver = ChangeReceiver(lambda events: {"applied": len(events)}, port=0, token="s3cret").start()
+    yield receiver
+    receiver.stop()
+
+
+def post(receiver, headers, body=b""):
+    host, port = receiver.server.server_address[:2]
+    conn = http.client.HTTPConnection(host, port)
+    conn.putrequest("POST", "/events")
+    for name, value in headers.items():
+        conn.putheader(name, value)
+    conn.endheaders(body)
+    try:
+        return conn.getresponse().status
+    finally:
+        conn.close()
+
+
+def test_valid_token_is_accepted(receiver):
+    assert post(receiver, {"X-Ingest-Token": "s3cret", "Content-Length": "2"}, b"[]") == 200
+
+
+def test_non_ascii_token_is_unauthorized(receiver):
+    token = "s\xe9cret".encode("latin-1")
+    assert post(receiver, {"X-Ingest-Token": token, "Content-Length": "2"}, b"[]") == 401
+
+
+def test_missing_content_length_is_rejected(receiver):
+    assert post(receiver, {"X-Ingest-Token": "s3cret"}) == 411
+
+
+@pytest.mark.parametrize("length", ["abc", "-1"])
+def test_invalid_content_length_is_rejected(receiver, length):
+    assert post(receiver, {"X-Ingest-Token": "s3cret", "Content-Length": length}) == 400
+
+
+def test_oversized_body_is_rejected(receiver):
+    assert post(receiver, {"X-Ingest-Token": "s3cret", "Content-Length": str(MAX_BODY + 1)}) == 413
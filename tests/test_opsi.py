@@ -0,0 +1,52 @@
+import pandas as pd
+
+from opsi import plan_bulk_changes
+
+CURRENT = pd.DataFrame({
+    "Task ID": ["T1", "T2", "T3"],
+    "Task Title": ["File 10-K", "Renew license", "Audit"],
+    "Task Type": ["Filing", "License", "Audit"],
+    "Assigned To": ["Ana", "Ben", "Cy"],
+    "Deadline Date": pd.to_datetime(["2024-03-01", None, "2024-04-15"]),
+    "Status": ["New", "In Progress", "New"],
+    "Priority": ["High", "Low", "Medium"],
+    "Notes": ["", "", ""],
+})
+
+
+def test_blank_cells_keep_current_values():
+    changes = pd.DataFrame({"Task ID": ["T2"], "Status": ["Completed"], "Priority": [""]})
+    creates, updates, errors = plan_bulk_changes(CURRENT, changes)
+    assert creates == [] and errors == []
+    assert updates == [{
+        "taskId": "T2", "title": "Renew license", "taskType": "License", "assignedTo": "Ben",
+        "deadline": "", "status": "Completed", "priority": "Low", "notes": "",
+    }]
+
+
+def test_unchanged_rows_are_skipped():
+    changes = pd.DataFrame({"Task ID": ["T1", "T3"], "Status": ["New", ""], "Deadline Date": ["2024-03-01", ""]})
+    assert plan_bulk_changes(CURRENT, changes) == ([], [], [])
+
+
+def test_creates_and_errors_are_numbered_by_row():
+    changes = pd.DataFrame({
+        "Task ID": ["", "T9", ""],
+        "Task Title": ["New filing", "", "Half a task"],
+        "Task Type": ["Filing", "", ""],
+        "Assigned To": ["Ana", "", "Ben"],
+        "Priority": ["High", "", ""],
+    })
+    creates, updates, errors = plan_bulk_changes(CURRENT, changes)
+    assert [c["title"] for c in creates] == ["New filing"]
+    assert updates == []
+    assert errors == [
+        {"Row": 2, "Task": "T9", "Error": "Unknown Task ID"},
+        {"Row": 3, "Task": "Half a task", "Error": "Missing taskType, priority"},
+    ]
+
+
+def test_grid_changes_are_numbered_by_sheet_row():
+    changes = pd.DataFrame({"Task ID": [""], "Task Title": ["Orphan"]}, index=[41])
+    _, _, errors = plan_bulk_changes(CURRENT, changes)
+    assert errors[0]["Row"] == 42
@@ -0,0 +1,125 @@
+import json
+import threading
+import time
+
+import pytest
+import requests
+
+import outbox
+from outbox import MAX_ATTEMPTS, Outbox
+
+
+class Response:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class Session:
+    """Stands in for requests.Session: replays scripted responses or errors"""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.posts = []
+
+    def post(self, url, data, headers, timeout):
+        self.posts.append((headers["Idempotency-Key"], json.loads(data)))
+        result = self.results.pop(0) if self.results else Response(200)
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+
+@pytest.fixture
+def box(tmp_path, monkeypatch):
+    # Retries are due immediately, so deliver_due can be driven step by step
+    monkeypatch.setattr(outbox, "backoff_delay", lambda attempts: 0)
+    queue = Outbox(str(tmp_path / "outbox.sqlite3"), webhook_url="https://example.invalid/hook", batch_size=2)
+    yield queue
+    queue.db.close()
+
+
+def statuses(box):
+    return [r[0] for r in box.db.execute("SELECT status FROM outbox ORDER BY id")]
+
+
+def test_enqueue_splits_into_batches(box):
+    box.session = Session()
+    box.start = lambda: box  # No worker; deliveries are driven by the test
+    keys = box.enqueue(["L1", "L2", "L3"])
+    assert len(keys) == 2
+    box.deliver_due()
+    assert statuses(box) == ["sent", "sent"]
+    assert [payload["approved_leads"] for _, payload in box.session.posts] == [["L1", "L2"], ["L3"]]
+    assert [key for key, _ in box.session.posts] == keys
+
+
+def test_transient_errors_retry_then_park(box):
+    box.start = lambda: box
+    box.enqueue(["L1"])
+    box.session = Session(Response(503), requests.ConnectionError("reset"), *[Response(500)] * MAX_ATTEMPTS)
+    box.deliver_due()
+    assert statuses(box) == ["failed"]
+    attempts, error = box.db.execute("SELECT attempts, last_error FROM outbox").fetchone()
+    assert attempts == MAX_ATTEMPTS and error == "HTTP 500"
+
+    box.session = Session()
+    assert box.retry_failed() == 1
+    box.deliver_due()
+    assert statuses(box) == ["sent"]
+
+
+def test_client_errors_park_at_once(box):
+    box.start = lambda: box
+    box.enqueue(["L1"])
+    box.session = Session(Response(400))
+    box.deliver_due()
+    assert statuses(box) == ["failed"]
+    assert len(box.session.posts) == 1
+
+
+def test_unexpected_errors_requeue_instead_of_sticking(box):
+    box.start = lambda: box
+    box.enqueue(["L1"])
+    box.session = Session(ValueError("bad payload"))
+    # The first attempt fails with a non-requests error; the retry succeeds
+    box.deliver_due()
+    assert statuses(box) == ["sent"]
+    assert len(box.session.posts) == 2
+
+
+def test_enqueue_rolls_back_on_failure(box, monkeypatch):
+    box.start = lambda: box
+    box.enqueue(["L1"])
+    dumps = json.dumps
+    calls = []
+
+    def failing_dumps(value):
+        calls.append(value)
+        if len(calls) == 2:
+            raise TypeError("not serialisable")
+        return dumps(value)
+
+    monkeypatch.setattr(outbox.json, "dumps", failing_dumps)
+    with pytest.raises(TypeError):
+        box.enqueue(["L2", "L3", "L4"])  # Fails on the second batch, after the first was inserted
+    assert box.db.execute("SELECT COUNT(*) FROM outbox").fetchone()[0] == 1
+    assert not box.db.in_transaction
+
+
+def test_dead_worker_is_restarted(box):
+    box.session = Session()
+    dead = threading.Thread(target=lambda: None)
+    dead.start()
+    dead.join()
+    box.worker = dead
+    # A batch the dead worker had claimed, then a new approval
+    box.db.execute(
+        "INSERT INTO outbox (idempotency_key, payload, lead_count, status, created_at, next_attempt_at) "
+        "VALUES ('stuck', '{}', 1, 'sending', 0, 0)"
+    )
+    box.enqueue(["L1"])
+    assert box.worker is not dead and box.worker.is_alive()
+    deadline = time.time() + 5
+    while statuses(box) != ["sent", "sent"] and time.time() < deadline:
+        time.sleep(0.01)
+    assert statuses(box) == ["sent", "sent"]
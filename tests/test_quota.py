@@ -0,0 +1,153 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import quota
+from quota import BACKOFF_MAX, MAX_ATTEMPTS, QuotaExceeded, QuotaGuard, SingleFlight, TokenBucket
+
+
+class Clock:
+    """Fake monotonic clock; sleeping advances it"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return 1_000_000 + self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = Clock()
+    monkeypatch.setattr(quota.time, "monotonic", fake.monotonic)
+    monkeypatch.setattr(quota.time, "time", fake.time)
+    monkeypatch.setattr(quota.time, "sleep", fake.sleep)
+    return fake
+
+
+def test_bucket_allows_a_burst_then_refills(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+    assert all(bucket.acquire(timeout=0) for _ in range(3))
+    assert not bucket.acquire(timeout=0.1)
+    # Waiting within the timeout gets the next token after 1 / rate seconds
+    start = clock.now
+    assert bucket.acquire(timeout=1)
+    assert clock.now - start == pytest.approx(0.5)
+    clock.now += 100
+    assert sum(bucket.acquire(timeout=0) for _ in range(5)) == 3
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    runs = []
+
+    def slow():
+        runs.append(1)
+        started.set()
+        release.wait(5)
+        return "value"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("k", slow)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(flight.do("k", slow))) for _ in range(3)]
+    for t in followers:
+        t.start()
+    deadline = time.time() + 5
+    while flight.coalesced < 3 and time.time() < deadline:
+        time.sleep(0.001)
+    release.set()
+    for t in [leader] + followers:
+        t.join(5)
+    assert results == ["value"] * 4
+    assert len(runs) == 1
+    # Once done, the next call runs again
+    assert flight.do("k", lambda: "again") == "again"
+
+
+def test_single_flight_shares_errors_and_releases_the_key():
+    flight = SingleFlight()
+    with pytest.raises(ValueError):
+        flight.do("k", lambda: (_ for _ in ()).throw(ValueError("boom")))
+    assert flight.calls == {}
+    assert flight.do("k", lambda: 1) == 1
+
+
+def http_error(status, retry_after=None):
+    headers = {} if retry_after is None else {"Retry-After": str(retry_after)}
+    error = Exception(f"HTTP {status}")
+    error.response = SimpleNamespace(status_code=status, headers=headers)
+    return error
+
+
+class Client:
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = 0
+
+    def values_batch_get(self, spreadsheet_id, ranges, params=None):
+        self.calls += 1
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def test_guard_retries_server_errors_with_backoff(clock):
+    client = Client(http_error(503), http_error(429, retry_after=3), {"valueRanges": []})
+    guard = QuotaGuard(client, TokenBucket(rate=100, capacity=10))
+    assert guard.values_batch_get("sheet", ["A:ZZZ"]) == {"valueRanges": []}
+    assert client.calls == 3
+    assert guard.details()["retries"] == 2
+    assert clock.now >= 3  # Retry-After was honoured
+
+
+def test_guard_does_not_retry_client_errors(clock):
+    client = Client(http_error(404))
+    guard = QuotaGuard(client, TokenBucket(rate=100, capacity=10))
+    with pytest.raises(Exception, match="HTTP 404"):
+        guard.values_batch_get("sheet", ["A:ZZZ"])
+    assert client.calls == 1
+
+
+def test_persistent_429_starts_a_cooldown(clock):
+    client = Client(*[http_error(429, retry_after=2)] * MAX_ATTEMPTS)
+    guard = QuotaGuard(client, TokenBucket(rate=100, capacity=10))
+    with pytest.raises(QuotaExceeded):
+        guard.values_batch_get("sheet", ["A:ZZZ"])
+    assert client.calls == MAX_ATTEMPTS
+    # During the cool-down calls fail without reaching the client
+    with pytest.raises(QuotaExceeded):
+        guard.values_batch_get("sheet", ["A:ZZZ"])
+    assert client.calls == MAX_ATTEMPTS
+    assert guard.details()["cooldown_s"] > 0
+
+
+def test_long_retry_after_cools_down_instead_of_sleeping(clock):
+    client = Client(http_error(429, retry_after=30), {"valueRanges": []})
+    guard = QuotaGuard(client, TokenBucket(rate=100, capacity=10))
+    with pytest.raises(QuotaExceeded):
+        guard.values_batch_get("sheet", ["A:ZZZ"])
+    assert client.calls == 1
+    assert clock.now <= BACKOFF_MAX
+    assert guard.details()["cooldown_s"] > BACKOFF_MAX
+
+
+def test_empty_bucket_fails_fast(clock):
+    client = Client({"valueRanges": []})
+    guard = QuotaGuard(client, TokenBucket(rate=0.001, capacity=1))
+    guard.bucket.acquire(timeout=0)
+    with pytest.raises(QuotaExceeded):
+        guard.values_batch_get("sheet", ["A:ZZZ"])
+    assert client.calls == 0
+    assert guard.details()["throttled"] == 1
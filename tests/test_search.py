@@ -0,0 +1,64 @@
+import pandas as pd
+import pytest
+
+from search import SearchIndex, edit_distance, tokenize
+
+LEADS = pd.DataFrame({
+    "Name": ["Maria Garcia", "Mariana Lopez", "Rosemaria Chen", "Mark Johnson", "Maria Okafor", None],
+    "Organization": ["City of Salem", "Grace Church", "County of Salem", "City of Bristol", "Grace Church", ""],
+})
+
+
+@pytest.fixture(scope="module")
+def index():
+    return SearchIndex(LEADS, ["Name", "Organization", "Missing"])
+
+
+def test_tokenize_lowercases_and_splits_on_punctuation():
+    assert tokenize("O'Brien-Smith, J_R 2nd") == ["o", "brien", "smith", "j", "r", "2nd"]
+
+
+def test_edit_distance_counts_transpositions_and_stops_at_the_limit():
+    assert edit_distance("jonhson", "johnson", 2) == 1
+    assert edit_distance("kitten", "sitting", 3) == 3
+    assert edit_distance("kitten", "sitting", 1) == 2
+
+
+def test_missing_columns_are_ignored(index):
+    assert index.columns == ["Name", "Organization"]
+
+
+def test_exact_beats_prefix_beats_substring(index):
+    # Rows 0 and 4 are exact, 1 is a prefix ("mariana"), 2 a substring ("rosemaria")
+    assert index.search("maria").tolist() == [0, 4, 1, 2]
+
+
+def test_every_term_must_match(index):
+    assert index.search("maria salem").tolist() == [0, 2]
+    assert index.search("maria bristol").tolist() == []
+
+
+def test_scores_add_up_across_terms(index):
+    # Equal scores keep sheet order; an exact "maria" then outranks the prefix match in "mariana"
+    assert index.search("grace church").tolist() == [1, 4]
+    assert index.search("maria grace").tolist() == [4, 1]
+
+
+def test_short_prefixes_use_precomputed_postings(index):
+    assert index.search("ci").tolist() == [0, 3]
+    assert index.search("c").tolist() == [0, 1, 2, 3, 4]
+
+
+def test_typos_match_only_without_a_literal_match(index):
+    assert index.search("jonhson").tolist() == [3]
+    assert index.search("okafro").tolist() == [4]
+    assert index.search("zzzzzz").tolist() == []
+
+
+def test_empty_query_returns_every_row_and_limit_truncates(index):
+    assert index.search("  ").tolist() == list(range(len(LEADS)))
+    assert index.search("maria", limit=2).tolist() == [0, 4]
+
+
+def test_repeated_terms_count_once(index):
+    assert index.search("maria maria").tolist() == index.search("maria").tolist()
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+from session import FormCache, LeadIdIndex, LeadSelection, state_bytes, value_bytes
+
+
+def test_lead_positions_are_stable_and_append_only():
+    index = LeadIdIndex()
+    assert index.positions(["L1", "L2", "L1"]).tolist() == [0, 1, 0]
+    assert index.positions(["L3", "L2"]).tolist() == [2, 1]
+    assert index.lead_ids([2, 0]) == ["L3", "L1"]
+    assert len(index) == 3
+
+
+def test_set_and_contains_across_words():
+    selection = LeadSelection(LeadIdIndex())
+    positions = np.array([0, 63, 64, 130])
+    selection.set(positions)
+    assert selection.contains([0, 1, 63, 64, 130, 131, 5000]).tolist() == [True, False, True, True, True, False, False]
+    assert selection.nbytes == 3 * 8
+
+    # Per-position flags deselect some and select others in one call
+    selection.set([0, 63, 200], [False, True, True])
+    assert selection.contains([0, 63, 200]).tolist() == [False, True, True]
+
+
+def test_invert_flips_each_position_once():
+    selection = LeadSelection(LeadIdIndex())
+    selection.set([1, 2])
+    selection.invert([2, 3, 3, 70])
+    assert selection.contains([1, 2, 3, 70]).tolist() == [True, False, True, True]
+
+
+def test_clear_keeps_the_words():
+    selection = LeadSelection(LeadIdIndex())
+    selection.set(np.arange(100))
+    selection.clear()
+    assert not selection.contains(np.arange(100)).any()
+    assert selection.nbytes == 16
+
+
+def test_empty_operations():
+    selection = LeadSelection(LeadIdIndex())
+    selection.set(np.array([], dtype=np.int64))
+    selection.invert([])
+    assert selection.contains([]).tolist() == []
+    assert selection.nbytes == 0
+
+
+def test_form_cache_evicts_least_recently_used():
+    forms = FormCache(capacity=2)
+    seeded = []
+    load = lambda key: (lambda: seeded.append(key) or {"title": key})
+    forms.get("T1", load("T1"))["title"] = "edited"
+    forms.get("T2", load("T2"))
+    assert forms.get("T1", load("T1"))["title"] == "edited"  # Hit: not re-seeded, now most recent
+    forms.get("T3", load("T3"))
+    assert list(forms.entries) == ["T1", "T3"]
+    assert forms.get("T2", load("T2")) == {"title": "T2"}
+    assert seeded == ["T1", "T2", "T3", "T2"]
+    forms.discard("T2")
+    forms.discard("missing")
+    assert len(forms) == 1
+
+
+def test_state_bytes_sorts_largest_first():
+    selection = LeadSelection(LeadIdIndex())
+    selection.set([10_000])
+    state = {"flag": True, "frame": pd.DataFrame({"a": range(1000)}), "selection": selection}
+    sizes = state_bytes(state)
+    assert list(sizes) == ["frame", "selection", "flag"]
+    assert sizes["selection"] >= selection.nbytes
+    assert value_bytes(np.zeros(10)) == 80
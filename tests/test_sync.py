@@ -0,0 +1,171 @@
+from gspread.utils import a1_range_to_grid_range
+
+from sync import FIRST_SHEET_RANGE, SheetSync, row_keys
+
+
+class Source:
+    """A SheetSource over in-memory values, trimming blanks like the Sheets API"""
+
+    def __init__(self, values):
+        self.values = [list(r) for r in values]
+        self.modified = 0
+        self.reads = []
+
+    def set(self, values):
+        self.values = [list(r) for r in values]
+        self.modified += 1
+
+    def get_lastUpdateTime(self):
+        return str(self.modified)
+
+    def get_values(self, ranges=(FIRST_SHEET_RANGE,)):
+        self.reads.append(list(ranges))
+        result = []
+        for a1 in ranges:
+            grid = a1_range_to_grid_range(a1)
+            rows = [list(r) for r in self.values[grid.get("startRowIndex", 0):grid.get("endRowIndex")]]
+            for row in rows:
+                while row and row[-1] == "":
+                    row.pop()
+            while rows and not rows[-1]:
+                rows.pop()
+            result.append(rows)
+        return result
+
+
+HEADER = ["Task ID", "Task Title", "Status"]
+ROWS = [["T1", "File", "New"], ["T2", "Renew", "New"], ["T1", "Copy", "Done"], ["", "Loose", "New"]]
+
+
+def synced(values):
+    source = Source(values)
+    sync = SheetSync("OPSI", ("Task ID",))
+    sync.refresh(source)
+    return sync, source
+
+
+def full_read(values):
+    """What a fresh sync makes of the same values"""
+    return synced(values)[0]
+
+
+def assert_same(sync, values):
+    fresh = full_read(values)
+    assert sync.keys == fresh.keys
+    assert sync.hashes == fresh.hashes
+    assert sync.frame.equals(fresh.frame)
+
+
+def test_duplicate_and_blank_keys_get_unique_keys():
+    assert row_keys(HEADER, ROWS, ("Task ID",)) == ["T1", "T2", "T1#2", "#row5"]
+    # Without any key column every row is keyed by position
+    assert row_keys(["A"], [["x"], ["y"]], ("Task ID",)) == ["#row2", "#row3"]
+
+
+def test_edit_of_a_repeated_key_updates_that_row_only():
+    sync, source = synced([HEADER] + ROWS)
+    version = sync.version
+    source.set([HEADER, ROWS[0], ROWS[1], ["T1", "Copy", "Reopened"], ROWS[3]])
+    assert sync.refresh(source)
+    assert sync.last_delta == {"added": 0, "updated": 1, "removed": 0}
+    assert sync.frame.loc["T1#2", "Status"] == "Reopened"
+    assert sync.frame.loc["T1", "Status"] == "New"
+    assert sync.version == version + 1
+
+
+def test_unchanged_file_is_not_read():
+    sync, source = synced([HEADER] + ROWS)
+    assert not sync.refresh(source)
+    assert len(source.reads) == 1
+
+
+def test_header_change_rebuilds_the_frame():
+    sync, source = synced([HEADER] + ROWS)
+    header = ["Task ID", "Task Title", "Status", "Owner"]
+    source.set([header] + [row + ["Ops"] for row in ROWS])
+    assert sync.refresh(source)
+    assert list(sync.frame.columns) == header
+    assert (sync.frame["Owner"] == "Ops").all()
+    assert sync.last_delta["added"] == len(ROWS)
+
+
+def test_cleared_trailing_cells_become_blank():
+    sync, source = synced([HEADER] + ROWS)
+    # The API drops trailing blanks, so this row arrives one cell short
+    source.set([HEADER, ["T1", "File", ""], *ROWS[1:]])
+    assert sync.refresh(source)
+    assert sync.frame.loc["T1", "Status"] == ""
+    assert sync.last_delta == {"added": 0, "updated": 1, "removed": 0}
+
+
+def test_removed_rows_are_dropped():
+    sync, source = synced([HEADER] + ROWS)
+    source.set([HEADER, ROWS[0], ROWS[2]])
+    assert sync.refresh(source)
+    assert sync.last_delta == {"added": 0, "updated": 0, "removed": 2}
+    assert sync.keys == ["T1", "T1#2"]
+
+
+def test_appended_rows_read_only_the_tail():
+    sync, source = synced([HEADER] + ROWS)
+    values = [HEADER] + ROWS + [["T3", "Audit", "New"], ["T1", "Third", "New"], ["", "Blank key"]]
+    source.set(values)
+    assert sync.refresh(source)
+    assert source.reads[-1] == ["A1:ZZZ1", "A5:ZZZ5", "A6:ZZZ"]
+    assert FIRST_SHEET_RANGE not in sum(source.reads[1:], [])
+    assert sync.last_delta == {"added": 3, "updated": 0, "removed": 0}
+    assert sync.keys[-3:] == ["T3", "T1#3", "#row8"]
+    assert_same(sync, values)
+
+    # A second append continues from the new last row
+    values = values + [["T4", "Filing", "New"]]
+    source.set(values)
+    assert sync.refresh(source)
+    assert source.reads[-1][1] == "A8:ZZZ8"
+    assert_same(sync, values)
+
+
+def test_append_to_an_empty_sheet():
+    sync, source = synced([HEADER])
+    values = [HEADER] + ROWS
+    source.set(values)
+    assert sync.refresh(source)
+    assert source.reads[-1][1] == "A1:ZZZ1"
+    assert_same(sync, values)
+
+
+def test_edits_and_deletes_fall_back_to_the_full_diff():
+    sync, source = synced([HEADER] + ROWS)
+    # Last row deleted and two rows appended: the last known row no longer matches
+    values = [HEADER] + ROWS[:3] + [["T5", "New", "New"], ["T6", "Newer", "New"]]
+    source.set(values)
+    assert sync.refresh(source)
+    assert source.reads[-1] == [FIRST_SHEET_RANGE]
+    assert sync.last_delta == {"added": 2, "updated": 0, "removed": 1}
+    assert_same(sync, values)
+
+    # An edit with nothing appended reads the whole sheet
+    values = [HEADER, ["T1", "File", "Done"]] + values[2:]
+    source.set(values)
+    assert sync.refresh(source)
+    assert source.reads[-1] == [FIRST_SHEET_RANGE]
+    assert sync.last_delta == {"added": 0, "updated": 1, "removed": 0}
+
+
+def test_optimistic_writes_force_a_full_read():
+    sync, source = synced([HEADER] + ROWS)
+    sync.upsert_row("T9", {"Task ID": "T9", "Task Title": "Pending", "Status": "New"})
+    values = [HEADER] + ROWS + [["T9", "Pending", "New"]]
+    source.set(values)
+    # The full diff finds the sheet already matches the optimistic row
+    assert not sync.refresh(source)
+    assert source.reads[-1] == [FIRST_SHEET_RANGE]
+    assert_same(sync, values)
+
+
+def test_snapshot_is_typed_and_versioned():
+    sync, _ = synced([HEADER, ["T1", "7", "New"]])
+    frame = sync.snapshot()
+    assert frame["Task Title"].tolist() == [7]
+    assert frame.attrs["sheet_version"] == ("OPSI", sync.version)
+    assert sync.snapshot() is frame
@@ -0,0 +1,35 @@
+import json
+import urllib.request
+
+import pandas as pd
+
+import utils
+from ingest import ChangeReceiver
+from utils import PUSH_RECONCILE_SECONDS, SHEET_TTL, get_sheet_ttl, parse_sheet
+
+
+def test_timestamps_with_mixed_utc_offsets_parse_as_utc():
+    raw = pd.DataFrame([
+        ["L1", "2024-03-09T10:00:00-05:00"],
+        ["L2", "2024-03-11T10:00:00-04:00"],
+        ["L3", "not a date"],
+    ])
+    frame = parse_sheet("CORA", raw, ["Lead ID", "Timestamp"])
+    stamps = frame["Timestamp"]
+    assert stamps.dt.tz is None
+    assert stamps.iloc[0] == pd.Timestamp("2024-03-09 15:00:00")
+    assert stamps.iloc[1] == pd.Timestamp("2024-03-11 14:00:00")
+    assert pd.isna(stamps.iloc[2])
+
+
+def test_push_only_relaxes_the_ttl_of_the_pushed_sheet(monkeypatch):
+    receiver = ChangeReceiver(lambda events: {"applied": len(events)}, port=0).start()
+    try:
+        monkeypatch.setattr(utils, "get_change_receiver", lambda: receiver)
+        assert get_sheet_ttl("OPSI") == SHEET_TTL["OPSI"]
+        body = json.dumps({"sheet": "OPSI", "op": "delete", "key": "T1"}).encode()
+        urllib.request.urlopen(urllib.request.Request(receiver.address + "/events", data=body)).close()
+        assert get_sheet_ttl("OPSI") == max(SHEET_TTL["OPSI"], PUSH_RECONCILE_SECONDS)
+        assert get_sheet_ttl("CORA") == SHEET_TTL["CORA"]
+    finally:
+        receiver.stop()
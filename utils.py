@@ -1,9 +1,24 @@
 import streamlit as st
 import pandas as pd
-import gspread
-from google.oauth2.service_account import Credentials
-import requests
-from datetime import datetime
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from deadlines import DeadlineIndex
+from dedup import LeadDuplicates
+from metrics import compute_cora_metrics, compute_opsi_metrics
+from ingest import ChangeReceiver, DEFAULT_HOST as INGEST_HOST, DEFAULT_PORT as INGEST_PORT
+from health import HealthMonitor, n8n_healthz_probe, n8n_webhook_probe
+from outbox import MARK_WEBHOOK_URL, Outbox
+from perf import PERF, timed
+from quota import BURST, READS_PER_MINUTE, QuotaExceeded, QuotaGuard, TokenBucket
+from scheduler import RefreshScheduler
+from search import SearchIndex
+from session import LeadIdIndex
+from store import ColumnStore
+from sync import SheetSource, SheetSync, numericise_frame
 
 # ========================================
 # GOOGLE SHEETS CONNECTION
@@ -12,6 +27,10 @@ from datetime import datetime
 @st.cache_resource
 def connect_to_sheets():
     """Connect to Google Sheets using service account credentials"""
+    # gspread and google-auth take a few hundred ms to import, so they are
+    # loaded on first connect rather than before the first page can render
+    import gspread
+    from google.oauth2.service_account import Credentials
     try:
         credentials_dict = dict(st.secrets["google_credentials"])
         scope = [
@@ -25,39 +44,713 @@ def connect_to_sheets():
         st.error(f"❌ Google Sheets connection error: {e}")
         return None
 
+@st.cache_resource
+def get_quota_guard(credential, _http_client):
+    """Request budget, read coalescing and 429 backoff shared by every Sheets call made with one credential"""
+    return QuotaGuard(_http_client, TokenBucket(READS_PER_MINUTE / 60, BURST))
+
+def get_sheets_api():
+    """The Sheets HTTP client, behind its credential's quota guard"""
+    client = connect_to_sheets()
+    if client is None:
+        raise RuntimeError("Google Sheets client unavailable")
+    credentials = client.http_client.session.credentials
+    return get_quota_guard(getattr(credentials, "service_account_email", ""), client.http_client)
+
+def get_sheets_quota_status():
+    """Quota guard counters and cool-down, or None without a Sheets connection"""
+    try:
+        return get_sheets_api().details()
+    except Exception:
+        return None
+
 # ========================================
-# CORA DATA FUNCTIONS
+# SHEET SCHEMAS
 # ========================================
 
-@st.cache_data(ttl=300)  # Cache for 5 minutes
-def load_cora_data():
-    """Load CORA leads from Google Sheets"""
+# Canonical column -> (other header spellings accepted for it, dtype). Headers
+# match ignoring case, spaces and punctuation; unlisted columns keep
+# gspread's numericise typing.
+SHEET_SCHEMAS = {
+    "CORA": {
+        "Lead ID": (["LeadID"], "text"),
+        "Name": (["Full Name"], "text"),
+        "Email": (["E-mail", "Email Address"], "text"),
+        "Organization": (["Organisation", "Org"], "text"),
+        "Status": ([], "category"),
+        "Timestamp": (["Created At", "Date"], "datetime"),
+    },
+    "OPSI": {
+        "Task ID": (["OPSI ID"], "text"),
+        "Task Title": (["Title"], "text"),
+        "Task Type": ([], "category"),
+        "Assigned To": (["Assignee"], "category"),
+        "Deadline Date": (["Deadline", "Due Date"], "datetime"),
+        "Status": ([], "category"),
+        "Priority": ([], "category"),
+        "Notes": ([], "text"),
+    },
+}
+
+def header_key(header):
+    """Comparable form of a sheet header: lower-case letters and digits only"""
+    return re.sub(r"[^a-z0-9]", "", str(header).lower())
+
+def resolve_columns(name, header):
+    """Canonical column name for each raw header of a sheet.
+
+    Unknown headers are only stripped; a second header resolving to a name
+    already taken keeps its raw spelling.
+    """
+    aliases = {}
+    for column, (spellings, _) in SHEET_SCHEMAS.get(name, {}).items():
+        for spelling in [column] + spellings:
+            aliases[header_key(spelling)] = column
+    names = []
+    for raw in header:
+        column = aliases.get(header_key(raw), str(raw).strip())
+        names.append(column if column not in names else str(raw))
+    return names
+
+def parse_dates(values):
+    """Parse date/time strings, trying one inferred format before per-value parsing"""
+    text = values.astype(str).str.strip()
+    text = text.where(text != "")
     try:
-        client = connect_to_sheets()
-        if client:
-            # Get CORA sheet ID from secrets or use default
-            sheet_id = st.secrets.get("CORA_SHEET_ID", st.secrets.get("GOOGLE_SHEET_ID"))
-            sheet = client.open_by_key(sheet_id).sheet1
-            data = sheet.get_all_records()
-            return pd.DataFrame(data)
-        return pd.DataFrame()
+        parsed = pd.to_datetime(text, errors="coerce")
+        missed = parsed.isna() & text.notna()
+        if missed.any():
+            parsed[missed] = pd.to_datetime(text[missed], errors="coerce", format="mixed")
+        return parsed
+    except (ValueError, TypeError):
+        # Mixed UTC offsets (e.g. either side of a DST change): normalise to naive UTC
+        return pd.to_datetime(text, errors="coerce", format="mixed", utc=True).dt.tz_localize(None)
+
+def parse_sheet(name, raw, header):
+    """Typed, normalised frame from a sheet's raw cells (runs once per data version)"""
+    columns = resolve_columns(name, header)
+    schema = SHEET_SCHEMAS.get(name, {})
+    untyped = [pos for pos, column in enumerate(columns) if column not in schema]
+    if untyped:
+        numericised = numericise_frame(raw.iloc[:, untyped], [columns[pos] for pos in untyped])
+
+    data = {}
+    for pos, column in enumerate(columns):
+        if column not in schema:
+            data[pos] = numericised.iloc[:, untyped.index(pos)].tolist()
+            continue
+        values = raw.iloc[:, pos].reset_index(drop=True)
+        kind = schema[column][1]
+        if kind == "datetime":
+            data[pos] = parse_dates(values)
+        elif kind == "number":
+            data[pos] = pd.to_numeric(values, errors="coerce")
+        elif kind == "category":
+            data[pos] = values.astype(str).str.strip().astype("category")
+        else:
+            data[pos] = values.astype(str).str.strip()
+    frame = pd.DataFrame(data, index=range(len(raw)))
+    frame.columns = columns
+    return frame
+
+def sheet_text(series):
+    """Column values as sheet cell text: blank when missing, dates without a midnight time"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        present = series.dropna()
+        has_time = bool((present != present.dt.normalize()).any())
+        return series.dt.strftime("%Y-%m-%d %H:%M:%S" if has_time else "%Y-%m-%d").fillna("").astype(object)
+    cells = series.astype(object)
+    return cells.where(cells.notna(), "").astype(str).str.strip()
+
+# ========================================
+# SHEET SYNC
+# ========================================
+
+# Row key column(s) used to diff each sheet, first match wins
+SHEET_KEY_COLUMNS = {
+    "CORA": ("Lead ID",),
+    "OPSI": ("Task ID", "OPSI ID"),
+}
+
+# Seconds a snapshot is served as-is before it is revalidated in the background
+SHEET_TTL = {
+    "CORA": 300,
+    "OPSI": 60,
+}
+
+_refresh_lock = threading.Lock()
+
+def get_sheet_id(name):
+    """Resolve the spreadsheet ID for a sheet from secrets"""
+    if name == "CORA":
+        return st.secrets.get("CORA_SHEET_ID", st.secrets.get("GOOGLE_SHEET_ID"))
+    return st.secrets.get("OPSI_SHEET_ID", "1kt4z_zcfiX_Xx3jhahihWMB5LMrh0-GpmQDBxKjSl4A")
+
+def get_snapshot_path(name):
+    """On-disk snapshot file for a sheet"""
+    snapshot_dir = st.secrets.get("SNAPSHOT_DIR", os.path.join(".cache", "snapshots"))
+    return os.path.join(snapshot_dir, f"{name.lower()}.arrow")
+
+@st.cache_resource
+def get_sheet_sync(name):
+    """Shared delta-sync state for one sheet, warm-started from its on-disk snapshot"""
+    sync = SheetSync(name, SHEET_KEY_COLUMNS[name], parse=lambda raw, header: parse_sheet(name, raw, header))
+    try:
+        sync.load(get_snapshot_path(name))
+    except Exception:
+        pass  # An unreadable snapshot only means a cold start
+    return sync
+
+def refresh_sheet(name, force=False):
+    """Fetch a sheet's changes now and persist the snapshot, returning True on success"""
+    sync = get_sheet_sync(name)
+    start = time.perf_counter()
+    try:
+        changed = sync.refresh(SheetSource(get_sheets_api(), get_sheet_id(name)), force=force)
+        sync.fetched_at = time.time()
+        sync.stale = False
+        sync.last_error = None
+        sync.rate_limited = False
+        sync.invalidated = False
     except Exception as e:
-        st.error(f"❌ Error loading CORA data: {e}")
-        return pd.DataFrame()
+        sync.stale = True
+        sync.last_error = str(e)
+        sync.rate_limited = isinstance(e, QuotaExceeded)
+        return False
+    finally:
+        sync.checked_at = time.time()
+        sync.refresh_ms = (time.perf_counter() - start) * 1000
+        PERF.observe(f"sheets.refresh.{name}", sync.refresh_ms / 1000, not sync.stale)
+
+    if changed:
+        try:
+            sync.save(get_snapshot_path(name))
+        except Exception:
+            pass  # Persisting is best-effort; the in-memory snapshot is current
+    return True
+
+def refresh_sheet_async(name, force=False, delay=0):
+    """Revalidate a sheet on a background thread.
+
+    Plain revalidations are single-flight per sheet; forced reconciliations
+    after a write always run, `delay` seconds later so the webhook's own
+    sheet write has landed first.
+    """
+    sync = get_sheet_sync(name)
+    if not force:
+        with _refresh_lock:
+            if sync.refreshing:
+                return
+            sync.refreshing = True
+
+    def run():
+        try:
+            time.sleep(delay)
+            refresh_sheet(name, force=force)
+        finally:
+            if not force:
+                sync.refreshing = False
+
+    threading.Thread(target=run, name=f"refresh-{name.lower()}", daemon=True).start()
+
+def get_sheet_ttl(name):
+    """Seconds a sheet's snapshot may be served before it is re-read.
+
+    While the change receiver is getting pushed events for this sheet,
+    re-reads are only a slow reconciliation; otherwise the sheet's normal
+    polling TTL applies.
+    """
+    receiver = get_change_receiver()
+    pushed_at = receiver.last_event_at.get(name) if receiver else None
+    if pushed_at and time.time() - pushed_at < PUSH_RECONCILE_SECONDS:
+        return max(SHEET_TTL[name], PUSH_RECONCILE_SECONDS)
+    return SHEET_TTL[name]
+
+def refresh_sheet_if_idle(name):
+    """Refresh a sheet now unless a revalidation of it is already in flight"""
+    sync = get_sheet_sync(name)
+    with _refresh_lock:
+        if sync.refreshing:
+            return
+        sync.refreshing = True
+    try:
+        if not refresh_sheet(name):
+            raise RuntimeError(sync.last_error)
+    finally:
+        sync.refreshing = False
+
+def load_sheet(name):
+    """Serve a sheet's snapshot immediately, revalidating it once its TTL has passed.
+
+    The refresh scheduler normally keeps snapshots younger than their TTL, so
+    the inline and TTL-expiry paths here are only fallbacks.
+    """
+    get_refresh_scheduler()
+    get_change_receiver()
+    sync = get_sheet_sync(name)
+    PERF.cache_lookup(f"sheet.{name}")
+    if sync.frame is None or sync.invalidated:
+        # Nothing to serve yet, or a write just landed: fetch inline
+        PERF.cache_miss(f"sheet.{name}")
+        refresh_sheet(name, force=sync.invalidated)
+    elif time.time() - sync.checked_at > get_sheet_ttl(name):
+        refresh_sheet_async(name)
+    return sync.snapshot()
+
+def prefetch_sheets(*names):
+    """Fetch every sheet among `names` that has nothing to serve yet, concurrently.
+
+    A page needing several cold sheets then waits for the slowest fetch
+    rather than for their sum; already-loaded sheets are left alone.
+    """
+    cold = [n for n in names if get_sheet_sync(n).frame is None or get_sheet_sync(n).invalidated]
+    if len(cold) < 2:
+        return
+    for name in cold:
+        PERF.cache_miss(f"sheet.{name}")
+    with ThreadPoolExecutor(max_workers=len(cold), thread_name_prefix="prefetch") as pool:
+        list(pool.map(lambda n: refresh_sheet(n, force=get_sheet_sync(n).invalidated), cold))
+
+def invalidate_sheets(*names):
+    """Make the next load of the given sheets re-fetch before serving"""
+    for name in names:
+        get_sheet_sync(name).invalidated = True
 
-def send_approved_leads_to_mark(lead_ids):
-    """Send approved Lead IDs to MARK webhook"""
-    webhook_url = "https://hackett2k.app.n8n.cloud/webhook/mark-approve-leads"
-    
-    payload = {
-        "approved_leads": lead_ids,
-        "approved_by": "Dashboard User",
-        "timestamp": datetime.now().isoformat()
+def report_sheet_state(name, df):
+    """Surface load errors, or a stale-snapshot notice when Sheets is unreachable"""
+    sync = get_sheet_sync(name)
+    if not sync.last_error:
+        return
+    if df.empty:
+        st.error(f"❌ Error loading {name} data: {sync.last_error}")
+    elif sync.stale:
+        saved = datetime.fromtimestamp(sync.fetched_at).strftime("%Y-%m-%d %H:%M") if sync.fetched_at else "an earlier session"
+        if sync.rate_limited:
+            st.info(f"⏳ Google Sheets rate limit reached — showing the {name} snapshot from {saved} until it clears")
+        else:
+            st.warning(f"⚠️ Google Sheets is unreachable — showing the {name} snapshot from {saved}")
+
+# ========================================
+# REFRESH SCHEDULER
+# ========================================
+
+# Sheets are refreshed at this share of their TTL, so a snapshot never outlives it
+REFRESH_AHEAD = 0.8
+
+# Seconds between service-account token checks, and how close to expiry a token is renewed
+CREDENTIALS_CHECK_SECONDS = 60
+TOKEN_REFRESH_MARGIN = 600
+
+def refresh_sheets_credentials():
+    """Renew the Sheets access token ahead of expiry so no fetch pays for it"""
+    client = connect_to_sheets()
+    if client is None:
+        raise RuntimeError("Google Sheets client unavailable")
+    credentials = client.http_client.session.credentials
+    now = datetime.now(timezone.utc).replace(tzinfo=None)  # google-auth expiry is naive UTC
+    if not credentials.valid or credentials.expiry is None or credentials.expiry - now < timedelta(seconds=TOKEN_REFRESH_MARGIN):
+        from google.auth.transport.requests import Request as GoogleAuthRequest
+        credentials.refresh(GoogleAuthRequest())
+
+def scheduled_refresh(name):
+    """Scheduler job: refresh a sheet unless its snapshot is still well within its current TTL"""
+    if time.time() - get_sheet_sync(name).checked_at < get_sheet_ttl(name) * REFRESH_AHEAD:
+        return
+    refresh_sheet_if_idle(name)
+
+@st.cache_resource
+def get_refresh_scheduler():
+    """Shared scheduler keeping the credentials warm and every sheet refreshed ahead of its TTL"""
+    jobs = {"credentials": (CREDENTIALS_CHECK_SECONDS, refresh_sheets_credentials)}
+    for name, ttl in SHEET_TTL.items():
+        jobs[name] = (ttl * REFRESH_AHEAD, lambda name=name: scheduled_refresh(name))
+    # Sheets are fetched inline on first load, so only the token check runs right away
+    return RefreshScheduler(jobs, run_now=("credentials",)).start()
+
+def get_refresh_status(name):
+    """When a sheet was last refreshed, how long it took, and when the scheduler runs it next"""
+    sync = get_sheet_sync(name)
+    job = get_refresh_scheduler().details()[name]
+    return {
+        "refreshed_at": sync.checked_at or None,
+        "duration_ms": sync.refresh_ms,
+        "next_run_at": job["next_run_at"],
+        "last_error": sync.last_error,
     }
-    
+
+# ========================================
+# CHANGE INGESTION
+# ========================================
+
+# Re-read interval while row changes are being pushed (reconciliation only)
+PUSH_RECONCILE_SECONDS = 900
+
+# How often open sessions check whether the cached data has changed
+CHANGE_POLL_SECONDS = 5
+
+def _event_cells(name, sync, values):
+    """Map event columns (canonical names or any accepted spelling) to the sheet's raw headers"""
+    headers = dict(zip(resolve_columns(name, sync.header), sync.header))
+    cells = {}
+    for column, value in values.items():
+        raw = headers.get(resolve_columns(name, [column])[0])
+        if raw is not None:
+            cells[raw] = "" if value is None else value
+    return cells
+
+def apply_change_events(events):
+    """Apply pushed row events to the cached sheets, then persist the touched snapshots"""
+    applied, skipped = 0, []
+    touched = set()
+    for event in events:
+        name, key = event["sheet"], event["key"]
+        if name not in SHEET_KEY_COLUMNS:
+            skipped.append({"key": key, "reason": f"unknown sheet {name}"})
+            continue
+        sync = get_sheet_sync(name)
+        if sync.frame is None:
+            skipped.append({"key": key, "reason": "sheet not loaded yet"})
+            continue
+
+        if event["op"] == "delete":
+            ok = sync.delete_row(key)
+        else:
+            cells = _event_cells(name, sync, event["values"])
+            key_header = next((c for c in SHEET_KEY_COLUMNS[name] if c in sync.header), None)
+            key = key or str(cells.get(key_header, "")).strip()
+            if not key:
+                skipped.append({"key": key, "reason": "no row key"})
+                continue
+            if key_header:
+                cells[key_header] = key
+            ok = sync.upsert_row(key, cells) is not None
+        if ok:
+            applied += 1
+            touched.add(name)
+        else:
+            skipped.append({"key": key, "reason": "row not found"})
+
+    for name in touched:
+        try:
+            get_sheet_sync(name).save(get_snapshot_path(name))
+        except Exception:
+            pass  # Persisting is best-effort; the in-memory snapshot is current
+    return {"applied": applied, "skipped": skipped}
+
+@st.cache_resource
+def get_change_receiver():
+    """Shared change-ingestion receiver, or None when disabled or the port is unavailable.
+
+    Binding beyond localhost requires INGEST_TOKEN, so the endpoint is never
+    open to the network unauthenticated.
+    """
+    if not st.secrets.get("INGEST_ENABLED", True):
+        return None
+    host = st.secrets.get("INGEST_HOST", INGEST_HOST)
+    token = st.secrets.get("INGEST_TOKEN")
+    if host not in ("127.0.0.1", "localhost", "::1") and not token:
+        return None
     try:
-        response = requests.post(webhook_url, json=payload, timeout=10)
-        return response.status_code == 200, response
+        port = int(st.secrets.get("INGEST_PORT", INGEST_PORT))
+        return ChangeReceiver(apply_change_events, host, port, token, metrics=PERF.prometheus).start()
+    except OSError:
+        return None  # Port taken (e.g. a second app instance): polling still works
+
+def get_data_version(names=None):
+    """Combined version of the given cached sheets (default: all); changes whenever any of them does"""
+    return tuple(get_sheet_sync(name).version for name in (SHEET_KEY_COLUMNS if names is None else names))
+
+# ========================================
+# SEARCH
+# ========================================
+
+@st.cache_resource(max_entries=4)
+def _build_search_index(name, version, columns, _df):
+    """Build and keep a search index for one version of a sheet"""
+    PERF.cache_miss("search")
+    return SearchIndex(_df, list(columns))
+
+def get_search_index(df, columns):
+    """Search index over a loaded sheet frame, built once per data version.
+
+    Pass the frame returned by a load function, not a filtered copy of it.
+    """
+    name, version = df.attrs.get("sheet_version", (None, None))
+    if name is None:
+        return SearchIndex(df, columns)
+    PERF.cache_lookup("search")
+    return _build_search_index(name, version, tuple(columns), df)
+
+# ========================================
+# LEAD SELECTION
+# ========================================
+
+@st.cache_resource
+def get_lead_id_index():
+    """Process-wide Lead ID -> bit position registry behind every session's lead selection"""
+    return LeadIdIndex()
+
+@st.cache_resource(max_entries=4)
+def _build_lead_positions(name, version, _df):
+    """Keep the selection bit position of every row of one version of a sheet"""
+    PERF.cache_miss("lead_positions")
+    return get_lead_id_index().positions(_df["Lead ID"].astype(str).str.strip().to_numpy(dtype=object))
+
+def get_lead_positions(df):
+    """Selection bit position per row of a loaded CORA frame, looked up once per data version"""
+    name, version = df.attrs.get("sheet_version", (None, None))
+    if name is None:
+        return get_lead_id_index().positions(df["Lead ID"].astype(str).str.strip().to_numpy(dtype=object))
+    PERF.cache_lookup("lead_positions")
+    return _build_lead_positions(name, version, df)
+
+# ========================================
+# LEAD DEDUPLICATION
+# ========================================
+
+@st.cache_resource(max_entries=4)
+def _build_lead_duplicates(name, version, _df):
+    """Find duplicate groups and invalid emails in one version of the leads sheet"""
+    PERF.cache_miss("dedup")
+    return LeadDuplicates(_df)
+
+def get_lead_duplicates(df):
+    """Duplicate groups and email validity for a loaded CORA frame, built once per data version.
+
+    Pass the frame returned by load_cora_data, not a filtered copy of it.
+    """
+    name, version = df.attrs.get("sheet_version", (None, None))
+    if name is None:
+        return LeadDuplicates(df)
+    PERF.cache_lookup("dedup")
+    return _build_lead_duplicates(name, version, df)
+
+# ========================================
+# METRICS
+# ========================================
+
+def compute_sheet_metrics(name, df, today):
+    """Compute all KPIs for a sheet frame"""
+    if name == "CORA":
+        return compute_cora_metrics(df, today)
+    return compute_opsi_metrics(df)
+
+@st.cache_resource(max_entries=8)
+def _cached_sheet_metrics(name, version, today, _df):
+    """Keep the KPIs for one version of a sheet"""
+    PERF.cache_miss("metrics")
+    return compute_sheet_metrics(name, _df, today)
+
+def get_sheet_metrics(name, df):
+    """KPIs for a loaded sheet frame, memoised until its data (or the date) changes.
+
+    The returned dict is shared between reruns and sessions; treat it as read-only.
+    """
+    version = df.attrs.get("sheet_version", (name, None))[1]
+    if version is None:
+        return compute_sheet_metrics(name, df, date.today())
+    PERF.cache_lookup("metrics")
+    return _cached_sheet_metrics(name, version, date.today(), df)
+
+# ========================================
+# COLUMNAR STORE
+# ========================================
+
+@st.cache_resource(max_entries=4)
+def _build_sheet_store(name, version, _df):
+    """Build and keep the columnar store for one version of a sheet"""
+    PERF.cache_miss("store")
+    return ColumnStore(name, _df)
+
+def get_sheet_store(name, df):
+    """Typed columnar store over a loaded sheet frame, built once per data version.
+
+    The store and its frame are shared between reruns and sessions; treat them as read-only.
+    """
+    version = df.attrs.get("sheet_version", (name, None))[1]
+    if version is None:
+        return ColumnStore(name, df)
+    PERF.cache_lookup("store")
+    return _build_sheet_store(name, version, df)
+
+# ========================================
+# DEADLINE INDEX
+# ========================================
+
+@st.cache_resource
+def _shared_deadline_index():
+    """The one deadline index shared by every session"""
+    return DeadlineIndex()
+
+def get_deadline_index(df):
+    """Deadline index over a loaded OPSI frame, rebuilt only when the sheet moved past it.
+
+    Writes made through patch_opsi_cache update the index in place; a
+    frame older than the index (another session's write landed first) is
+    served by the newer index. Shared between sessions; query it, never modify it.
+    """
+    version = df.attrs.get("sheet_version", ("OPSI", None))[1]
+    if version is None:
+        return DeadlineIndex(df)
+    index = _shared_deadline_index()
+    PERF.cache_lookup("deadlines")
+    if index.version is None or version > index.version:
+        PERF.cache_miss("deadlines")
+        index.rebuild(df, version)
+    return index
+
+# ========================================
+# SUMMARY QUERIES
+# ========================================
+
+# Seconds a bounded range read is reused (across sessions) before it is read again
+RANGE_TTL = 60
+# Data rows read along with the header, so a header lookup also answers head(n)
+TOP_ROWS = 5
+
+def sheet_ready(name):
+    """True when a sheet's full snapshot can be served without waiting on the network"""
+    sync = get_sheet_sync(name)
+    return sync.frame is not None and not sync.invalidated
+
+def warm_sheet(name):
+    """Start loading a sheet's full snapshot in the background if it cannot be served yet"""
+    if not sheet_ready(name):
+        refresh_sheet_async(name)
+
+@st.cache_resource(ttl=RANGE_TTL, max_entries=32)
+def _read_ranges(name, ranges):
+    """Cell values of a few A1 ranges of a sheet, cached apart from the full snapshot"""
+    PERF.cache_miss(f"range.{name}")
+    return SheetSource(get_sheets_api(), get_sheet_id(name)).get_values(ranges)
+
+def read_ranges(name, *ranges):
+    """Cell values of each A1 range (one batched read), shared between sessions; treat as read-only"""
+    PERF.cache_lookup(f"range.{name}")
+    return _read_ranges(name, ranges)
+
+def _sheet_header(name):
+    """Raw header row: from the snapshot when there is one, else a one-row read"""
+    header = get_sheet_sync(name).header
+    if header:
+        return header
+    rows = _sheet_top(name, 0)
+    return list(rows[0]) if rows else []
+
+def _sheet_top(name, n):
+    """Raw header plus at least the first `n` data rows, in one cached read"""
+    return read_ranges(name, f"A1:ZZZ{max(n, TOP_ROWS) + 1}")[0]
+
+def _column_range(pos):
+    """A1 range of one column below the header, e.g. 'E2:E'"""
+    from gspread.utils import rowcol_to_a1
+    letter = re.sub(r"\d", "", rowcol_to_a1(1, pos + 1))
+    return f"{letter}2:{letter}"
+
+def _typed_rows(name, header, rows, index):
+    """Typed frame from raw sheet rows, parsed like the full snapshot"""
+    width = len(header)
+    raw = pd.DataFrame([(list(r) + [""] * width)[:width] for r in rows], columns=header, dtype=object)
+    frame = parse_sheet(name, raw, header)
+    frame.index = index
+    return frame
+
+def _loaded_store(name):
+    """Columnar store of a sheet's full snapshot, with its load state reported"""
+    df = load_sheet(name)
+    report_sheet_state(name, df)
+    return get_sheet_store(name, df)
+
+def sheet_head(name, n=5):
+    """First `n` rows of a sheet as a typed frame.
+
+    Served from the full snapshot once it is loaded; until then only the
+    header and those rows are read.
+    """
+    if sheet_ready(name):
+        return _loaded_store(name).head(n)
+    values = _sheet_top(name, n)[:n + 1]
+    if not values:
+        return pd.DataFrame()
+    return _typed_rows(name, list(values[0]), values[1:], range(len(values) - 1))
+
+def sheet_counts(name, columns):
+    """Row count plus value counts of some canonical columns, as {"total": n, column: {value: count}}.
+
+    Before the full snapshot is loaded, only the header and those columns
+    (plus the row key column, for the total) are read.
+    """
+    if sheet_ready(name):
+        store = _loaded_store(name)
+        return dict({c: store.counts(c) for c in columns}, total=len(store))
+    header = _sheet_header(name)
+    names = resolve_columns(name, header)
+    wanted = [c for c in columns if c in names]
+    key = next((c for c in SHEET_KEY_COLUMNS[name] if c in names), None)
+    read = list(dict.fromkeys(wanted + ([key] if key else [])))
+    values = read_ranges(name, *[_column_range(names.index(c)) for c in read]) if read else []
+    result = {"total": max((len(v) for v in values), default=0)}
+    for column in columns:
+        cells = values[read.index(column)] if column in wanted else []
+        counts = {}
+        for row in cells:
+            value = str(row[0]).strip() if row else ""
+            counts[value] = counts.get(value, 0) + 1
+        result[column] = counts
+    return result
+
+def sheet_rows_where(name, conditions, n=5):
+    """First `n` rows whose canonical columns equal a value (or one of a list), as a typed frame.
+
+    Before the full snapshot is loaded, the condition columns are read to
+    find the rows and then only those rows are fetched.
+    """
+    if sheet_ready(name):
+        store = _loaded_store(name)
+        return store.rows(store.where(conditions)[:n])
+    header = _sheet_header(name)
+    names = resolve_columns(name, header)
+    if not header or any(c not in names for c in conditions):
+        return pd.DataFrame()
+    wanted = [set(v) if isinstance(v, (list, tuple, set)) else {v} for v in conditions.values()]
+    columns = read_ranges(name, *[_column_range(names.index(c)) for c in conditions])
+    length = max((len(v) for v in columns), default=0)
+
+    def cell(values, i):
+        return str(values[i][0]).strip() if i < len(values) and values[i] else ""
+
+    matches = [i for i in range(length) if all(cell(values, i) in w for values, w in zip(columns, wanted))][:n]
+    if not matches:
+        return _typed_rows(name, header, [], [])
+    rows = read_ranges(name, *[f"A{i + 2}:ZZZ{i + 2}" for i in matches])
+    return _typed_rows(name, header, [r[0] if r else [] for r in rows], matches)
+
+# ========================================
+# CORA DATA FUNCTIONS
+# ========================================
+
+@timed()
+def load_cora_data():
+    """Load CORA leads (last snapshot, revalidated every 5 minutes)"""
+    df = load_sheet("CORA")
+    report_sheet_state("CORA", df)
+    return df
+
+@st.cache_resource
+def _shared_mark_outbox():
+    """The one MARK approval outbox shared by every session"""
+    path = st.secrets.get("OUTBOX_PATH", os.path.join(".cache", "outbox.sqlite3"))
+    return Outbox(path)
+
+def get_mark_outbox():
+    """Shared MARK approval outbox with its background sender running (restarted if it died)"""
+    return _shared_mark_outbox().start()
+
+@timed(ok=lambda result: result[0])
+def queue_approved_leads(lead_ids):
+    """Queue approved Lead IDs for delivery to the MARK webhook"""
+    try:
+        return True, get_mark_outbox().enqueue(lead_ids)
     except Exception as e:
         return False, str(e)
 
@@ -65,28 +758,77 @@ def send_approved_leads_to_mark(lead_ids):
 # OPSI DATA FUNCTIONS
 # ========================================
 
-@st.cache_data(ttl=60)  # Cache for 1 minute
+@timed()
 def load_opsi_data():
-    """Load OPSI tasks from Google Sheets"""
-    try:
-        client = connect_to_sheets()
-        if client:
-            # OPSI sheet ID
-            sheet_id = st.secrets.get("OPSI_SHEET_ID", "1kt4z_zcfiX_Xx3jhahihWMB5LMrh0-GpmQDBxKjSl4A")
-            sheet = client.open_by_key(sheet_id).sheet1
-            data = sheet.get_all_records()
-            return pd.DataFrame(data)
-        return pd.DataFrame()
-    except Exception as e:
-        st.error(f"❌ Error loading OPSI data: {e}")
-        return pd.DataFrame()
+    """Load OPSI tasks (last snapshot, revalidated every minute)"""
+    df = load_sheet("OPSI")
+    report_sheet_state("OPSI", df)
+    return df
+
+# Webhook payload field -> canonical OPSI column
+OPSI_FIELD_COLUMNS = {
+    "taskId": "Task ID",
+    "title": "Task Title",
+    "taskType": "Task Type",
+    "assignedTo": "Assigned To",
+    "deadline": "Deadline Date",
+    "status": "Status",
+    "priority": "Priority",
+    "notes": "Notes",
+}
+
+# Seconds to wait after a write before re-reading the sheet to reconcile
+RECONCILE_DELAY = 5
+
+def patch_opsi_cache(task_data, task_id=None, reconcile=True):
+    """Apply a successful OPSI write to the cached tasks now, then reconcile in the background"""
+    sync = get_sheet_sync("OPSI")
+    task_id = task_id or task_data.get("taskId")
+    # Raw sheet header for each canonical column
+    headers = dict(zip(resolve_columns("OPSI", sync.header), sync.header))
+    values = {}
+    for field, value in task_data.items():
+        column = headers.get(OPSI_FIELD_COLUMNS.get(field))
+        if column:
+            values[column] = "" if value is None else value
+    if not task_id:
+        # New tasks start as New until the sheet says otherwise
+        status_column = headers.get(OPSI_FIELD_COLUMNS["status"])
+        if status_column and status_column not in values:
+            values[status_column] = "New"
+    before = sync.version
+    key = sync.upsert_row(task_id, values)
+    if task_id and key:
+        # Move the task in the deadline index now rather than rebuilding it for one row
+        cells = {
+            OPSI_FIELD_COLUMNS[field]: "" if value is None else value
+            for field, value in task_data.items()
+            if headers.get(OPSI_FIELD_COLUMNS.get(field))
+        }
+        _shared_deadline_index().update(task_id, cells, before, sync.version)
+    if reconcile:
+        refresh_sheet_async("OPSI", force=True, delay=RECONCILE_DELAY)
+
+OPSI_CREATE_WEBHOOK_URL = "https://hackett2k.app.n8n.cloud/webhook/opsi-create-task"
+OPSI_UPDATE_WEBHOOK_URL = "https://hackett2k.app.n8n.cloud/webhook/opsi-update-task"
+
+# Concurrent webhook calls during a bulk run
+BULK_WORKERS = 8
+
+@st.cache_resource
+def get_webhook_session():
+    """Pooled keep-alive HTTP session shared by the OPSI webhook calls"""
+    import requests
+    from requests.adapters import HTTPAdapter
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=BULK_WORKERS))
+    return session
 
+@timed(ok=lambda result: result is not None)
 def send_opsi_task(task_data):
     """Send new OPSI task to n8n webhook"""
-    webhook_url = "https://hackett2k.app.n8n.cloud/webhook/opsi-create-task"
-    
     try:
-        response = requests.post(webhook_url, json=task_data, timeout=10)
+        response = get_webhook_session().post(OPSI_CREATE_WEBHOOK_URL, json=task_data, timeout=10)
         if response.status_code == 200:
             return response.json()
         else:
@@ -96,12 +838,11 @@ def send_opsi_task(task_data):
         st.error(f"❌ Error sending OPSI task: {e}")
         return None
 
+@timed(ok=lambda result: result is not None)
 def update_opsi_task(update_data):
     """Update existing OPSI task via n8n webhook"""
-    webhook_url = "https://hackett2k.app.n8n.cloud/webhook/opsi-update-task"
-    
     try:
-        response = requests.post(webhook_url, json=update_data, timeout=10)
+        response = get_webhook_session().post(OPSI_UPDATE_WEBHOOK_URL, json=update_data, timeout=10)
         if response.status_code == 200:
             return response.json()
         else:
@@ -111,17 +852,80 @@ def update_opsi_task(update_data):
         st.error(f"❌ Error updating OPSI task: {e}")
         return None
 
-def update_opsi_task(update_data):
-    """Update existing OPSI task via n8n webhook"""
-    webhook_url = "https://hackett2k.app.n8n.cloud/webhook/opsi-update-task"
-    
+@timed(ok=lambda result: result[0])
+def post_opsi_webhook(url, payload, session=None):
+    """POST one task to an OPSI webhook without touching the UI, returning (ok, message)"""
     try:
-        response = requests.post(webhook_url, json=update_data, timeout=10)
+        response = (session or get_webhook_session()).post(url, json=payload, timeout=10)
         if response.status_code == 200:
-            return response.json()
-        else:
-            st.error(f"❌ OPSI update webhook error: {response.status_code}")
-            return None
+            return True, "OK"
+        return False, f"HTTP {response.status_code}"
     except Exception as e:
-        st.error(f"❌ Error updating OPSI task: {e}")
-        return None
+        return False, str(e)
+
+@timed()
+def run_opsi_bulk(creates, updates, max_workers=BULK_WORKERS):
+    """Fan task creates and updates out to the n8n webhooks through a bounded pool.
+
+    Returns one result per row, in submission order. Successful rows are
+    patched into the cached tasks and the sheet is reconciled once at the
+    end rather than per row.
+    """
+    jobs = [("Create", OPSI_CREATE_WEBHOOK_URL, p) for p in creates]
+    jobs += [("Update", OPSI_UPDATE_WEBHOOK_URL, p) for p in updates]
+    if not jobs:
+        return []
+
+    session = get_webhook_session()
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(jobs))) as pool:
+        outcomes = list(pool.map(lambda job: post_opsi_webhook(job[1], job[2], session), jobs))
+
+    for (_, _, payload), (ok, _) in zip(jobs, outcomes):
+        if ok:
+            patch_opsi_cache(payload, reconcile=False)
+    refresh_sheet_async("OPSI", force=True, delay=RECONCILE_DELAY)
+
+    return [
+        {
+            "Action": action,
+            "Task": payload.get("taskId") or payload.get("title", ""),
+            "OK": ok,
+            "Result": message,
+        }
+        for (action, _, payload), (ok, message) in zip(jobs, outcomes)
+    ]
+
+# ========================================
+# AGENT HEALTH
+# ========================================
+
+def sheet_probe(name):
+    """Probe that a sheet is reachable, via one Drive metadata call (no values read)"""
+    def probe():
+        get_sheets_api().get_file_drive_metadata(get_sheet_id(name))
+    return probe
+
+@st.cache_resource
+def get_health_monitor():
+    """Shared agent health monitor with its background probe thread running"""
+    import requests
+    session = requests.Session()
+    checks = {
+        "CORA": [
+            ("n8n", n8n_healthz_probe(OPSI_CREATE_WEBHOOK_URL, session)),
+            ("CORA sheet", sheet_probe("CORA")),
+        ],
+        "MARK": [
+            ("approve webhook", n8n_webhook_probe(MARK_WEBHOOK_URL, session)),
+        ],
+        "OPSI": [
+            ("create webhook", n8n_webhook_probe(OPSI_CREATE_WEBHOOK_URL, session)),
+            ("update webhook", n8n_webhook_probe(OPSI_UPDATE_WEBHOOK_URL, session)),
+            ("OPSI sheet", sheet_probe("OPSI")),
+        ],
+    }
+    return HealthMonitor(checks).start()
+
+def get_agent_status(agent):
+    """Active, Idle or Offline for an agent, read from the last probe results"""
+    return get_health_monitor().status(agent)
@@ -0,0 +1,32 @@
+import importlib
+
+import streamlit as st
+
+# ========================================
+# PAGES
+# ========================================
+
+# Page name -> (module with its render(), sheets the page shows). Modules are
+# imported on first visit, so a process only pays for the pages (and their
+# dependencies) that get opened; only the listed sheets are watched for changes
+PAGES = {
+    "Dashboard Overview": ("views.overview", ["CORA", "OPSI"]),
+    "Approve Leads": ("views.approve_leads", ["CORA"]),
+    "Manage Tasks": ("views.manage_tasks", ["OPSI"]),
+    "Performance": ("views.performance", []),
+}
+
+# Pages offered in the sidebar; Performance is opened with ?view=performance
+NAV_PAGES = ["Dashboard Overview", "Approve Leads", "Manage Tasks"]
+
+def page_sheets(page):
+    """Sheets a page reads"""
+    return PAGES[page][1]
+
+def go_to_page(page):
+    """Button callback: switch pages before the next run draws the navigation radio"""
+    st.session_state.selected_page = page
+
+def render_page(page):
+    """Import a page's module (once per process) and draw it"""
+    importlib.import_module(PAGES[page][0]).render()
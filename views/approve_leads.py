@@ -0,0 +1,297 @@
+import streamlit as st
+import pandas as pd
+from cora import get_cora_store
+from export import export_controls
+from perf import timed
+import numpy as np
+from session import LeadSelection
+from utils import queue_approved_leads, get_mark_outbox, invalidate_sheets, get_search_index, get_sheet_metrics, get_lead_duplicates, get_lead_id_index, get_lead_positions
+
+# ========================================
+# APPROVE LEADS PAGE
+# ========================================
+
+def render():
+    """Lead selection and approval for MARK, the delivery queue and lead search (CORA only)"""
+    st.header("📧 Approve Leads for Outreach")
+    st.write("Review and approve leads for MARK to send outreach emails")
+    
+    df = get_cora_store().frame
+    
+    if df.empty:
+        st.info("No leads available. Run CORA to generate leads.")
+    else:
+        # Metrics
+        col1, col2, col3, col4 = st.columns(4)
+        
+        lead_metrics = get_sheet_metrics("CORA", df)
+        
+        with col1:
+            st.metric("Total Leads", lead_metrics["total"])
+        
+        with col2:
+            st.metric("Today", lead_metrics["today"])
+        
+        with col3:
+            st.metric("Cities", lead_metrics["org_kind"].get("City", 0))
+        
+        with col4:
+            st.metric("Churches", lead_metrics["org_kind"].get("Church", 0))
+        
+        st.markdown("---")
+        
+        # One search index per data version serves both the selection filter and the search box
+        lead_search_columns = [c for c in ["Lead ID", "Name", "Email", "Organization"] if c in df.columns]
+        lead_index = get_search_index(df, lead_search_columns)
+        
+        # ========================================
+        # APPROVE LEADS SECTION
+        # ========================================
+        
+        # Each panel below is a fragment: its widgets rerun only that panel,
+        # not the sidebar, data loads and the rest of the page
+        @st.fragment
+        @timed("fragment.lead_selection_grid")
+        def lead_selection_grid():
+            st.markdown("### Select Leads to Approve")
+            
+            # Selection is a bitset keyed by Lead ID (not row position), so it survives
+            # paging, filtering, re-sorting and reloads at one bit per lead
+            lead_ids = get_lead_id_index()
+            if st.session_state.get('lead_selection') is None or st.session_state.lead_selection.index is not lead_ids:
+                st.session_state.lead_selection = LeadSelection(lead_ids)
+            if 'lead_grid_generation' not in st.session_state:
+                st.session_state.lead_grid_generation = 0
+            selection = st.session_state.lead_selection
+            positions = get_lead_positions(df)
+            
+            grid_columns = [c for c in ["Lead ID", "Name", "Organization", "Email"] if c in df.columns]
+            
+            # Filter for the selection grid
+            col1, col2 = st.columns([4, 1])
+            with col1:
+                grid_filter = st.text_input(
+                    "Filter leads to select",
+                    placeholder="Filter by Lead ID, name, organization or email...",
+                    key="lead_grid_filter"
+                )
+            with col2:
+                page_size = st.selectbox("Rows per page", [25, 50, 100], index=1, key="lead_grid_page_size")
+            
+            grid_rows = np.arange(len(df))
+            if grid_filter:
+                grid_rows = np.asarray(lead_index.search(grid_filter), dtype=np.int64)
+            
+            # Bulk selection controls: one array operation each, however many leads match
+            col1, col2, col3, col4, col5 = st.columns(5)
+            with col1:
+                if st.button(f"☑️ Select all matching ({len(grid_rows)})", use_container_width=True, key="select_matching"):
+                    selection.set(positions[grid_rows])
+                    st.session_state.lead_grid_generation += 1
+            with col2:
+                if st.button("🔀 Invert matching", use_container_width=True, key="invert_matching"):
+                    selection.invert(positions[grid_rows])
+                    st.session_state.lead_grid_generation += 1
+            with col3:
+                if st.button("✖️ Clear selection", use_container_width=True, key="clear_selection"):
+                    selection.clear()
+                    st.session_state.lead_grid_generation += 1
+            with col4:
+                if st.button("🔄 Refresh Data", use_container_width=True, key="refresh_top"):
+                    invalidate_sheets("CORA")
+                    st.rerun()
+            with col5:
+                approve_btn_top = st.button(
+                    "✅ Approve Selected Leads",
+                    type="primary",
+                    use_container_width=True,
+                    key="approve_top"
+                )
+            
+            # Server-side pagination: only the current page is ever sent to the browser
+            page_count = max(1, -(-len(grid_rows) // page_size))
+            if st.session_state.get("lead_grid_page", 1) > page_count:
+                st.session_state.lead_grid_page = 1
+            page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, step=1, key="lead_grid_page")
+            page_rows = grid_rows[(page - 1) * page_size:page * page_size]
+            page_df = df.iloc[page_rows][grid_columns].copy()
+            page_df.insert(0, "Select", selection.contains(positions[page_rows]))
+            
+            edited = st.data_editor(
+                page_df,
+                hide_index=True,
+                use_container_width=True,
+                disabled=grid_columns,
+                column_config={"Select": st.column_config.CheckboxColumn("✓", width="small")},
+                key=f"lead_grid_{st.session_state.lead_grid_generation}_{grid_filter}_{page_size}_{page}"
+            )
+            selection.set(positions[page_rows], edited["Select"].to_numpy(dtype=bool))
+            
+            # Leads in the current sheet that are selected, in sheet order
+            selected_lead_ids = [i for i in lead_ids.lead_ids(positions[selection.contains(positions)]) if i]
+            
+            st.markdown("---")
+            
+            # Approval controls
+            skip_duplicates = st.checkbox(
+                "Skip duplicate contacts and invalid emails",
+                value=True,
+                key="skip_duplicate_leads",
+                help="Of each duplicate group only the first selected lead is sent; leads without a valid email are left out"
+            )
+            col1, col2, col3 = st.columns([2, 2, 2])
+            
+            with col1:
+                st.metric("Selected", len(selected_lead_ids))
+            
+            with col2:
+                approve_btn_bottom = st.button(
+                    "✅ Approve Selected Leads",
+                    type="primary",
+                    use_container_width=True,
+                    disabled=len(selected_lead_ids) == 0,
+                    key="approve_bottom"
+                )
+            
+            with col3:
+                if st.button("🔄 Refresh Data", use_container_width=True):
+                    invalidate_sheets("CORA")
+                    st.rerun()
+            
+            # Handle approval from either button
+            if approve_btn_top or approve_btn_bottom:
+                if selected_lead_ids:
+                    approved_ids, skipped = selected_lead_ids, {}
+                    if skip_duplicates:
+                        approved_ids, skipped = get_lead_duplicates(df).collapse(selected_lead_ids)
+                    
+                    if skipped:
+                        st.warning(f"⚠️ Skipped {len(skipped)} lead(s): duplicates of another selected lead or invalid emails")
+                        with st.expander("View Skipped Leads"):
+                            st.dataframe(
+                                pd.DataFrame({"Lead ID": list(skipped), "Reason": list(skipped.values())}),
+                                hide_index=True,
+                                use_container_width=True
+                            )
+                    
+                    if not approved_ids:
+                        st.info("No leads left to approve after skipping duplicates and invalid emails.")
+                    else:
+                        success, response = queue_approved_leads(approved_ids)
+                        
+                        if success:
+                            st.success(f"✅ Approved {len(approved_ids)} lead(s) — queued for MARK in {len(response)} batch(es)")
+                            st.info("🤖 MARK will send outreach emails shortly.")
+                            
+                            # Show approved leads
+                            with st.expander("View Approved Leads"):
+                                st.dataframe(pd.DataFrame({"Lead ID": approved_ids}), hide_index=True, use_container_width=True)
+                        else:
+                            st.error(f"❌ Failed to queue approvals for MARK: {response}")
+                else:
+                    st.warning("⚠️ Please select at least one lead to approve")
+            
+        # ========================================
+        # DUPLICATES AND INVALID EMAILS
+        # ========================================
+        @st.fragment
+        @timed("fragment.lead_quality_panel")
+        def lead_quality_panel():
+            # Built once per data version and shared with the approval step above
+            duplicates = get_lead_duplicates(df)
+            with st.expander(
+                f"🧹 Duplicates and Invalid Emails ({duplicates.duplicate_count} duplicate(s), {duplicates.invalid_count} invalid)",
+                expanded=False
+            ):
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.metric("Duplicate Groups", duplicates.group_count)
+                with col2:
+                    st.metric("Duplicate Leads", duplicates.duplicate_count, help="Leads beyond the first of each group")
+                with col3:
+                    st.metric("Invalid Emails", duplicates.invalid_count)
+                
+                st.caption("Leads match on the same email (ignoring case and +tags) or on a near-identical name and organization.")
+                groups_tab, invalid_tab = st.tabs(["Duplicate Groups", "Invalid Emails"])
+                with groups_tab:
+                    if duplicates.group_count:
+                        st.dataframe(duplicates.groups(), hide_index=True, use_container_width=True)
+                    else:
+                        st.caption("No duplicate leads found.")
+                with invalid_tab:
+                    if duplicates.invalid_count:
+                        st.dataframe(duplicates.invalid(), hide_index=True, use_container_width=True)
+                    else:
+                        st.caption("Every lead has a valid email.")
+        
+        # ========================================
+        # MARK DELIVERY QUEUE
+        # ========================================
+        @st.fragment
+        @timed("fragment.mark_delivery_queue")
+        def mark_delivery_queue():
+            with st.expander("📬 MARK Delivery Queue", expanded=False):
+                outbox = get_mark_outbox()
+                stats = outbox.stats()
+                
+                col1, col2, col3, col4, col5 = st.columns(5)
+                with col1:
+                    st.metric("Queued Batches", stats["pending"], help=f"{stats['queued_leads']} lead(s) waiting")
+                with col2:
+                    st.metric("Delivered", stats["sent"])
+                with col3:
+                    st.metric("Failed", stats["failed"])
+                with col4:
+                    p50 = stats["latency_p50"]
+                    st.metric("Latency p50", f"{p50:.1f}s" if p50 is not None else "—")
+                with col5:
+                    p95 = stats["latency_p95"]
+                    st.metric("Latency p95", f"{p95:.1f}s" if p95 is not None else "—")
+                
+                if stats["oldest_pending_age"] is not None:
+                    st.caption(f"Oldest queued batch has waited {stats['oldest_pending_age']:.0f}s")
+                
+                recent = outbox.recent()
+                if recent:
+                    st.dataframe(pd.DataFrame(recent), hide_index=True, use_container_width=True)
+                else:
+                    st.caption("No approvals queued yet.")
+                
+                if stats["failed"] and st.button("🔁 Retry Failed Batches", key="retry_outbox"):
+                    outbox.retry_failed()
+                    st.rerun(scope="fragment")
+        
+        # ========================================
+        # SEARCH AND FILTER
+        # ========================================
+        @st.fragment
+        @timed("fragment.lead_search_panel")
+        def lead_search_panel():
+            search = st.text_input("🔍 Search leads by name, email, or organization...")
+            filtered = df
+            
+            if search:
+                # Ranked: exact, then prefix, substring and near-miss matches
+                filtered = df.iloc[lead_index.search(search)]
+            
+            # ========================================
+            # LEADS TABLE
+            # ========================================
+            st.subheader(f"All Leads ({len(filtered)})")
+            
+            if not filtered.empty:
+                st.dataframe(filtered, use_container_width=True, hide_index=True)
+                
+                # Export is built only when the button is clicked
+                export_controls(filtered, "cora_leads", "lead_export")
+            else:
+                st.info("No leads match your search criteria.")
+        
+        if 'Lead ID' in df.columns:
+            lead_selection_grid()
+            lead_quality_panel()
+            mark_delivery_queue()
+        
+        st.markdown("---")
+        
+        lead_search_panel()
@@ -0,0 +1,557 @@
+import streamlit as st
+from datetime import date, timedelta
+import pandas as pd
+from export import export_controls
+from opsi import get_opsi_store, plan_bulk_changes
+from perf import timed
+from session import FormCache
+from utils import sheet_text, send_opsi_task, update_opsi_task, run_opsi_bulk, patch_opsi_cache, get_search_index, get_sheet_metrics, get_deadline_index
+
+# ========================================
+# MANAGE TASKS PAGE (OPSI)
+# ========================================
+
+# Rows listed in the overdue and due-soon tables (counts always cover every task)
+DEADLINE_ROWS = 500
+
+def render():
+    """Create, update, bulk-edit and browse OPSI tasks (OPSI only)"""
+    # Scroll anchor at top
+    st.markdown('<div id="manage-tasks-top"></div>', unsafe_allow_html=True)
+    
+    st.header("📋 Manage Tasks")
+    st.write("Create and track compliance tasks, deadlines, and operations")
+    
+    opsi_df = get_opsi_store().frame
+    
+    # Headers are normalised to the OPSI schema at load
+    status_col, priority_col, task_id_col, task_title_col = "Status", "Priority", "Task ID", "Task Title"
+    
+    # Metrics
+    task_metrics = get_sheet_metrics("OPSI", opsi_df)
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric("Pending", task_metrics["status"].get("New", 0))
+    
+    with col2:
+        st.metric("In Progress", task_metrics["status"].get("In Progress", 0))
+    
+    with col3:
+        st.metric("High Priority", task_metrics["priority"].get("High", 0))
+    
+    with col4:
+        st.metric("Total Tasks", task_metrics["total"])
+    
+    st.markdown("---")
+    
+    # ========================================
+    # CREATE TASK
+    # ========================================
+    
+    # Each panel below is a fragment: typing, selecting and editing rerun
+    # only that panel; saving a change reruns the whole page for fresh metrics
+    @st.fragment
+    @timed("fragment.create_task_panel")
+    def create_task_panel():
+        with st.expander("➕ Create New Task", expanded=False):
+            with st.form("task_form"):
+                
+                title = st.text_input("Task Title*")
+                
+                task_type = st.selectbox(
+                    "Task Type*",
+                    ["Select option", "RFP Submission", "Contract Renewal", "Audit", "Compliance Report", "Other"]
+                )
+                
+                assigned_to = st.text_input("Assigned To*", placeholder="Enter person name")
+                
+                deadline = st.date_input("Deadline Date*")
+                
+                priority = st.selectbox(
+                    "Priority*",
+                    ["Select option", "High", "Medium", "Low"]
+                )
+                
+                notes = st.text_area("Notes")
+                
+                submitted = st.form_submit_button("Create Task")
+                
+                if submitted:
+                    errors = []
+                    
+                    if not title.strip():
+                        errors.append("Task title is required.")
+                    if task_type == "Select option":
+                        errors.append("Task type is required.")
+                    if priority == "Select option":
+                        errors.append("Priority is required.")
+                    if not assigned_to.strip():
+                        errors.append("Assigned To is required.")
+                    
+                    if errors:
+                        for e in errors:
+                            st.error(e)
+                    else:
+                        task_data = {
+                            "title": title,
+                            "taskType": task_type,
+                            "assignedTo": assigned_to,
+                            "deadline": str(deadline),
+                            "priority": priority,
+                            "notes": notes,
+                        }
+                        result = send_opsi_task(task_data)
+                        
+                        if result:
+                            st.success("✅ Task created successfully!")
+                            patch_opsi_cache(task_data, task_id=result.get("taskId") if isinstance(result, dict) else None)
+                            st.markdown("""
+                            <script>
+                                window.parent.document.querySelector('[data-testid="stAppViewContainer"]').scrollTop = 0;
+                            </script>
+                            """, unsafe_allow_html=True)
+                            st.rerun()
+    
+    create_task_panel()
+    
+    # ========================================
+    # UPDATE TASK SECTION
+    # ========================================
+    @st.fragment
+    @timed("fragment.task_update_panel")
+    def task_update_panel():
+        # Show success message if it exists in session state
+        if 'update_success_msg' in st.session_state:
+            st.success(st.session_state.update_success_msg)
+            del st.session_state.update_success_msg
+        
+        # Keep expander open if search is active
+        is_expanded = st.session_state.get('task_id_search', '') != ''
+        
+        with st.expander("✏️ Update Task", expanded=is_expanded):
+            st.markdown("**Select a task to update**")
+            
+            # Initialize session state for search
+            if 'task_id_search' not in st.session_state:
+                st.session_state.task_id_search = ""
+            
+            # Search Task ID field
+            task_id_search = st.text_input(
+                "🔍 Search Task ID:",
+                value=st.session_state.task_id_search,
+                placeholder="Enter Task ID to filter...",
+                key="task_id_search_input"
+            )
+            
+            # Update session state
+            st.session_state.task_id_search = task_id_search
+            
+            # Filter tasks based on search
+            if not opsi_df.empty and task_id_col in opsi_df.columns and task_title_col in opsi_df.columns:
+                filtered_opsi_df = opsi_df
+                
+                if task_id_search.strip():
+                    filtered_opsi_df = opsi_df[
+                        opsi_df[task_id_col].str.contains(task_id_search, case=False, na=False)
+                    ]
+                
+                if not filtered_opsi_df.empty:
+                    # Labels built column-wise; iterrows was most of this panel's rerun time
+                    task_ids = filtered_opsi_df[task_id_col].astype(str)
+                    labels = task_ids + " - " + filtered_opsi_df[task_title_col].astype(str)
+                    task_options = dict(zip(labels, filtered_opsi_df[task_id_col]))
+                    
+                    selected_task_label = st.selectbox(
+                        "Select Task:",
+                        options=list(task_options.keys()),
+                        key=f"task_selector_{len(task_options)}"
+                    )
+                    
+                    if selected_task_label:
+                        selected_task_id = task_options[selected_task_label]
+                        
+                        # Get current task details
+                        task_row = opsi_df[opsi_df[task_id_col] == selected_task_id].iloc[0]
+                        
+                        col1, col2 = st.columns(2)
+                        
+                        with col1:
+                            st.markdown("**Current Details:**")
+                            st.write(f"**Task Type:** {task_row.get('Task Type', 'N/A')}")
+                            st.write(f"**Title:** {task_row[task_title_col]}")
+                            st.write(f"**Status:** {task_row[status_col]}")
+                            st.write(f"**Priority:** {task_row[priority_col]}")
+                            st.write(f"**Assigned To:** {task_row.get('Assigned To', 'N/A')}")
+                            current_deadline = task_row.get('Deadline Date')
+                            st.write(f"**Deadline:** {current_deadline.strftime('%Y-%m-%d') if pd.notna(current_deadline) else 'N/A'}")
+                        
+                        with col2:
+                            st.markdown("**Update:**")
+                            
+                            # Form defaults live in a small per-session LRU, not one
+                            # session_state entry per field for every task ever opened
+                            if 'task_forms' not in st.session_state:
+                                st.session_state.task_forms = FormCache()
+                            form = st.session_state.task_forms.get(selected_task_id, lambda: {
+                                "title": task_row[task_title_col],
+                                "assigned": task_row.get('Assigned To', ''),
+                                # Deadlines are parsed once at load; unparseable cells fall back to today
+                                "deadline": current_deadline.date() if pd.notna(current_deadline) else date.today(),
+                            })
+                            
+                            # Title input
+                            new_title = st.text_input(
+                                "Title:",
+                                value=form["title"],
+                                key=f"new_title_{selected_task_id}"
+                            )
+                            
+                            # Assigned To input
+                            new_assigned_to = st.text_input(
+                                "Assigned To:",
+                                value=form["assigned"],
+                                key=f"new_assigned_to_{selected_task_id}"
+                            )
+                            
+                            # Deadline input
+                            new_deadline = st.date_input(
+                                "Deadline:",
+                                value=form["deadline"],
+                                key=f"new_deadline_{selected_task_id}"
+                            )
+                            
+                            # Status selection
+                            current_status_index = 0
+                            status_options = ["New", "In Progress", "Completed", "On Hold", "Cancelled"]
+                            if task_row[status_col] in status_options:
+                                current_status_index = status_options.index(task_row[status_col])
+                            
+                            new_status = st.selectbox(
+                                "Status:",
+                                options=status_options,
+                                index=current_status_index,
+                                key=f"new_status_select_{selected_task_id}"
+                            )
+                            
+                            # Priority selection
+                            current_priority_index = 1
+                            priority_options = ["High", "Medium", "Low"]
+                            if task_row[priority_col] in priority_options:
+                                current_priority_index = priority_options.index(task_row[priority_col])
+                            
+                            new_priority = st.selectbox(
+                                "Priority:",
+                                options=priority_options,
+                                index=current_priority_index,
+                                key=f"new_priority_select_{selected_task_id}"
+                            )
+                            
+                            update_notes = st.text_area(
+                                "Notes:", 
+                                value=task_row.get('Notes', ''), 
+                                key=f"update_notes_{selected_task_id}"
+                            )
+                            
+                            if st.button("💾 Update Task", type="primary", use_container_width=True, key=f"update_btn_{selected_task_id}"):
+                                update_data = {
+                                    "taskId": selected_task_id,
+                                    "taskType": task_row.get('Task Type', 'RFP Submission'),
+                                    "title": new_title,
+                                    "assignedTo": new_assigned_to,
+                                    "deadline": str(new_deadline),
+                                    "status": new_status,
+                                    "priority": new_priority,
+                                    "notes": update_notes
+                                }
+                                
+                                result = update_opsi_task(update_data)
+                                
+                                if result:
+                                    # Store success message in session state before rerun
+                                    st.session_state.update_success_msg = f"✅ Task {selected_task_id} updated successfully!"
+                                    # Clear search on successful update
+                                    st.session_state.task_id_search = ""
+                                    patch_opsi_cache(update_data)
+                                    # Reseed the form from the updated row next time it is opened
+                                    st.session_state.task_forms.discard(selected_task_id)
+                                    st.markdown("""
+                                    <script>
+                                        window.parent.document.querySelector('[data-testid="stAppViewContainer"]').scrollTop = 0;
+                                    </script>
+                                    """, unsafe_allow_html=True)
+                                    st.rerun()
+                                else:
+                                    st.error("❌ Failed to update task")
+                else:
+                    st.warning(f"⚠️ No tasks found matching '{task_id_search}'")
+            else:
+                st.warning("⚠️ Task ID or Title column not found in data")
+    
+    task_update_panel()
+    
+    # ========================================
+    # BULK EDIT TASKS
+    # ========================================
+    @st.fragment
+    @timed("fragment.bulk_edit_panel")
+    def bulk_edit_panel():
+        # Show results of the last bulk run (kept across the post-run rerun)
+        if 'bulk_results' in st.session_state:
+            bulk_results = st.session_state.pop('bulk_results')
+            ok_count = sum(1 for r in bulk_results if r["OK"])
+            if ok_count == len(bulk_results):
+                st.success(f"✅ Bulk run finished: {ok_count} task(s) saved")
+            else:
+                st.warning(f"⚠️ Bulk run finished: {ok_count} of {len(bulk_results)} task(s) saved")
+            st.dataframe(pd.DataFrame(bulk_results), hide_index=True, use_container_width=True)
+        
+        with st.expander("🗂️ Bulk Edit Tasks", expanded=False):
+            # The expander body runs even when collapsed, so nothing is built until bulk mode is on
+            if not st.toggle("Open bulk editor", key="bulk_mode"):
+                st.caption("Turn on to edit tasks in a grid or upload a CSV of changes.")
+                return
+            
+            grid_tab, csv_tab = st.tabs(["Edit in Grid", "Upload CSV"])
+            
+            with grid_tab:
+                st.caption("Edit cells directly, or add rows at the end of a page to create new tasks. Edits are kept across pages until applied.")
+                grid_changes = bulk_grid()
+            
+            with csv_tab:
+                st.caption("Columns: Task ID (blank to create), Task Title, Task Type, Assigned To, Deadline Date, Status, Priority, Notes. Blank cells keep current values.")
+                uploaded = st.file_uploader("Upload tasks CSV", type=["csv"], key="bulk_task_csv")
+                csv_changes = pd.read_csv(uploaded, dtype=str, keep_default_na=False) if uploaded else None
+            
+            changes_df = csv_changes if csv_changes is not None else grid_changes
+            creates, updates, bulk_errors = plan_bulk_changes(opsi_df, changes_df)
+            
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("To Create", len(creates))
+            with col2:
+                st.metric("To Update", len(updates))
+            with col3:
+                st.metric("Invalid Rows", len(bulk_errors))
+            
+            if bulk_errors:
+                st.dataframe(pd.DataFrame(bulk_errors), hide_index=True, use_container_width=True)
+            
+            if st.button(
+                "🚀 Apply Bulk Changes",
+                type="primary",
+                use_container_width=True,
+                disabled=not (creates or updates),
+                key="apply_bulk"
+            ):
+                with st.spinner(f"Sending {len(creates) + len(updates)} task(s) to OPSI..."):
+                    st.session_state.bulk_results = run_opsi_bulk(creates, updates)
+                for name in ("bulk_grid_edits", "bulk_grid_added", "bulk_grid_view"):
+                    st.session_state.pop(name, None)
+                st.rerun()
+    
+    def bulk_grid():
+        """One page of the sheet as an editable grid; returns every pending grid change.
+        
+        Edited rows (indexed by sheet row) and rows added on each page are kept
+        in session state, so only the current page is converted to text and sent
+        to the browser. The editor's input is frozen until the page changes,
+        because Streamlit re-applies its own edits on top of that input.
+        """
+        edits = st.session_state.setdefault("bulk_grid_edits", {})
+        added = st.session_state.setdefault("bulk_grid_added", {})
+        
+        col1, col2 = st.columns([3, 1])
+        with col2:
+            page_size = st.selectbox("Rows per page", [25, 50, 100], index=1, key="bulk_grid_page_size")
+        page_count = max(1, -(-len(opsi_df) // page_size))
+        if st.session_state.get("bulk_grid_page", 1) > page_count:
+            st.session_state.bulk_grid_page = 1
+        with col1:
+            page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, step=1, key="bulk_grid_page")
+        start = (page - 1) * page_size
+        
+        # Plain sheet text, so categorical and date cells stay free-text editable
+        view = st.session_state.get("bulk_grid_view")
+        if view is None or view["page"] != (start, page_size):
+            base = opsi_df.iloc[start:start + page_size].apply(sheet_text).reset_index(drop=True)
+            shown = base.copy()
+            for row, values in edits.items():
+                if start <= row < start + len(base):
+                    shown.loc[row - start] = values
+            if start in added:
+                shown = pd.concat([shown, added[start]], ignore_index=True)
+            serial = view["serial"] + 1 if view else 0
+            view = st.session_state.bulk_grid_view = {"page": (start, page_size), "base": base, "shown": shown, "serial": serial}
+        
+        base = view["base"]
+        grid = st.data_editor(
+            view["shown"],
+            hide_index=True,
+            use_container_width=True,
+            num_rows="add",
+            disabled=[task_id_col] if task_id_col in base.columns else [],
+            key=f"bulk_task_editor_{view['serial']}"
+        )
+        
+        # Existing rows come first in the grid; anything after them was added here
+        kept = grid.iloc[:len(base)]
+        changed = (kept != base).any(axis=1).to_numpy()
+        for row in range(start, start + len(base)):
+            edits.pop(row, None)
+        for position in changed.nonzero()[0]:
+            edits[start + int(position)] = kept.iloc[position]
+        new_rows = grid.iloc[len(base):].fillna("")
+        new_rows = new_rows[(new_rows.astype(str).apply(lambda col: col.str.strip()) != "").any(axis=1)]
+        if len(new_rows):
+            added[start] = new_rows.reset_index(drop=True)
+        else:
+            added.pop(start, None)
+        
+        # Edited rows keep their sheet row; added rows are numbered after the sheet
+        changes = pd.DataFrame(list(edits.values()), index=list(edits.keys()), columns=base.columns)
+        extra = [frame for _, frame in sorted(added.items())]
+        if extra:
+            extra = pd.concat(extra, ignore_index=True)
+            extra.index = extra.index + len(opsi_df)
+            changes = pd.concat([changes, extra])
+        if edits or len(extra):
+            st.caption(f"Pending grid changes: {len(edits)} edited, {len(changes) - len(edits)} new row(s)")
+        return changes
+    
+    bulk_edit_panel()
+    
+    st.markdown("---")
+    
+    # ========================================
+    # DEADLINES
+    # ========================================
+    @st.fragment
+    @timed("fragment.deadline_panel")
+    def deadline_panel():
+        st.subheader("⏰ Deadlines")
+        
+        # Shared, sorted per assignee and priority: every query below is a few binary searches
+        deadline_index = get_deadline_index(opsi_df)
+        assignees, priorities = deadline_index.labels()
+        
+        col1, col2, col3 = st.columns([2, 2, 1])
+        with col1:
+            filter_assignees = st.multiselect("Assigned To", assignees, key="deadline_assignees", placeholder="Everyone")
+        with col2:
+            filter_priorities = st.multiselect("Priority", priorities, key="deadline_priorities", placeholder="Any priority")
+        with col3:
+            window = st.selectbox("Due within (days)", [7, 14, 30], key="deadline_window")
+        filters = {"assignees": set(filter_assignees) or None, "priorities": set(filter_priorities) or None}
+        
+        # Counts come straight from the bucket boundaries; only listed rows are read
+        today = date.today()
+        soon_end = today + timedelta(days=window + 1)
+        late_counts = deadline_index.counts(None, today, **filters)
+        soon_counts = deadline_index.counts(today, soon_end, **filters)
+        overdue_count, due_soon_count = sum(late_counts.values()), sum(soon_counts.values())
+        overdue = deadline_index.overdue(today, limit=DEADLINE_ROWS, **filters)
+        due_soon = deadline_index.due_soon(today, window, limit=DEADLINE_ROWS, **filters)
+        
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Overdue", overdue_count)
+        with col2:
+            st.metric("Due Today", sum(deadline_index.counts(today, today + timedelta(days=1), **filters).values()))
+        with col3:
+            st.metric(f"Due in {window} Days", due_soon_count)
+        with col4:
+            st.metric("No Deadline", deadline_index.undated_count(), help="Open tasks without a readable deadline")
+        
+        date_config = {"Deadline Date": st.column_config.DateColumn(format="YYYY-MM-DD")}
+        overdue_tab, soon_tab, assignee_tab, calendar_tab = st.tabs(["🚨 Overdue", "📅 Due Soon", "👥 By Assignee", "🗓️ Calendar"])
+        
+        with overdue_tab:
+            if not overdue.empty:
+                overdue = overdue.assign(**{"Days Late": (pd.Timestamp(today) - overdue["Deadline Date"]).dt.days})
+                st.dataframe(overdue, hide_index=True, use_container_width=True, column_config=date_config)
+                if overdue_count > len(overdue):
+                    st.caption(f"Showing the {len(overdue)} most overdue of {overdue_count} tasks; filter by assignee or priority to narrow down.")
+            else:
+                st.success("Nothing overdue.")
+        
+        with soon_tab:
+            if not due_soon.empty:
+                st.dataframe(due_soon, hide_index=True, use_container_width=True, column_config=date_config)
+                if due_soon_count > len(due_soon):
+                    st.caption(f"Showing the first {len(due_soon)} of {due_soon_count} tasks.")
+            else:
+                st.info(f"Nothing due in the next {window} days.")
+        
+        with assignee_tab:
+            workload = pd.DataFrame({
+                "Overdue": pd.Series(late_counts, dtype="int64"),
+                f"Due in {window} Days": pd.Series(soon_counts, dtype="int64"),
+            }).fillna(0).astype(int)
+            if not workload.empty:
+                workload.index.names = ["Assigned To", "Priority"]
+                st.dataframe(workload.reset_index(), hide_index=True, use_container_width=True)
+            else:
+                st.caption("No overdue or upcoming tasks.")
+        
+        with calendar_tab:
+            col1, col2 = st.columns(2)
+            with col1:
+                month = st.date_input("Month", value=today, key="deadline_month")
+            with col2:
+                day = st.date_input("Tasks due on", value=today, key="deadline_day")
+            
+            # Whole weeks (Monday to Sunday) around the chosen month
+            first = month.replace(day=1)
+            last = (first + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+            start = first - timedelta(days=first.weekday())
+            end = last + timedelta(days=7 - last.weekday())
+            per_day = deadline_index.calendar(start, end, **filters)
+            cells = [
+                (f"{d.day} · {n} due" if n else str(d.day)) if d.month == first.month else ""
+                for d, n in per_day.items()
+            ]
+            st.dataframe(
+                pd.DataFrame([cells[i:i + 7] for i in range(0, len(cells), 7)], columns=["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]),
+                hide_index=True,
+                use_container_width=True
+            )
+            
+            day_tasks = deadline_index.due(day, day + timedelta(days=1), **filters)
+            st.caption(f"{len(day_tasks)} open task(s) due on {day.strftime('%Y-%m-%d')}")
+            if not day_tasks.empty:
+                st.dataframe(day_tasks, hide_index=True, use_container_width=True, column_config=date_config)
+    
+    if not opsi_df.empty:
+        deadline_panel()
+        st.markdown("---")
+    
+    # ========================================
+    # ACTIVE TASKS
+    # ========================================
+    @st.fragment
+    @timed("fragment.active_tasks_panel")
+    def active_tasks_panel():
+        st.subheader("Active Tasks")
+    
+        if not opsi_df.empty:
+            # Add search/filter
+            search_task = st.text_input("🔍 Search tasks by title, assignee, or type...", key="task_search")
+        
+            filtered_tasks = opsi_df
+            if search_task:
+                task_index = get_search_index(opsi_df, [task_title_col, "Assigned To", "Task Type"])
+                filtered_tasks = opsi_df.iloc[task_index.search(search_task)]
+        
+            st.dataframe(
+                filtered_tasks,
+                hide_index=True,
+                use_container_width=True,
+                column_config={"Deadline Date": st.column_config.DateColumn(format="YYYY-MM-DD")}
+            )
+        
+            export_controls(filtered_tasks, "opsi_tasks", "task_export")
+        else:
+            st.info("No tasks found. Create your first task above.")
+    
+    active_tasks_panel()
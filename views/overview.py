@@ -0,0 +1,133 @@
+import streamlit as st
+import pandas as pd
+from cora import get_cora_status
+from mark import get_mark_status
+from opsi import get_opsi_status
+from styles import status_class
+from utils import warm_sheet, sheet_counts, sheet_head, sheet_rows_where
+from views import go_to_page
+
+# ========================================
+# DASHBOARD OVERVIEW PAGE
+# ========================================
+
+def render():
+    """Agent cards, headline metrics, recent leads and urgent tasks (summary reads only)"""
+    # Agent Status Cards
+    cora_status, mark_status, opsi_status = get_cora_status(), get_mark_status(), get_opsi_status()
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        status_badge = f'<span class="{status_class(cora_status)}">{cora_status.upper()}</span>'
+        st.markdown(f"""
+        <div class="agent-card">
+            <h3>🎯 CORA</h3>
+            <p>Community Outreach & Research Assistant</p>
+            <div style="margin-top: 1rem;">
+                {status_badge}
+            </div>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    with col2:
+        status_badge = f'<span class="{status_class(mark_status)}">{mark_status.upper()}</span>'
+        st.markdown(f"""
+        <div class="agent-card">
+            <h3>📧 MARK</h3>
+            <p>Marketing & Research Knowledge</p>
+            <div style="margin-top: 1rem;">
+                {status_badge}
+            </div>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    with col3:
+        status_badge = f'<span class="{status_class(opsi_status)}">{opsi_status.upper()}</span>'
+        st.markdown(f"""
+        <div class="agent-card">
+            <h3>📋 OPSI</h3>
+            <p>Operations & Policy System</p>
+            <div style="margin-top: 1rem;">
+                {status_badge}
+            </div>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    st.markdown("---")
+    
+    # Quick Metrics
+    col1, col2, col3, col4 = st.columns(4)
+    
+    # The summary widgets are answered from the full snapshots once they are
+    # loaded; until then they read only the cells they show (cached apart)
+    try:
+        cora_counts = sheet_counts("CORA", ["Status"])
+        recent_df = sheet_head("CORA", 5)
+    except Exception as e:
+        st.error(f"❌ Error loading CORA data: {e}")
+        cora_counts, recent_df = {"total": 0, "Status": {}}, pd.DataFrame()
+    try:
+        opsi_counts = sheet_counts("OPSI", ["Status"])
+        high_priority_pending = sheet_rows_where("OPSI", {"Priority": "High", "Status": ["New", "Pending"]}, 5)
+    except Exception as e:
+        st.error(f"❌ Error loading OPSI data: {e}")
+        opsi_counts, high_priority_pending = {"total": 0, "Status": {}}, pd.DataFrame()
+    
+    with col1:
+        st.metric("Total Leads", cora_counts["total"])
+    
+    with col2:
+        st.metric("Qualified Leads", cora_counts["Status"].get("Qualified", 0))
+    
+    with col3:
+        st.metric("Contacted", cora_counts["Status"].get("Contacted", 0))
+    
+    with col4:
+        st.metric("Pending Tasks", opsi_counts["Status"].get("New", 0))
+    
+    st.markdown("---")
+    
+    # Recent Activity - Two Columns
+    col1, col2 = st.columns([1, 1])
+    
+    with col1:
+        st.markdown("### 📊 Recent Leads")
+        if not recent_df.empty:
+            st.dataframe(recent_df, use_container_width=True, hide_index=True)
+            
+            # Add Approve Leads button
+            st.button("Approve Leads", use_container_width=True, type="primary", on_click=go_to_page, args=("Approve Leads",))
+        else:
+            st.info("No recent leads. Run CORA to generate leads.")
+    
+    with col2:
+        st.markdown("### 🔥 High Priority Pending Tasks")
+        if opsi_counts["total"]:
+            if not high_priority_pending.empty:
+                # Display each task with quick update option
+                for idx, task in high_priority_pending.iterrows():
+                    with st.container():
+                        col_a, col_b = st.columns([4, 1])
+                        
+                        with col_a:
+                            task_title = task.get('Task Title', 'N/A')
+                            deadline = task.get('Deadline Date')
+                            deadline_text = deadline.strftime('%Y-%m-%d') if pd.notna(deadline) else 'N/A'
+                            st.write(f"**{task_title}**")
+                            st.caption(f"⏰ Deadline: {deadline_text} | 👤 {task.get('Assigned To', 'N/A')}")
+                        
+                        with col_b:
+                            # Navigate to Manage Tasks button
+                            st.button("Start", key=f"quick_start_{idx}", help="Go to Manage Tasks", use_container_width=True,
+                                      on_click=go_to_page, args=("Manage Tasks",))
+                        
+                        st.divider()
+            else:
+                st.success("✅ No high priority pending tasks")
+        else:
+            st.info("No tasks available")
+    
+    # Load the full sheets for the other pages only once the summary is drawn,
+    # so parsing them never delays it
+    warm_sheet("CORA")
+    warm_sheet("OPSI")
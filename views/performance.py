@@ -0,0 +1,111 @@
+import streamlit as st
+import time
+from datetime import datetime
+import pandas as pd
+from perf import PERF
+from session import state_bytes
+from utils import get_change_receiver, get_sheets_quota_status
+
+# ========================================
+# PERFORMANCE PAGE
+# ========================================
+
+def render():
+    """Hidden page (?view=performance) with server timings, caches, reruns and session state sizes"""
+    st.header("⏱️ Performance")
+    st.write("Where server time goes: I/O timings, render spans, cache hit rates and reruns since the app started")
+    
+    spans = PERF.spans()
+    caches = PERF.caches()
+    sessions = PERF.sessions()
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Uptime", f"{(time.time() - PERF.started_at) / 3600:.1f} h")
+    with col2:
+        st.metric("Full Reruns", PERF.reruns)
+    with col3:
+        st.metric("Sessions", len(sessions))
+    with col4:
+        lookups = sum(c["lookups"] for c in caches.values())
+        hits = sum(c["hits"] for c in caches.values())
+        st.metric("Cache Hit Rate", f"{hits / lookups:.0%}" if lookups else "—")
+    
+    st.markdown("---")
+    
+    st.subheader("Latency")
+    if spans:
+        latency_df = pd.DataFrame([
+            {"Span": name, "Calls": s["count"], "Errors": s["errors"], "p50 (ms)": s["p50_ms"], "p95 (ms)": s["p95_ms"], "p99 (ms)": s["p99_ms"], "Max (ms)": s["max_ms"], "Total (s)": s["total_ms"] / 1000}
+            for name, s in spans.items()
+        ])
+        st.dataframe(
+            latency_df.sort_values("Total (s)", ascending=False),
+            hide_index=True,
+            use_container_width=True,
+            column_config={c: st.column_config.NumberColumn(format="%.1f") for c in ["p50 (ms)", "p95 (ms)", "p99 (ms)", "Max (ms)", "Total (s)"]}
+        )
+        st.caption(f"Percentiles cover each span's last {PERF.samples} samples; calls, errors and totals are since start.")
+    else:
+        st.info("No timings recorded yet.")
+    
+    quota = get_sheets_quota_status()
+    if quota:
+        cooldown = f" · cooling down for {quota['cooldown_s']:.0f}s" if quota["cooldown_s"] else ""
+        st.caption(
+            f"Sheets API: {quota['requests']} requests, {quota['coalesced']} coalesced reads, "
+            f"{quota['retries']} retries, {quota['throttled']} throttled{cooldown}"
+        )
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.subheader("Caches")
+        if caches:
+            st.dataframe(
+                pd.DataFrame([
+                    {"Cache": name, "Lookups": c["lookups"], "Hits": c["hits"], "Misses": c["misses"], "Hit Rate": c["hit_rate"]}
+                    for name, c in caches.items()
+                ]),
+                hide_index=True,
+                use_container_width=True,
+                column_config={"Hit Rate": st.column_config.ProgressColumn(format="percent", min_value=0, max_value=1)}
+            )
+        else:
+            st.caption("No cache reads yet.")
+    
+    with col2:
+        st.subheader("Reruns and State per Session")
+        st.dataframe(
+            pd.DataFrame(
+                [
+                    (sid, count, datetime.fromtimestamp(seen), nbytes / 1024 if nbytes is not None else None)
+                    for sid, count, seen, nbytes in sessions
+                ],
+                columns=["Session", "Full Reruns", "Last Seen", "State (KB)"]
+            ),
+            hide_index=True,
+            use_container_width=True,
+            column_config={"State (KB)": st.column_config.NumberColumn(format="%.1f")}
+        )
+        st.caption(f"This session: {st.session_state.perf_session_id}")
+        
+        with st.expander("🧠 This session's state"):
+            sizes = state_bytes(st.session_state)
+            st.dataframe(
+                pd.DataFrame([(key, nbytes / 1024) for key, nbytes in sizes.items()], columns=["Key", "Size (KB)"]),
+                hide_index=True,
+                use_container_width=True,
+                column_config={"Size (KB)": st.column_config.NumberColumn(format="%.2f")}
+            )
+            st.caption(f"{sum(sizes.values()) / 1024:.1f} KB across {len(sizes)} keys (approximate; shared caches not included)")
+    
+    with st.expander("📈 Prometheus export"):
+        receiver = get_change_receiver()
+        if receiver and receiver.metrics:
+            st.caption(f"Scrape {receiver.address}/metrics (send INGEST_TOKEN as a bearer token when one is set).")
+        else:
+            st.caption("The change receiver is disabled, so there is no /metrics endpoint; download the text below instead.")
+        metrics_text = PERF.prometheus()
+        st.code(metrics_text, language="text")
+        st.download_button("📥 Download metrics", metrics_text, "metrics.txt", "text/plain", key="perf_metrics_download")